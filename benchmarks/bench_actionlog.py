@@ -0,0 +1,55 @@
+"""Appends per second: the old open-per-call CSV append vs ActionLogWriter.
+
+    python benchmarks/bench_actionlog.py [--rows 20000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.actionlog import ActionLogWriter, append_row_legacy
+
+ROW = ["2025-07-30 13:42:07", "Daily Shutdown Scheduled", "01:42 PM"]
+
+
+def bench_legacy(directory, rows):
+    path = os.path.join(directory, "legacy.csv")
+    started = time.perf_counter()
+    for _ in range(rows):
+        append_row_legacy(path, ROW)
+    return time.perf_counter() - started
+
+
+def bench_writer(directory, rows, fsync):
+    writer = ActionLogWriter(os.path.join(directory, f"writer-{fsync}.csv"), fsync=fsync, max_bytes=None)
+    started = time.perf_counter()
+    for _ in range(rows):
+        writer.append(ROW)
+    writer.flush()
+    elapsed = time.perf_counter() - started
+    writer.close()
+    return elapsed, writer.batches_written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="power-e-bench-")
+    try:
+        elapsed = bench_legacy(directory, args.rows)
+        print(f"{'open per call':<24} {args.rows / elapsed:>12,.0f} appends/s")
+        for fsync in ('never', 'interval', 'batch'):
+            elapsed, batches = bench_writer(directory, args.rows, fsync)
+            print(f"{'writer fsync=' + fsync:<24} {args.rows / elapsed:>12,.0f} appends/s  ({batches} batches)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
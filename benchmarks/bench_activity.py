@@ -0,0 +1,67 @@
+"""Cost of the pre-shutdown activity sampler, in microseconds per sample.
+
+Times reading the /proc counters, a full sample (counters, rates and the
+ring append), the session count from utmp and the gate's look back over
+the ring. Linux only.
+
+    python benchmarks/bench_activity.py [--samples 20000] [--ring 256]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.activity import ActivityRing, ActivitySampler, LoadGate, count_sessions
+
+
+def per_call_us(function, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def iter_ticks(gate):
+    """Walk the last day before a deadline the way the timer calls tick(), yielding each sample"""
+    remaining = 86400.0
+    while remaining > 0:
+        before = gate.sampler.ring.count if gate.sampler else 0
+        sleep = gate.tick(remaining, 86400.0 - remaining)
+        if gate.sampler and gate.sampler.ring.count > before:
+            yield remaining
+        remaining -= sleep
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--ring', type=int, default=256, help='Ring buffer capacity')
+    args = parser.parse_args()
+
+    sampler = ActivitySampler(ActivityRing(args.ring), sessions=False, max_gap=float('inf'))
+    clock = iter(range(1, args.samples * 2 + 2))
+    counters_us = per_call_us(sampler.read_counters, args.samples)
+    sample_us = per_call_us(lambda: sampler.sample(next(clock)), args.samples)
+    sessions_us = per_call_us(count_sessions, args.samples)
+
+    ring = sampler.ring
+    newest = ring.times[(ring.count - 1) % ring.capacity]
+    recent_us = per_call_us(lambda: ring.recent(newest - args.ring), args.samples)
+
+    gate = LoadGate()
+    ticks = sum(1 for _ in iter_ticks(gate))
+    sampler.close()
+    gate.close()
+
+    print(f"read counters  {counters_us:8.1f} us")
+    print(f"sample         {sample_us:8.1f} us (counters, rates, ring append)")
+    print(f"sessions       {sessions_us:8.1f} us (utmp {'found' if count_sessions() is not None else 'missing'})")
+    print(f"ring look-back {recent_us:8.1f} us over {len(ring)} samples")
+    print(f"samples per deadline with a {gate.window / 60:g} min window: {ticks} "
+          f"(~{ticks * sample_us / 1000:.1f} ms of CPU per shutdown, none outside the window)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Config reload latency and overhead.
+
+Measures the time from an atomic write of scheduler_config.json to the
+watcher's callback (inotify and stat polling), and the cost of a cached
+config load against a full parse.
+
+    python benchmarks/bench_config_reload.py [--samples 20] [--poll-interval 0.05]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.config import DEFAULT_CONFIG, ConfigCache, ConfigWatcher, read_config, write_config_atomic
+
+
+def reload_latencies(path, use_inotify, samples, interval):
+    fired = threading.Event()
+    watcher = ConfigWatcher(path, fired.set, interval=interval, use_inotify=use_inotify)
+    watcher.start()
+    latencies = []
+    try:
+        for i in range(samples):
+            fired.clear()
+            started = time.perf_counter()
+            write_config_atomic(path, dict(DEFAULT_CONFIG, minute=f"{i % 60:02}"))
+            if fired.wait(max(interval * 4, 2.0)):
+                latencies.append(time.perf_counter() - started)
+            time.sleep(interval)
+    finally:
+        watcher.stop()
+    return watcher.mode, latencies, watcher.checks
+
+
+def per_call_us(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=20)
+    parser.add_argument('--poll-interval', type=float, default=0.05)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="power-e-bench-")
+    path = os.path.join(directory, "scheduler_config.json")
+    try:
+        write_config_atomic(path, DEFAULT_CONFIG)
+        for use_inotify in (True, False):
+            mode, latencies, checks = reload_latencies(path, use_inotify, args.samples, args.poll_interval)
+            if use_inotify and mode != 'inotify':
+                print("inotify not available here")
+                continue
+            latencies.sort()
+            print(f"{mode:<8} reload latency p50={latencies[len(latencies) // 2] * 1000:.2f} ms "
+                  f"max={latencies[-1] * 1000:.2f} ms  ({len(latencies)}/{args.samples} seen, {checks} checks)")
+
+        cache = ConfigCache()
+        print(f"full parse   {per_call_us(lambda: read_config(path), 2000):8.1f} us/load")
+        print(f"cached load  {per_call_us(lambda: cache.load(path), 2000):8.1f} us/load")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
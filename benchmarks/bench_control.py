@@ -0,0 +1,75 @@
+"""Control socket throughput: status polls per second and their latency.
+
+Starts a dry-run scheduler with its control server in a temp directory,
+then polls `status` from several clients, each on its own connection, and
+checks that the timer thread was not woken by the traffic.
+
+    python benchmarks/bench_control.py [--clients 8] [--seconds 3]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.config import DEFAULT_CONFIG, write_config_atomic
+from power_e.control import ControlClient, ControlServer
+from power_e.scheduler import ShutdownScheduler
+
+
+def poll(address, seconds, latencies):
+    with ControlClient(address) as client:
+        deadline = time.perf_counter() + seconds
+        while True:
+            started = time.perf_counter()
+            if started >= deadline:
+                break
+            client.request('status')
+            latencies.append(time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="power-e-bench-")
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        write_config_atomic("scheduler_config.json", DEFAULT_CONFIG)
+        scheduler = ShutdownScheduler(headless_mode=True, dry_run=True)
+        scheduler.start_headless_scheduler()
+        server = ControlServer(scheduler, os.path.join(directory, "control.sock")).start()
+        wakeups_before = scheduler.timer.wakeups
+
+        per_client = [[] for _ in range(args.clients)]
+        threads = [threading.Thread(target=poll, args=(server.address, args.seconds, latencies))
+                   for latencies in per_client]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(l for client in per_client for l in client)
+        print(f"{args.clients} clients: {len(latencies) / elapsed:,.0f} status polls/s, "
+              f"p50={latencies[len(latencies) // 2] * 1e6:.0f} us "
+              f"p99={latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us")
+        print(f"timer wakeups during the run: {scheduler.timer.wakeups - wakeups_before}")
+
+        server.stop()
+        scheduler.timer.cancel()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
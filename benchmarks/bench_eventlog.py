@@ -0,0 +1,82 @@
+"""Reading the action log: CSV parsing vs the binary event log's mmap scan and binary search.
+
+    python benchmarks/bench_eventlog.py [--rows 200000]
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.actionlog import LOG_HEADER, TIMESTAMP_FORMAT
+from power_e.eventlog import EventLog, csv_to_events, parse_bound, strings_path
+
+ACTIONS = ["Scheduler Started", "Daily Shutdown Scheduled", "Shutdown Warning", "Shutdown Executed"]
+
+
+def write_csv(path, rows):
+    started = datetime(2020, 1, 1, 8, 0, 0)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_HEADER)
+        for index in range(rows):
+            when = started + timedelta(minutes=17 * index)
+            scheduled = (when + timedelta(minutes=5)).strftime("%I:%M %p") if index % 4 else "N/A"
+            writer.writerow([when.strftime(TIMESTAMP_FORMAT), ACTIONS[index % len(ACTIONS)], scheduled])
+
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def csv_range(path, since, until):
+    """The CSV way: parse every row and keep the ones in range"""
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        next(reader)
+        return sum(1 for row in reader if since <= row[0] < until)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="power-e-bench-")
+    try:
+        csv_path, events_path = os.path.join(directory, "log.csv"), os.path.join(directory, "log.bin")
+        write_csv(csv_path, args.rows)
+        elapsed, _ = timed(lambda: csv_to_events(csv_path, events_path))
+        print(f"{'convert':<24} {args.rows / elapsed:>12,.0f} rows/s")
+        binary_bytes = os.path.getsize(events_path) + os.path.getsize(strings_path(events_path))
+        print(f"{'size':<24} {os.path.getsize(csv_path):>12,} bytes CSV, {binary_bytes:,} bytes binary")
+
+        elapsed, _ = timed(lambda: csv_range(csv_path, "", "~"))
+        print(f"{'full scan csv':<24} {args.rows / elapsed:>12,.0f} rows/s")
+        with EventLog(events_path) as log:
+            elapsed, _ = timed(lambda: sum(1 for _ in log.scan()))
+            print(f"{'full scan binary':<24} {args.rows / elapsed:>12,.0f} rows/s")
+
+            # One day in the middle of the log
+            middle = log[len(log) // 2]
+            day = (middle.timestamp + middle.offset) // 86400 * 86400
+            since, until = (time.strftime(TIMESTAMP_FORMAT, time.gmtime(day + offset)) for offset in (0, 86400))
+            elapsed, expected = timed(lambda: csv_range(csv_path, since, until))
+            print(f"{'one day csv':<24} {elapsed * 1000:>12.3f} ms ({expected} rows)")
+            bounds = parse_bound(since), parse_bound(until)
+            elapsed, found = timed(lambda: sum(1 for _ in log.between(*bounds)), repeat=1000)
+            print(f"{'one day binary':<24} {elapsed * 1000:>12.3f} ms ({found} rows)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
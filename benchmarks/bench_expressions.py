@@ -0,0 +1,68 @@
+"""Schedule expression compile and next-fire throughput, as a fleet dashboard would use it.
+
+Compiles a few thousand mixed readable and cron expressions, then times
+one next fire time and the next N fire times for all of them.
+
+    python benchmarks/bench_expressions.py [--expressions 5000] [--next 10]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.expression import ScheduleExpression, next_fire_times
+
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun', 'weekdays', 'weekends', 'daily', 'mon-thu', 'sat/sun')
+
+
+def random_expression(rng):
+    kind = rng.random()
+    if kind < 0.5:
+        clauses = [f"{rng.choice(DAYS)} {rng.randrange(24):02}:{rng.randrange(0, 60, 5):02}"
+                   for _ in range(rng.randint(1, 3))]
+        text = ', '.join(clauses)
+        if rng.random() < 0.3:
+            text += ' except holidays'
+        return text
+    if kind < 0.8:
+        return f"{rng.randrange(60)} {rng.randrange(24)} * * {rng.choice(['1-5', '0,6', '*', 'mon-fri', '5'])}"
+    return f"{rng.choice(['0', '*/15', '30'])} {rng.choice(['18', '9-17', '22'])} {rng.choice(['1', '1,15', '*'])} " \
+           f"{rng.choice(['*', 'jan-jun', '12'])} {rng.choice(['*', 'fri', '1-5'])}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--expressions', type=int, default=5000)
+    parser.add_argument('--next', type=int, default=10, help='Fire times per expression in the bulk query')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    holidays = [date(2025, 12, 25) + timedelta(days=i) for i in range(0, 10)]
+    texts = [random_expression(rng) for _ in range(args.expressions)]
+
+    started = time.perf_counter()
+    expressions = [ScheduleExpression(text, holidays=holidays) for text in texts]
+    compile_us = (time.perf_counter() - started) / len(texts) * 1e6
+
+    after = datetime(2025, 12, 20, 12, 0)
+    started = time.perf_counter()
+    for expression in expressions:
+        expression.next_fire(after)
+    next_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    upcoming = next_fire_times(expressions, after, args.next)
+    bulk_s = time.perf_counter() - started
+    fires = sum(len(times) for times in upcoming.values())
+
+    print(f"compile      {compile_us:8.1f} us/expression")
+    print(f"next fire    {len(expressions) / next_s:10,.0f} expressions/s ({next_s * 1000:.1f} ms for all)")
+    print(f"next {args.next:<3}     {fires / bulk_s:10,.0f} fire times/s ({bulk_s * 1000:.1f} ms for all)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Fire-time latency of the fleet coordinator as the number of hosts grows.
+
+Every host gets a one-shot action spread over a short window, delivered
+through RecordingTransport, and the lag between the scheduled and the
+actual dispatch time is reported per fleet size.
+
+    python benchmarks/bench_fleet.py [--hosts 100 1000 5000 20000] [--window 2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.fleet import FleetCoordinator, RecordingTransport
+
+
+class OneShot:
+    """Entry that fires once at an exact UTC instant (schedule entries have minute resolution)"""
+
+    def __init__(self, action, when):
+        self.action = action
+        self.when = when
+
+    def next_fire(self, after, blackout_dates=()):
+        return self.when if self.when > after else None
+
+
+def run_once(hosts, window, transport_delay):
+    transport = RecordingTransport(delay=transport_delay)
+    coordinator = FleetCoordinator(transport)
+
+    start = datetime.now(timezone.utc) + timedelta(seconds=0.5)
+    load_started = time.perf_counter()
+    for i in range(hosts):
+        when = start + timedelta(seconds=window * i / hosts)
+        coordinator.add_host(f"host-{i:05d}", [OneShot('shutdown', when)], zone=None)
+    load_ms = (time.perf_counter() - load_started) * 1000
+
+    cpu_started = time.process_time()
+    asyncio.run(coordinator.run(until=start + timedelta(seconds=window + 1)))
+    cpu = time.process_time() - cpu_started
+
+    summary = coordinator.latency_summary()
+    assert len(transport.calls) == hosts, (len(transport.calls), hosts)
+    return load_ms, cpu, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, nargs='+', default=[100, 1000, 5000, 20000])
+    parser.add_argument('--window', type=float, default=2.0, help='Seconds over which fire times are spread')
+    parser.add_argument('--transport-delay', type=float, default=0.0, help='Simulated seconds per host action')
+    args = parser.parse_args()
+
+    print(f"{'hosts':>8} {'load ms':>9} {'cpu s':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for hosts in args.hosts:
+        load_ms, cpu, s = run_once(hosts, args.window, args.transport_delay)
+        print(f"{hosts:>8} {load_ms:>9.1f} {cpu:>7.2f} {s['p50_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['max_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
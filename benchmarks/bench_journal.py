@@ -0,0 +1,73 @@
+"""State journal cost: record throughput per fsync policy, synchronous record latency, and replay time.
+
+Replay is timed on a long journal that was never checkpointed and on the
+same history with the default checkpoint interval, which is what a
+scheduler starting after months of running sees. A torn last line is
+appended to check that recovery cuts it off.
+
+    python benchmarks/bench_journal.py [--records 20000] [--history 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.journal import Journal, encode_record
+from power_e.metrics import Histogram
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000, help='Records written per fsync policy')
+    parser.add_argument('--history', type=int, default=200000, help='Records in the replayed journal')
+    parser.add_argument('--sync', type=int, default=200, help='Synchronous (fired) records timed')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for policy in ('batch', 'interval', 'never'):
+            journal = Journal(os.path.join(directory, f'{policy}.log'), fsync=policy)
+            started = time.perf_counter()
+            for i in range(args.records):
+                journal.record('armed', 'shutdown', 1.7e9 + i * 60)
+            journal.flush()
+            elapsed = time.perf_counter() - started
+            print(f"{policy:8} {args.records / elapsed:10,.0f} records/s, {journal.checkpoints} checkpoints, "
+                  f"batch write p99 {journal.write_latency.percentile(99) * 1000:.2f} ms")
+            journal.close()
+
+        journal = Journal(os.path.join(directory, 'sync.log'))
+        latency = Histogram()
+        for i in range(args.sync):
+            started = time.perf_counter()
+            journal.record('fired', 'shutdown', 1.7e9 + i * 60, sync=True)
+            latency.observe(time.perf_counter() - started)
+        journal.close()
+        print(f"fired (sync) p50 {latency.percentile(50) * 1000:.2f} ms, p99 {latency.percentile(99) * 1000:.2f} ms")
+
+        path = os.path.join(directory, 'history.log')
+        with open(path, 'w', newline='') as f:
+            for seq in range(1, args.history + 1):
+                kind = ('armed', 'fired')[seq % 2]
+                f.write(encode_record(seq, kind, 'shutdown', 1.7e9 + seq // 2 * 86400, 1.7e9 + seq * 43200))
+            f.write("999999999 fired shutdown 17")
+        started = time.perf_counter()
+        journal = Journal(path, checkpoint_every=1000)
+        cold_ms = (time.perf_counter() - started) * 1000
+        print(f"replay   {journal.replayed:,} records in {cold_ms:.1f} ms without a checkpoint"
+              f"{', torn tail dropped' if journal.truncated else ''}")
+        assert journal.truncated and journal.state.seq == args.history
+        journal.close()
+
+        started = time.perf_counter()
+        journal = Journal(path, checkpoint_every=1000)
+        warm_ms = (time.perf_counter() - started) * 1000
+        print(f"replay   {journal.replayed:,} records in {warm_ms:.2f} ms from the checkpoint")
+        assert journal.state.seq == args.history
+        journal.close()
+
+
+if __name__ == '__main__':
+    main()
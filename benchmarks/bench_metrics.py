@@ -0,0 +1,72 @@
+"""Recording and export overhead of the metrics module.
+
+Times Histogram.observe() from one and several threads, and a full
+Prometheus render and JSON snapshot of a scheduler's registry.
+
+    python benchmarks/bench_metrics.py [--observations 1000000] [--threads 4]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.metrics import Histogram
+
+
+def observe_ns(histogram, values):
+    started = time.perf_counter()
+    for value in values:
+        histogram.observe(value)
+    return (time.perf_counter() - started) / len(values) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--observations', type=int, default=1000000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    values = [random.expovariate(100) for _ in range(args.observations)]
+    histogram = Histogram()
+    print(f"observe, 1 thread:    {observe_ns(histogram, values):6.0f} ns/observation")
+
+    histogram = Histogram()
+    share = values[:args.observations // args.threads]
+    threads = [threading.Thread(target=observe_ns, args=(histogram, share)) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    print(f"observe, {args.threads} threads:   {elapsed / (len(share) * args.threads) * 1e9:6.0f} ns/observation "
+          f"({histogram.count} counted of {len(share) * args.threads})")
+
+    directory = tempfile.mkdtemp(prefix="power-e-bench-")
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        from power_e.scheduler import ShutdownScheduler
+        scheduler = ShutdownScheduler(headless_mode=True, dry_run=True)
+        for value in values[:10000]:
+            scheduler.fire_lag.observe(value)
+        registry = scheduler.metrics
+        for name, export in (("prometheus render", registry.render_prometheus), ("json snapshot", registry.snapshot)):
+            started = time.perf_counter()
+            for _ in range(1000):
+                export()
+            print(f"{name + ':':<21} {(time.perf_counter() - started) * 1000:6.0f} us/export")
+        scheduler.action_log.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
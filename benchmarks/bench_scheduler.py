@@ -0,0 +1,85 @@
+"""Scheduling core benchmarks: engine throughput, simulated CPU per day, fire precision.
+
+- engine: entries are popped and re-queued through ScheduleEngine.pop_due
+  across simulated weeks; reports scheduled events processed per second.
+- simulate: the full ShutdownScheduler runs a year of schedules against a
+  VirtualClock and FakeBackend; reports CPU time per simulated day.
+- precision: DeadlineTimer waits on the real clock for short deadlines and
+  reports how late each one returned.
+
+    python benchmarks/bench_scheduler.py [--entries 5000] [--days 365] [--fires 20]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.schedule import ScheduleEngine, ScheduleEntry, WEEKDAYS
+from power_e.simulate import simulate
+from power_e.timer import DeadlineTimer
+
+SIMULATED_CONFIG = {
+    'hour': '11', 'minute': '30', 'ampm': 'PM',
+    'schedules': [
+        {'action': 'warn', 'time': '11:15 PM', 'message': 'Shutdown in 15 minutes'},
+        {'action': 'reboot', 'time': '03:00 AM', 'days': ['sun']},
+        {'action': 'shutdown', 'time': '07:00 PM', 'days': ['fri']},
+    ],
+}
+
+
+def bench_engine(entries, days):
+    start = datetime(2025, 1, 1)
+    engine = ScheduleEngine(
+        [ScheduleEntry('shutdown', i % 24, i % 60, days=[WEEKDAYS[i % 7]] if i % 3 else None)
+         for i in range(entries)], now=start)
+    processed = 0
+    started = time.perf_counter()
+    now = start
+    end = start + timedelta(days=days)
+    while now < end:
+        now = engine.next_fire_time()
+        processed += len(engine.pop_due(now))
+    elapsed = time.perf_counter() - started
+    print(f"engine     {entries} entries over {days} days: {processed:,} events, "
+          f"{processed / elapsed:,.0f} events/s")
+
+
+def bench_simulation(days):
+    result = simulate(SIMULATED_CONFIG, days=days)
+    print(f"simulate   {days} days: {len(result.fires)} fires, {result.wakeups} timer wakeups, "
+          f"{result.cpu_seconds / days * 1e6:.0f} us CPU per simulated day, "
+          f"max fire error {result.max_fire_error:.3f} s (virtual)")
+
+
+def bench_precision(fires, spacing):
+    timer = DeadlineTimer()
+    lags = []
+    for _ in range(fires):
+        deadline = datetime.now() + timedelta(seconds=spacing)
+        timer.wait_until(deadline)
+        lags.append((datetime.now() - deadline).total_seconds())
+    lags.sort()
+    print(f"precision  {fires} fires: p50={lags[len(lags) // 2] * 1000:.2f} ms "
+          f"p99={lags[int(len(lags) * 0.99)] * 1000:.2f} ms max={lags[-1] * 1000:.2f} ms late")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=5000)
+    parser.add_argument('--engine-days', type=int, default=28)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--fires', type=int, default=20)
+    parser.add_argument('--spacing', type=float, default=0.1, help='Seconds between precision deadlines')
+    args = parser.parse_args()
+
+    bench_engine(args.entries, args.engine_days)
+    bench_simulation(args.days)
+    bench_precision(args.fires, args.spacing)
+
+
+if __name__ == '__main__':
+    main()
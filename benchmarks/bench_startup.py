@@ -0,0 +1,110 @@
+"""Cold-start time, import cost and resident memory of PowerE start-up.
+
+Each mode is started in a fresh process with --init-only, which loads
+everything the mode needs and exits before any scheduling starts.
+
+    python benchmarks/bench_startup.py [--runs 10] [--exe dist/PowerE/PowerE.exe]
+
+--exe adds the frozen build to the comparison (wall time and RSS only;
+-X importtime does not apply to it).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "PowerE.py")
+
+# Run the command as a child and print its peak RSS in KiB (POSIX getrusage; psutil elsewhere)
+RSS_PROBE = r"""
+import subprocess, sys
+cmd = sys.argv[1:]
+try:
+    import resource
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(rss // 1024 if sys.platform == 'darwin' else rss)
+except ImportError:
+    import psutil, time
+    proc = psutil.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak = 0
+    while proc.poll() is None:
+        try:
+            peak = max(peak, proc.memory_info().rss)
+        except psutil.Error:
+            break
+        time.sleep(0.005)
+    print(peak // 1024)
+"""
+
+
+def wall_times(cmd, runs, cwd):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def import_profile(cmd, cwd):
+    """Total import time in ms and whether tkinter was loaded, from -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime"] + cmd[1:], cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    total_us = 0
+    loaded_tk = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name_indent = len(name) - len(name.lstrip())
+        if name.strip() == "tkinter":
+            loaded_tk = True
+        if name_indent == 1 and cumulative.strip().isdigit():
+            total_us += int(cumulative)
+    return total_us / 1000, loaded_tk
+
+
+def rss_kib(cmd, cwd):
+    try:
+        out = subprocess.run([sys.executable, "-c", RSS_PROBE] + cmd, cwd=cwd,
+                             capture_output=True, text=True).stdout.strip()
+        return int(out)
+    except ValueError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--exe', help='Frozen build to compare, e.g. dist/PowerE/PowerE.exe')
+    parser.add_argument('--gui', action='store_true', help='Also measure GUI start-up (needs a display)')
+    args = parser.parse_args()
+
+    modes = [("source headless", [sys.executable, SCRIPT, "--init-only", "--dry-run"])]
+    if args.gui:
+        modes.append(("source gui", [sys.executable, SCRIPT, "--head", "--init-only", "--dry-run"]))
+    if args.exe:
+        modes.append(("frozen headless", [os.path.abspath(args.exe), "--init-only", "--dry-run"]))
+
+    # An empty working directory, so no config or log is read or written
+    with tempfile.TemporaryDirectory(prefix="power-e-bench-") as cwd:
+        print(f"{'mode':<18} {'median ms':>10} {'min ms':>8} {'imports ms':>11} {'tkinter':>8} {'RSS KiB':>9}")
+        for name, cmd in modes:
+            times = wall_times(cmd, args.runs, cwd)
+            if cmd[0] == sys.executable:
+                imports_ms, loaded_tk = import_profile(cmd, cwd)
+                imports, tk_shown = f"{imports_ms:.1f}", "yes" if loaded_tk else "no"
+            else:
+                imports, tk_shown = "-", "-"
+            rss = rss_kib(cmd, cwd)
+            print(f"{name:<18} {statistics.median(times) * 1000:>10.1f} {min(times) * 1000:>8.1f} "
+                  f"{imports:>11} {tk_shown:>8} {rss if rss is not None else '-':>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Bulk validation of host schedule rows, NumPy columns vs the pure-Python row loop.
+
+Generates an inventory with a share of bad values, validates the hour,
+minute, AM/PM and timezone columns with each engine, checks both agree,
+and times a full provision() (normalized per-host configs) as well.
+
+    python benchmarks/bench_validation.py [--rows 100000] [--bad 0.05]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.validation import numpy_module, provision, validate_columns
+
+ZONES = ('', 'UTC', 'Europe/Berlin', 'America/New_York', 'Asia/Kolkata', 'Australia/Sydney')
+BAD_VALUES = ('13', '0', '7x', '', ' 60', 'noon', 'Europe/Nowhere')
+
+
+def make_rows(count, bad, rng):
+    rows = []
+    for index in range(count):
+        config = {'hour': f"{rng.randrange(1, 13):02}" if rng.random() < 0.5 else str(rng.randrange(1, 13)),
+                  'minute': f"{rng.randrange(60):02}", 'ampm': rng.choice(('AM', 'PM', 'am', 'p ')),
+                  'timezone': rng.choice(ZONES)}
+        if rng.random() < bad:
+            config[rng.choice(('hour', 'minute', 'ampm', 'timezone'))] = rng.choice(BAD_VALUES)
+        rows.append((f"host-{index:06}", config))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--bad', type=float, default=0.05, help='Share of rows with one invalid value')
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.bad, random.Random(42))
+    columns = [[config.get(key) for _, config in rows] for key in ('hour', 'minute', 'ampm', 'timezone')]
+
+    engines = [('python', False)] + ([('numpy', True)] if numpy_module() else [])
+    results = {}
+    for name, use_numpy in engines:
+        validate_columns(*[column[:1000] for column in columns], use_numpy=use_numpy)
+        started = time.perf_counter()
+        results[name] = validate_columns(*columns, use_numpy=use_numpy)
+        elapsed = time.perf_counter() - started
+        print(f"{name:7} columns   {args.rows / elapsed:12,.0f} rows/s ({elapsed * 1000:.1f} ms, "
+              f"{len(results[name].errors)} rejected)")
+
+        started = time.perf_counter()
+        configs, errors, _ = provision(rows, use_numpy=use_numpy)
+        elapsed = time.perf_counter() - started
+        print(f"{name:7} provision {args.rows / elapsed:12,.0f} rows/s ({elapsed * 1000:.1f} ms, "
+              f"{len(configs)} configs)")
+
+    if 'numpy' in results:
+        assert results['numpy'].errors == results['python'].errors
+    else:
+        print("numpy not installed; only the pure-Python engine was timed")
+
+
+if __name__ == '__main__':
+    main()
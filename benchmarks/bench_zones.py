@@ -0,0 +1,76 @@
+"""Next-fire evaluation across many host/timezone pairs, cached transition tables vs zoneinfo.
+
+Every host gets a daily entry at a random time in a random zone. The
+same next fire instants are computed with ZonedEntry (table lookups) and
+with a direct zoneinfo conversion per query, and checked to agree.
+
+    python benchmarks/bench_zones.py [--hosts 5000] [--queries 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.schedule import ScheduleEntry
+from power_e.zones import ZonedEntry, get_zone, transition_table
+
+ZONES = ('Europe/Berlin', 'Europe/London', 'America/New_York', 'America/Los_Angeles', 'America/Sao_Paulo',
+         'Asia/Kolkata', 'Asia/Tokyo', 'Australia/Sydney', 'Australia/Lord_Howe', 'Pacific/Auckland',
+         'Africa/Cairo', 'America/Santiago', 'Asia/Tehran', 'Pacific/Chatham', 'UTC')
+
+
+def naive_next_fire(entry, zone, after):
+    """Reference: convert with zoneinfo on every query (fold=0, no DST policy beyond zoneinfo's)"""
+    wall = after.astimezone(zone).replace(tzinfo=None)
+    while True:
+        wall = entry.next_fire(wall)
+        moment = wall.replace(tzinfo=zone)
+        # Skip wall times that fall in a gap; zoneinfo would silently shift them
+        if moment.astimezone(timezone.utc).astimezone(zone).replace(tzinfo=None) == wall and moment > after:
+            return moment
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=20, help='Next-fire queries per host, spread over a year')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    hosts = [(ScheduleEntry('shutdown', rng.randrange(24), rng.randrange(0, 60, 5)), rng.choice(ZONES))
+             for _ in range(args.hosts)]
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    instants = [start + timedelta(days=365 * i / args.queries, hours=rng.random() * 24)
+                for i in range(args.queries)]
+
+    started = time.perf_counter()
+    for year in (2025, 2026):
+        for zone in ZONES:
+            transition_table(zone, year)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    zoned = [ZonedEntry(entry, zone, nonexistent='skip') for entry, zone in hosts]
+    started = time.perf_counter()
+    table_results = [entry.next_fire(after) for entry in zoned for after in instants]
+    table_s = time.perf_counter() - started
+
+    zones = {name: get_zone(name) for name in ZONES}
+    started = time.perf_counter()
+    naive_results = [naive_next_fire(entry, zones[zone], after) for entry, zone in hosts for after in instants]
+    naive_s = time.perf_counter() - started
+
+    mismatches = sum(a != b for a, b in zip(table_results, naive_results))
+    queries = len(table_results)
+    print(f"tables       {len(ZONES) * 2} built in {build_ms:.1f} ms")
+    print(f"table lookup {queries / table_s:10,.0f} next fires/s ({table_s * 1000:.1f} ms for {queries:,})")
+    print(f"zoneinfo     {queries / naive_s:10,.0f} next fires/s ({naive_s * 1000:.1f} ms for {queries:,})")
+    print(f"mismatches   {mismatches}")
+    assert mismatches == 0
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Soak test: thousands of consecutive cancelled shutdowns in virtual time.
+
+Every daily shutdown is cancelled straight after it is issued, the way a
+server that uses the cancel prompt as "skip tonight" behaves. The timer
+thread's stack depth at each fire and the process RSS are sampled, and
+the run fails if either keeps growing.
+
+    python benchmarks/soak_reschedule.py [--days 10000] [--rss-slack-kib 2048]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_e.clock import VirtualClock
+from power_e.config import write_config_atomic
+from power_e.simulate import SimulatedScheduler
+
+
+class NullBackend:
+    """Succeeds without keeping a record, so the backend itself does not grow"""
+
+    def run(self, argv, timeout):
+        return 0
+
+
+class CancellingScheduler(SimulatedScheduler):
+    """Cancels every shutdown it issues and samples stack depth at each fire"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.depths = set()
+        self.cancels = 0
+
+    def run_due_actions(self):
+        depth = 0
+        frame = sys._getframe()
+        while frame is not None:
+            depth += 1
+            frame = frame.f_back
+        self.depths.add(depth)
+        super().run_due_actions()
+
+    def perform_shutdown(self, action='shutdown', fire_time=None):
+        # Wait for the command so the executor queue cannot build up between virtual days
+        future = super().perform_shutdown(action, fire_time)
+        future.result()
+        return future
+
+    def announce_executed(self):
+        self.executor.cancel().add_done_callback(self.on_cancel_done)
+
+    def on_cancel_done(self, future):
+        future.result()
+        self.cancels += 1
+
+
+def rss_kib():
+    """Current resident set size, from /proc on Linux or peak RSS elsewhere"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def soak(days):
+    """Run the cancelling scheduler for `days` virtual days. Returns (scheduler, RSS samples, seconds)."""
+    directory = tempfile.mkdtemp(prefix="power-e-soak-")
+    try:
+        config_file = os.path.join(directory, "scheduler_config.json")
+        write_config_atomic(config_file, {
+            'hour': '11', 'minute': '00', 'ampm': 'PM',
+            'log': {'path': os.path.join(directory, "shutdown_log.csv"), 'fsync': 'never'},
+        })
+        start = datetime(2025, 1, 1)
+        clock = VirtualClock(start, end=start + timedelta(days=days))
+        scheduler = CancellingScheduler(clock, NullBackend(), config_file, keep_fires=100)
+
+        samples = []
+        step = max(days // 20, 1)
+
+        def sample():
+            # Called from the timer's own waits, so sampling never needs another thread
+            day = (clock.now() - start).days
+            if day >= len(samples) * step:
+                samples.append((day, rss_kib()))
+
+        wait = clock.wait
+
+        def sampling_wait(event, timeout):
+            sample()
+            return wait(event, timeout)
+
+        clock.wait = sampling_wait
+        clock.on_end = lambda: scheduler.timer.cancel()
+
+        started = time.perf_counter()
+        scheduler.shutdown_time = scheduler.get_next_shutdown_datetime()
+        scheduler.is_scheduler_running = True
+        scheduler.reset_timer()
+        scheduler.countdown_loop()
+        scheduler.executor.close(wait=True)
+        elapsed = time.perf_counter() - started
+        scheduler.action_log.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return scheduler, samples, elapsed
+
+
+def check(scheduler, samples, days, rss_slack_kib=2048):
+    """Raise AssertionError unless every shutdown was cancelled with a flat stack and flat RSS.
+
+    Returns the RSS growth in KiB after the first tenth of the run.
+    """
+    baseline = samples[len(samples) // 10][1]
+    growth = max(rss for _, rss in samples) - baseline
+    assert scheduler.cancels >= days - 1, f"only {scheduler.cancels} cancels"
+    assert len(scheduler.depths) == 1, f"stack depth changed between fires: {sorted(scheduler.depths)}"
+    assert growth <= rss_slack_kib, f"RSS grew {growth} KiB after warm-up"
+    return growth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=10000)
+    parser.add_argument('--rss-slack-kib', type=int, default=2048,
+                        help='RSS growth allowed after the first tenth of the run')
+    args = parser.parse_args()
+
+    scheduler, samples, elapsed = soak(args.days)
+    for day, rss in samples:
+        print(f"day {day:>6}: RSS {rss:>7} KiB")
+    print(f"{args.days} days in {elapsed:.1f} s, {scheduler.cancels} shutdowns cancelled, "
+          f"stack depth at fire: {sorted(scheduler.depths)}")
+    growth = check(scheduler, samples, args.days, args.rss_slack_kib)
+    print(f"OK: flat stack, RSS growth {growth} KiB after warm-up")
+
+
+if __name__ == '__main__':
+    main()
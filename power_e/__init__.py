@@ -0,0 +1,3 @@
+"""Power E scheduling core"""
+
+__version__ = "1.0"
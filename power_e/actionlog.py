@@ -0,0 +1,270 @@
+import atexit
+import csv
+import glob
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from power_e.metrics import Histogram
+
+LOG_HEADER = ["Timestamp", "Action", "Scheduled Time"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+FSYNC_POLICIES = ('batch', 'interval', 'never')
+LOG_FORMATS = ('csv', 'binary', 'both')
+
+
+def append_row_legacy(path, row):
+    """The original open-per-call append, kept as the benchmark baseline"""
+    file_exists = os.path.isfile(path)
+    with open(path, mode="a", newline="") as file:
+        writer = csv.writer(file)
+        if not file_exists:
+            writer.writerow(LOG_HEADER)
+        writer.writerow(row)
+
+
+class ActionLogWriter:
+    """Append-only CSV action log that keeps its file open and writes from a background thread.
+
+    append() only queues the row. The writer thread blocks until rows
+    arrive, writes everything queued as one batch and then applies the
+    fsync policy:
+
+    - 'batch': fsync after every batch (default)
+    - 'interval': fsync at most every fsync_interval seconds
+    - 'never': leave it to the OS
+
+    The file is rotated when it grows past max_bytes or its first row is
+    older than max_age seconds. Rotated segments are renamed with a
+    timestamp and optionally gzipped. They are all kept unless `backups` is
+    set, in which case only the newest `backups` are.
+
+    mirror is another writer that gets every log() call too, such as the
+    binary event log written alongside the CSV.
+    """
+
+    def __init__(self, path="shutdown_log.csv", fsync='batch', fsync_interval=5.0,
+                 max_bytes=1024 * 1024, max_age=None, backups=None, compress=False, mirror=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync!r}")
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self.compress = compress
+        self.mirror = mirror
+
+        self._queue = queue.Queue()
+        self._file = None
+        self._writer = None
+        self._segment_started = None
+        self._last_fsync = 0.0
+        self._closed = False
+
+        # Counters for checking the writer's health
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rotations = 0
+        self.errors = 0
+        # Seconds per batch write, including rotation and fsync
+        self.write_latency = Histogram()
+
+        self._thread = threading.Thread(target=self._run, name='power-e-log', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, row):
+        """Queue one row; returns immediately"""
+        if self._closed:
+            raise ValueError("Action log is closed")
+        self._queue.put(list(row))
+
+    def log(self, action, scheduled_time="N/A", when=None, scheduled=None):
+        """Queue an action row in the Timestamp,Action,Scheduled Time format.
+
+        scheduled is the datetime scheduled_time was formatted from, for
+        writers that keep the date as well.
+        """
+        when = when or datetime.now()
+        self.append([when.strftime(TIMESTAMP_FORMAT), action, scheduled_time])
+        if self.mirror is not None:
+            self.mirror.log(action, scheduled_time, when=when, scheduled=scheduled)
+
+    def flush(self, timeout=None):
+        """Block until every row queued so far is written. Returns False on timeout."""
+        done = threading.Event()
+        self._queue.put(done)
+        written = done.wait(timeout)
+        if self.mirror is not None:
+            written = self.mirror.flush(timeout) and written
+        return written
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return
+        self._closed = True
+        # Short-lived writers (converters, tests) would otherwise be kept alive until exit
+        atexit.unregister(self.close)
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self.mirror is not None:
+            self.mirror.close(timeout)
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            # Take whatever else is already queued so it goes out as one batch
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = [item for item in items if isinstance(item, list)]
+            if rows:
+                started = time.perf_counter()
+                try:
+                    self._write(rows)
+                    self.write_latency.observe(time.perf_counter() - started)
+                except Exception:
+                    self.errors += 1
+                    self._close_file()
+
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if None in items:
+                self._close_file()
+                return
+
+    def _write(self, rows):
+        if self._file is None:
+            self._open()
+        # Also checked right after opening, so a log already past its limits is not written to again
+        if self._should_rotate():
+            self._rotate()
+
+        self._write_rows(rows)
+        self._file.flush()
+        self.rows_written += len(rows)
+        self.batches_written += 1
+
+        now = time.monotonic()
+        if self.fsync == 'batch' or (self.fsync == 'interval' and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def _write_rows(self, rows):
+        self._writer.writerows(rows)
+
+    def _open(self):
+        is_new = not os.path.isfile(self.path) or os.path.getsize(self.path) == 0
+        self._segment_started = time.time() if is_new else self._first_row_time()
+        self._file = open(self.path, mode="a", newline="")
+        self._writer = csv.writer(self._file)
+        if is_new:
+            self._writer.writerow(LOG_HEADER)
+
+    def _first_row_time(self):
+        """Age of an existing log, taken from its first data row"""
+        try:
+            with open(self.path, newline="") as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                first = next(reader, None)
+            if first:
+                return time.mktime(datetime.strptime(first[0], TIMESTAMP_FORMAT).timetuple())
+        except (OSError, ValueError, IndexError):
+            pass
+        return time.time()
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        self._file = None
+        self._writer = None
+
+    def _should_rotate(self):
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(self.max_age) and time.time() - self._segment_started >= self.max_age
+
+    def _rotate(self):
+        self._close_file()
+        base, ext = os.path.splitext(self.path)
+        rotated = f"{base}.{datetime.now().strftime('%Y%m%d-%H%M%S')}{ext}"
+        counter = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            rotated = f"{base}.{datetime.now().strftime('%Y%m%d-%H%M%S')}-{counter}{ext}"
+            counter += 1
+        for source, target in zip(self.segment_files(self.path), self.segment_files(rotated)):
+            if os.path.exists(source):
+                os.replace(source, target)
+        self.rotations += 1
+        self._open()
+
+        if self.compress:
+            with open(rotated, 'rb') as src, gzip.open(rotated + ".gz", 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+        self._prune()
+
+    def segment_files(self, path):
+        """Files that make up the log segment at path"""
+        return [path]
+
+    def rotated_segments(self):
+        """Rotated segment paths, oldest first"""
+        base, ext = os.path.splitext(self.path)
+        paths = glob.glob(f"{glob.escape(base)}.*{ext}") + glob.glob(f"{glob.escape(base)}.*{ext}.gz")
+        return sorted(paths, key=lambda path: (os.path.getmtime(path), path))
+
+    def _prune(self):
+        if self.backups is None:
+            return
+        segments = self.rotated_segments()
+        for segment in segments[:max(len(segments) - self.backups, 0)]:
+            for path in self.segment_files(segment):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def writer_from_config(config, path="shutdown_log.csv"):
+    """Build a writer from the optional 'log' section of scheduler_config.json.
+
+    "format" is 'csv' (default), 'binary' (the event log of power_e.eventlog
+    instead of the CSV) or 'both'.
+    """
+    options = config.get('log', {}) if isinstance(config, dict) else {}
+    log_format = options.get('format', 'csv')
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"log.format must be one of {', '.join(LOG_FORMATS)}")
+    max_age_days = options.get('max_age_days')
+    settings = dict(
+        fsync=options.get('fsync', 'batch'),
+        fsync_interval=float(options.get('fsync_interval', 5.0)),
+        max_bytes=int(options.get('max_bytes', 1024 * 1024)),
+        max_age=float(max_age_days) * 86400 if max_age_days else None,
+        backups=options.get('backups'),
+    )
+    path = options.get('path', path)
+    if log_format == 'csv':
+        return ActionLogWriter(path=path, compress=bool(options.get('compress', False)), **settings)
+
+    from power_e.eventlog import EventLogWriter
+    events = EventLogWriter(path=options.get('binary_path', os.path.splitext(path)[0] + '.bin'), **settings)
+    if log_format == 'binary':
+        return events
+    return ActionLogWriter(path=path, compress=bool(options.get('compress', False)), mirror=events, **settings)
@@ -0,0 +1,249 @@
+"""Load-aware deferral of power actions.
+
+In the last minutes before a shutdown or reboot is due, the scheduler
+samples CPU load and disk throughput from /proc, and logged-in sessions
+from utmp, into a fixed-size ring buffer. Samples come closer together as
+the deadline approaches. Outside that window nothing is read. When the
+action comes due, LoadGate looks at the recent samples and puts the
+action off by a fixed step while the machine is busy, up to a cap, so a
+long build or backup is not cut off and a machine that never goes idle
+still shuts down.
+
+Linux only; the scheduler disables the gate elsewhere.
+"""
+import os
+from array import array
+
+PROC_STAT = '/proc/stat'
+PROC_DISKSTATS = '/proc/diskstats'
+SYS_BLOCK = '/sys/block'
+UTMP = '/var/run/utmp'
+
+# glibc struct utmp on Linux: 384-byte records starting with a short ut_type
+UTMP_RECORD = 384
+USER_PROCESS = 7
+SECTOR = 512
+# Block devices that are not real disks, or that would count the same I/O twice
+VIRTUAL_DISKS = ('loop', 'ram', 'zram', 'dm-', 'md', 'sr', 'fd')
+
+
+def whole_disks():
+    """Names of physical disks in /proc/diskstats, leaving out partitions and virtual devices"""
+    try:
+        names = os.listdir(SYS_BLOCK)
+    except OSError:
+        return None
+    return frozenset(name for name in names if not name.startswith(VIRTUAL_DISKS))
+
+
+def count_sessions(path=UTMP):
+    """Logged-in user sessions from utmp, or None if it cannot be read"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return sum(1 for offset in range(0, len(data) - UTMP_RECORD + 1, UTMP_RECORD)
+               if data[offset] == USER_PROCESS and data[offset + 1] == 0)
+
+
+class ActivityRing:
+    """The latest `capacity` samples in preallocated arrays; appending never allocates"""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.cpu = array('d', bytes(8 * capacity))
+        self.disk = array('d', bytes(8 * capacity))
+        # -1 when the session count is unknown
+        self.sessions = array('d', bytes(8 * capacity))
+        # Samples ever appended; the newest is at (count - 1) % capacity
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, when, cpu, disk, sessions):
+        i = self.count % self.capacity
+        self.times[i] = when
+        self.cpu[i] = cpu
+        self.disk[i] = disk
+        self.sessions[i] = -1 if sessions is None else sessions
+        self.count += 1
+
+    def recent(self, since):
+        """(samples, mean CPU %, mean disk MB/s, most sessions or None) for samples taken at or after since"""
+        samples = 0
+        cpu = disk = 0.0
+        sessions = -1.0
+        i = self.count
+        oldest = self.count - len(self)
+        while i > oldest:
+            i -= 1
+            j = i % self.capacity
+            if self.times[j] < since:
+                break
+            samples += 1
+            cpu += self.cpu[j]
+            disk += self.disk[j]
+            sessions = max(sessions, self.sessions[j])
+        if not samples:
+            return None
+        return samples, cpu / samples, disk / samples, None if sessions < 0 else int(sessions)
+
+
+class ActivitySampler:
+    """Turns /proc counters into rates; each sample() is two small reads and a ring append"""
+
+    def __init__(self, ring=None, sessions=True, max_gap=60.0):
+        self.ring = ring if ring is not None else ActivityRing()
+        self.disks = whole_disks()
+        self.count_sessions = sessions
+        # Counters older than this are a stale baseline (sampling paused between windows)
+        self.max_gap = max_gap
+        self._stat = open(PROC_STAT, 'rb')
+        self._diskstats = open(PROC_DISKSTATS, 'rb')
+        self._previous = None
+
+    def read_counters(self):
+        """(busy jiffies, total jiffies, sectors read + written)"""
+        self._stat.seek(0)
+        # user nice system idle iowait irq softirq steal; guest time is already in user
+        fields = [int(value) for value in self._stat.readline().split()[1:9]]
+        total = sum(fields)
+        busy = total - fields[3] - fields[4]
+
+        self._diskstats.seek(0)
+        disks = self.disks
+        sectors = 0
+        for line in self._diskstats.read().splitlines():
+            parts = line.split()
+            if disks is None or parts[2].decode() in disks:
+                sectors += int(parts[5]) + int(parts[9])
+        return busy, total, sectors
+
+    def sample(self, now):
+        """Read the counters at monotonic time now; returns whether a sample was added to the ring"""
+        busy, total, sectors = self.read_counters()
+        previous = self._previous
+        self._previous = (now, busy, total, sectors)
+        if previous is None or not 0 < now - previous[0] <= self.max_gap:
+            return False
+        elapsed = now - previous[0]
+        cpu = (busy - previous[1]) * 100.0 / max(total - previous[2], 1)
+        disk = (sectors - previous[3]) * SECTOR / elapsed / 1e6
+        sessions = count_sessions() if self.count_sessions else None
+        self.ring.append(now, cpu, disk, sessions)
+        return True
+
+    def close(self):
+        self._stat.close()
+        self._diskstats.close()
+
+
+class LoadGate:
+    """Samples activity before a deadline and decides whether the due action waits.
+
+    Thresholds set to None are not checked. Times are in seconds.
+    """
+
+    def __init__(self, window=600.0, cpu_percent=70.0, disk_mb_s=20.0, sessions=None, step=600.0,
+                 max_defer=3600.0, average=120.0, min_interval=2.0, max_interval=30.0, capacity=256):
+        if step <= 0 or max_defer < 0 or window <= 0 or average <= 0:
+            raise ValueError("defer window, step and average must be positive")
+        self.window = window
+        self.cpu_percent = cpu_percent
+        self.disk_mb_s = disk_mb_s
+        self.sessions = sessions
+        self.step = step
+        self.max_defer = max_defer
+        self.average = average
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.capacity = capacity
+        # Created on the first tick inside the window and closed once the action may run, so nothing
+        # under /proc stays open all day
+        self.sampler = None
+
+        # Fire time whose deferrals are being added up, and how long it has been put off so far
+        self.deferred_for = None
+        self.deferred = 0.0
+        self.deferrals = 0
+
+    def interval(self, remaining):
+        """Seconds until the next sample: a tenth of the time left, within the configured bounds"""
+        return min(max(remaining / 10.0, self.min_interval), self.max_interval)
+
+    def tick(self, remaining, now):
+        """Called while waiting for a deadline; samples inside the window and returns when to be called again"""
+        if remaining > self.window:
+            return remaining - self.window
+        if self.sampler is None:
+            self.sampler = ActivitySampler(ActivityRing(self.capacity), sessions=self.sessions is not None,
+                                           max_gap=2 * self.max_interval)
+        self.sampler.sample(now)
+        return self.interval(remaining)
+
+    def decide(self, fire_time, now):
+        """(seconds to put off the action scheduled for fire_time, reason); 0 means run it now.
+
+        Once the action may run, the sampler is closed until the next window.
+        """
+        delay, reason = self.assess(fire_time, now)
+        if not delay:
+            self.close()
+        return delay, reason
+
+    def assess(self, fire_time, now):
+        if fire_time != self.deferred_for:
+            self.deferred_for = fire_time
+            self.deferred = 0.0
+        activity = self.sampler.ring.recent(now - self.average) if self.sampler else None
+        if activity is None:
+            return 0, "no activity samples"
+
+        _, cpu, disk, sessions = activity
+        busy = []
+        if self.cpu_percent is not None and cpu > self.cpu_percent:
+            busy.append(f"CPU {cpu:.0f}% > {self.cpu_percent:g}%")
+        if self.disk_mb_s is not None and disk > self.disk_mb_s:
+            busy.append(f"disk {disk:.1f} MB/s > {self.disk_mb_s:g} MB/s")
+        if self.sessions is not None and sessions is not None and sessions > self.sessions:
+            busy.append(f"{sessions} sessions > {self.sessions}")
+        if not busy:
+            return 0, f"idle (CPU {cpu:.0f}%, disk {disk:.1f} MB/s)"
+
+        step = min(self.step, self.max_defer - self.deferred)
+        if step <= 0:
+            return 0, f"already put off {self.deferred / 60:g} min, the limit; " + ", ".join(busy)
+        self.deferred += step
+        self.deferrals += 1
+        return step, ", ".join(busy)
+
+    def close(self):
+        if self.sampler is not None:
+            self.sampler.close()
+            self.sampler = None
+
+
+def gate_from_config(config):
+    """LoadGate from the optional 'defer' section, or None if it is absent or disabled"""
+    options = config.get('defer') if isinstance(config, dict) else None
+    if not isinstance(options, dict) or not options.get('enabled', True):
+        return None
+    if not os.path.exists(PROC_STAT):
+        raise ValueError("load-aware deferral needs /proc (Linux only)")
+
+    def threshold(key, default):
+        value = options.get(key, default)
+        return None if value is None else float(value)
+
+    sessions = options.get('sessions')
+    return LoadGate(window=float(options.get('window_minutes', 10)) * 60,
+                    cpu_percent=threshold('cpu_percent', 70),
+                    disk_mb_s=threshold('disk_mb_s', 20),
+                    sessions=None if sessions is None else int(sessions),
+                    step=float(options.get('step_minutes', 10)) * 60,
+                    max_defer=float(options.get('max_minutes', 60)) * 60,
+                    average=float(options.get('average_seconds', 120)),
+                    capacity=int(options.get('samples', 256)))
@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timezone
+
+
+class SystemClock:
+    """The real wall and monotonic clocks; waits block the calling thread"""
+
+    def now(self):
+        return datetime.now()
+
+    def utcnow(self):
+        """Timezone-aware current time, for schedules with a timezone"""
+        return datetime.now(timezone.utc)
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def wait(self, event, timeout):
+        """Block until event is set or timeout seconds pass. Returns whether it was set."""
+        return event.wait(timeout)
+
+
+class VirtualClock:
+    """Simulated time that only moves when something waits on it.
+
+    A wait returns at once with the clock moved forward by the timeout, so a
+    schedule that would sleep for a year runs as fast as the code between
+    the waits. Once end is reached the clock stops and on_end() is called,
+    which the simulation driver uses to cancel the timer.
+    """
+
+    def __init__(self, start=None, end=None, on_end=None):
+        # Kept as a Unix timestamp, so it moves through DST changes like the real clock.
+        # start and end may be naive local times or timezone-aware.
+        self._time = (start or datetime(2025, 1, 1)).timestamp()
+        self._monotonic = 0.0
+        self.end = end.timestamp() if end is not None else None
+        self.on_end = on_end
+        self.waits = 0
+
+    def now(self):
+        return datetime.fromtimestamp(self._time)
+
+    def utcnow(self):
+        return datetime.fromtimestamp(self._time, timezone.utc)
+
+    def time(self):
+        return self._time
+
+    def monotonic(self):
+        return self._monotonic
+
+    def advance(self, seconds):
+        self._time += seconds
+        self._monotonic += seconds
+
+    def jump(self, seconds):
+        """Move the wall clock only, as a clock change or a resume from suspend would"""
+        self._time += seconds
+
+    def wait(self, event, timeout):
+        self.waits += 1
+        if event.is_set():
+            return True
+        if self.end is not None and self._time + timeout >= self.end:
+            self.advance(max(self.end - self._time, 0.0))
+            if self.on_end:
+                self.on_end()
+            return event.is_set()
+        self.advance(timeout)
+        return event.is_set()
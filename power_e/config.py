@@ -0,0 +1,249 @@
+import json
+import os
+import select
+import struct
+import sys
+import tempfile
+import threading
+
+from power_e.schedule import parse_schedule_config
+from power_e.validation import normalize_time
+from power_e.zones import zone_settings
+
+DEFAULT_CONFIG = {'hour': '06', 'minute': '00', 'ampm': 'PM'}
+
+# Seconds between stat() checks when inotify is not available
+DEFAULT_RELOAD_INTERVAL = 10.0
+
+
+class ConfigError(ValueError):
+    """The config file exists but cannot be used"""
+
+
+class SchedulerConfig:
+    """A parsed and validated scheduler_config.json. Treated as immutable once built."""
+
+    def __init__(self, raw, hour, minute, ampm, entries, blackout_dates, errors,
+                 timezone=None, nonexistent='shift', ambiguous='earlier'):
+        self.raw = raw
+        self.hour = hour
+        self.minute = minute
+        self.ampm = ampm
+        self.entries = entries
+        self.blackout_dates = blackout_dates
+        # Problems with optional parts that were skipped rather than rejected
+        self.errors = errors
+        # IANA zone the times are in (None: naive local time) and the DST policies
+        self.timezone = timezone
+        self.nonexistent = nonexistent
+        self.ambiguous = ambiguous
+
+    @property
+    def reload_interval(self):
+        try:
+            return float(self.raw.get('reload_interval', DEFAULT_RELOAD_INTERVAL))
+        except (TypeError, ValueError):
+            return DEFAULT_RELOAD_INTERVAL
+
+
+def parse_config(raw):
+    """Validate a config dict. A bad daily time is an error; bad extra entries are only reported."""
+    if not isinstance(raw, dict):
+        raise ConfigError("Configuration must be a JSON object")
+
+    try:
+        hour, minute, ampm = normalize_time(raw.get('hour', DEFAULT_CONFIG['hour']),
+                                            raw.get('minute', DEFAULT_CONFIG['minute']),
+                                            raw.get('ampm', DEFAULT_CONFIG['ampm']))
+    except ValueError as e:
+        raise ConfigError(str(e))
+
+    try:
+        zone, nonexistent, ambiguous = zone_settings(raw)
+    except ValueError as e:
+        raise ConfigError(str(e))
+
+    entries, blackout_dates, errors = parse_schedule_config(raw)
+    return SchedulerConfig(raw, hour, minute, ampm, entries, blackout_dates, errors,
+                           zone, nonexistent, ambiguous)
+
+
+def default_config():
+    return parse_config(dict(DEFAULT_CONFIG))
+
+
+def read_config(path):
+    """Read and validate a config file. Raises FileNotFoundError or ConfigError."""
+    with open(path, 'r') as f:
+        try:
+            raw = json.load(f)
+        except ValueError as e:
+            raise ConfigError(f"{path} is not valid JSON: {e}")
+    return parse_config(raw)
+
+
+def write_config_atomic(path, data):
+    """Write JSON to a temp file in the same directory and swap it in with os.replace.
+
+    Readers see either the old or the new file, never a partial one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".scheduler_config.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigCache:
+    """Keeps the last parsed config and only re-parses when the file's stat identity changes"""
+
+    def __init__(self):
+        self._key = None
+        self._config = None
+        self._lock = threading.Lock()
+        self.parses = 0
+        self.hits = 0
+
+    def load(self, path):
+        st = os.stat(path)
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if key == self._key:
+                self.hits += 1
+                return self._config
+            config = read_config(path)
+            self.parses += 1
+            self._key, self._config = key, config
+            return config
+
+
+# inotify event bits (see inotify(7))
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _inotify_watch(directory):
+    """Return an inotify fd watching directory, or None where inotify is unavailable"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+class ConfigWatcher:
+    """Calls on_change() from a background thread when the config file changes.
+
+    On Linux it blocks on inotify events for the file's directory, so an
+    unchanged file costs no wakeups at all. Elsewhere it compares stat()
+    results every `interval` seconds.
+    """
+
+    def __init__(self, path, on_change, interval=DEFAULT_RELOAD_INTERVAL, use_inotify=True):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.interval = interval
+        self.use_inotify = use_inotify
+        self.mode = None
+        self._stop = threading.Event()
+        self._stop_pipe = None
+        self._thread = None
+
+        # Counters for checking the watcher's cost
+        self.checks = 0
+        self.changes = 0
+
+    def start(self):
+        fd = _inotify_watch(os.path.dirname(self.path)) if self.use_inotify else None
+        if fd is not None:
+            self.mode = 'inotify'
+            self._stop_pipe = os.pipe()
+            target = lambda: self._run_inotify(fd)
+        else:
+            self.mode = 'poll'
+            target = self._run_poll
+        self._thread = threading.Thread(target=target, name='power-e-config', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._stop_pipe:
+            os.write(self._stop_pipe[1], b'x')
+        if self._thread:
+            self._thread.join(2)
+        if self._stop_pipe:
+            os.close(self._stop_pipe[1])
+            self._stop_pipe = None
+
+    def _notify(self):
+        self.changes += 1
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"Configuration reload failed: {e}")
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _run_poll(self):
+        last = self._stat_key()
+        while not self._stop.wait(self.interval):
+            self.checks += 1
+            current = self._stat_key()
+            if current != last:
+                last = current
+                if current is not None:
+                    self._notify()
+
+    def _run_inotify(self, fd):
+        name = os.fsencode(os.path.basename(self.path))
+        stop_read = self._stop_pipe[0]
+        try:
+            while not self._stop.is_set():
+                readable, _, _ = select.select([fd, stop_read], [], [])
+                if stop_read in readable:
+                    break
+                data = os.read(fd, 64 * 1024)
+                self.checks += 1
+
+                changed = False
+                offset = 0
+                while offset + _EVENT_HEADER.size <= len(data):
+                    _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                    event_name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length]
+                    offset += _EVENT_HEADER.size + length
+                    if event_name.rstrip(b'\0') == name and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                        changed = True
+                if changed:
+                    self._notify()
+        finally:
+            os.close(fd)
+            os.close(stop_read)
+
@@ -0,0 +1,350 @@
+"""Local control channel for a running scheduler.
+
+The daemon listens on a Unix-domain socket (a named pipe on Windows) and
+speaks line-delimited JSON: each request is one object with a "cmd" key,
+and each reply is one object with "ok" plus either the result fields or
+"error". A client may keep its connection open and send any number of
+requests; every connection gets its own thread, so slow clients never
+hold up the timer or each other.
+
+    {"cmd": "status"}
+    {"cmd": "cancel-pending"}
+    {"cmd": "skip-next"}
+    {"cmd": "reschedule", "time": "06:30 PM"}
+    {"cmd": "reload"}
+    {"cmd": "metrics"}
+    {"cmd": "subscribe"}
+
+After "subscribe" the connection only carries events, one JSON object
+per line with an "event" key, such as the staged warnings before a
+power action. A subscriber that cannot take an event within the
+notifier's timeout is dropped.
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+COMMANDS = ('status', 'cancel-pending', 'skip-next', 'reschedule', 'reload', 'metrics', 'subscribe')
+
+# Requests longer than this are rejected instead of buffered
+MAX_REQUEST = 64 * 1024
+
+IS_WINDOWS = sys.platform == 'win32'
+
+
+class ControlError(Exception):
+    """The daemon could not be reached or answered with an error"""
+
+
+def default_address():
+    """Per-user socket path (or pipe name) so several users on one machine do not collide"""
+    if IS_WINDOWS:
+        return r'\\.\pipe\power-e-' + os.environ.get('USERNAME', 'user')
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'power-e.sock')
+    return os.path.join('/tmp', f'power-e-{os.getuid()}.sock')
+
+
+def address_from_config(config):
+    """Socket path from the optional 'control' section, or None if the channel is disabled"""
+    options = config.get('control', {}) if isinstance(config, dict) else {}
+    if not isinstance(options, dict) or not options.get('enabled', True):
+        return None
+    return options.get('socket') or default_address()
+
+
+def handle_request(scheduler, line):
+    """Decode one request line, run it against the scheduler and return the reply dict"""
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+    except ValueError as e:
+        return {'ok': False, 'error': f"bad request: {e}"}
+
+    command = request.get('cmd')
+    reply = {'ok': True}
+    if 'id' in request:
+        reply['id'] = request['id']
+    try:
+        if command == 'status':
+            reply.update(scheduler.status())
+        elif command == 'cancel-pending':
+            reply.update(scheduler.cancel_pending())
+        elif command == 'skip-next':
+            reply.update(scheduler.skip_next())
+        elif command == 'reschedule':
+            reply.update(scheduler.reschedule(str(request.get('time', ''))))
+        elif command == 'reload':
+            reply['changed'] = scheduler.reload_config()
+        elif command == 'metrics':
+            reply.update(scheduler.metrics.snapshot())
+        elif command == 'subscribe':
+            # The server hands the connection over to publish() once this reply is sent
+            reply['subscribed'] = True
+        else:
+            raise ValueError(f"unknown command {command!r}; expected one of {', '.join(COMMANDS)}")
+    except Exception as e:
+        reply = {'ok': False, 'error': str(e)}
+        if 'id' in request:
+            reply['id'] = request['id']
+    return reply
+
+
+def encode(message):
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+class ControlServer:
+    """Serves control requests for one scheduler until stop() is called"""
+
+    def __init__(self, scheduler, address=None):
+        self.scheduler = scheduler
+        self.address = address or default_address()
+        self.requests = 0
+        self.connections = 0
+        # Connections that asked for events; publish() writes to them and drops the ones that fail
+        self.subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self._listener = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        """Bind the socket and start accepting. Raises ControlError if another daemon owns it."""
+        if IS_WINDOWS:
+            from multiprocessing.connection import Listener
+            self._listener = Listener(self.address, family='AF_PIPE')
+        else:
+            self._listener = self._bind_unix()
+        self._thread = threading.Thread(target=self._accept_loop, name='power-e-control', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        if self._listener is None:
+            return
+        if IS_WINDOWS:
+            # Listener.accept() has no timeout; a throwaway connection releases it
+            try:
+                from multiprocessing.connection import Client
+                Client(self.address, family='AF_PIPE').close()
+            except OSError:
+                pass
+            self._listener.close()
+        else:
+            try:
+                self._listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._listener.close()
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        with self._subscribers_lock:
+            subscribers, self.subscribers = self.subscribers, []
+        for conn in subscribers:
+            conn.close()
+        if self._thread is not None:
+            self._thread.join(2)
+
+    def publish(self, message, timeout):
+        """Send an event to every subscriber, giving up on (and dropping) any still blocked at the timeout"""
+        data = encode(message)
+        deadline = time.monotonic() + timeout
+        with self._subscribers_lock:
+            subscribers = list(self.subscribers)
+        for conn in subscribers:
+            try:
+                if IS_WINDOWS:
+                    conn.send_bytes(data)
+                else:
+                    conn.settimeout(max(deadline - time.monotonic(), 0.001))
+                    conn.sendall(data)
+            except OSError:
+                with self._subscribers_lock:
+                    if conn in self.subscribers:
+                        self.subscribers.remove(conn)
+                conn.close()
+
+    def subscribe(self, conn):
+        with self._subscribers_lock:
+            if self._stopping.is_set():
+                conn.close()
+            else:
+                self.subscribers.append(conn)
+
+    def _bind_unix(self):
+        if os.path.exists(self.address):
+            # A leftover file from a crashed daemon is removed; a live one is left alone
+            try:
+                ControlClient(self.address, timeout=1).close()
+            except ControlError:
+                os.unlink(self.address)
+            else:
+                raise ControlError(f"Another scheduler is already listening on {self.address}")
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            listener.bind(self.address)
+        finally:
+            os.umask(old_umask)
+        listener.listen(64)
+        return listener
+
+    def _accept_loop(self):
+        while not self._stopping.is_set():
+            try:
+                if IS_WINDOWS:
+                    conn = self._listener.accept()
+                else:
+                    conn, _ = self._listener.accept()
+            except OSError:
+                break
+            if self._stopping.is_set():
+                conn.close()
+                break
+            self.connections += 1
+            serve = self._serve_pipe if IS_WINDOWS else self._serve_socket
+            threading.Thread(target=serve, args=(conn,), name='power-e-control-client', daemon=True).start()
+
+    def _serve_socket(self, conn):
+        with conn.makefile('rb') as reader:
+            for line in iter(lambda: reader.readline(MAX_REQUEST + 1), b''):
+                if len(line) > MAX_REQUEST:
+                    conn.sendall(encode({'ok': False, 'error': "request too long"}))
+                    break
+                if not line.strip():
+                    continue
+                self.requests += 1
+                reply = handle_request(self.scheduler, line)
+                try:
+                    conn.sendall(encode(reply))
+                except OSError:
+                    break
+                if reply.get('subscribed'):
+                    self.subscribe(conn)
+                    return
+        conn.close()
+
+    def _serve_pipe(self, conn):
+        while True:
+            try:
+                line = conn.recv_bytes(MAX_REQUEST)
+            except (EOFError, OSError):
+                break
+            self.requests += 1
+            reply = handle_request(self.scheduler, line)
+            try:
+                conn.send_bytes(encode(reply))
+            except OSError:
+                break
+            if reply.get('subscribed'):
+                self.subscribe(conn)
+                return
+        conn.close()
+
+
+class ControlClient:
+    """Blocking client for the control channel; one instance keeps one connection open"""
+
+    def __init__(self, address=None, timeout=5.0):
+        self.address = address or default_address()
+        self._next_id = 0
+        try:
+            if IS_WINDOWS:
+                from multiprocessing.connection import Client
+                self._conn = Client(self.address, family='AF_PIPE')
+            else:
+                self._conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._conn.settimeout(timeout)
+                self._conn.connect(self.address)
+                self._reader = self._conn.makefile('rb')
+        except OSError as e:
+            raise ControlError(f"No scheduler is listening on {self.address}: {e}")
+
+    def request(self, command, **arguments):
+        """Send one command and return the reply fields. Raises ControlError if it failed."""
+        self._next_id += 1
+        message = dict(arguments, cmd=command, id=self._next_id)
+        try:
+            if IS_WINDOWS:
+                self._conn.send_bytes(encode(message))
+                line = self._conn.recv_bytes()
+            else:
+                self._conn.sendall(encode(message))
+                line = self._reader.readline()
+        except (EOFError, OSError) as e:
+            raise ControlError(f"Lost connection to the scheduler: {e}")
+        if not line:
+            raise ControlError("The scheduler closed the connection")
+
+        reply = json.loads(line)
+        if not reply.pop('ok', False):
+            raise ControlError(reply.get('error', 'request failed'))
+        reply.pop('id', None)
+        return reply
+
+    def events(self):
+        """Subscribe and yield each event the daemon sends, until it closes the connection"""
+        self.request('subscribe')
+        if not IS_WINDOWS:
+            # Events may be hours apart
+            self._conn.settimeout(None)
+        while True:
+            try:
+                line = self._conn.recv_bytes() if IS_WINDOWS else self._reader.readline()
+            except (EOFError, OSError):
+                return
+            if not line:
+                return
+            yield json.loads(line)
+
+    def close(self):
+        if not IS_WINDOWS:
+            self._reader.close()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def run_ctl(args):
+    """Entry point for the `ctl` subcommand: send one command and print the reply"""
+    arguments = {'time': args.time} if args.ctl_command == 'reschedule' else {}
+    try:
+        with ControlClient(args.socket) as client:
+            if args.ctl_command == 'watch':
+                watch(client, args.json)
+                return
+            reply = client.request(args.ctl_command, **arguments)
+    except ControlError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(reply, indent=2))
+        return
+    for key, value in reply.items():
+        print(f"{key}: {value}")
+
+
+def watch(client, as_json=False):
+    """Print events from the daemon as they arrive, until it exits or Ctrl+C"""
+    try:
+        for event in client.events():
+            if as_json:
+                print(json.dumps(event), flush=True)
+            else:
+                print(f"{time.strftime('%H:%M:%S')} {event.get('message') or event}", flush=True)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,460 @@
+"""Fixed-width binary event log, written alongside or instead of shutdown_log.csv.
+
+A CSV row repeats the action text and formatted times on every line. Here
+every event is one 32-byte record after a 16-byte header:
+
+    int64   timestamp         when it was logged, in Unix time
+    int64   scheduled         the scheduled time it refers to, or NO_SCHEDULE ("N/A")
+    int32   offset            seconds the logging host's clock was ahead of UTC
+    int32   scheduled_offset  the same for the scheduled time
+    uint32  action            index into the string table
+    uint32  host              index into the string table; 0 is the empty string
+
+Unix time keeps the file in order through the hour repeated when clocks
+go back, and orders logs from hosts in different zones correctly when
+they are merged. The offsets give back the local times the CSV shows
+(it has no zone), so converting to CSV reproduces it exactly. Strings
+(actions, host names, a non-standard CSV header) are stored once each in a
+`<log>.strings` sidecar, one JSON string per line, written before any
+record that refers to them.
+
+Records are in the order they were logged, which is time order for one
+scheduler and for merge_event_logs() output, so EventLog can binary-search
+them by time straight from an mmap and decode only the records in range.
+csv_to_events() and events_to_csv() convert without loss; a CSV row that
+would not come back as the same text is rejected.
+"""
+import calendar
+import csv
+import gzip
+import heapq
+import json
+import math
+import mmap
+import os
+import socket
+import struct
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from power_e.actionlog import LOG_HEADER, TIMESTAMP_FORMAT, ActionLogWriter
+
+MAGIC = b'PWREVLOG'
+VERSION = 2
+# magic, version, record size, CSV header as a string id (0: LOG_HEADER)
+HEADER = struct.Struct('<8sHHI')
+RECORD = struct.Struct('<qqiiII')
+TIMESTAMP = struct.Struct('<q')
+NO_SCHEDULE = -2 ** 63
+NO_SCHEDULE_TEXT = "N/A"
+SCHEDULED_FORMAT = "%I:%M %p"
+# Records decoded per slice of the map while scanning, and buffered per write while converting
+CHUNK = 65536
+
+Event = namedtuple('Event', 'timestamp scheduled offset scheduled_offset action host')
+EPOCH = datetime(1970, 1, 1)
+
+
+def strings_path(path):
+    return path + '.strings'
+
+
+def epoch_seconds(moment):
+    """(Unix time, seconds its wall-clock reading is ahead of UTC) of a naive local or an aware datetime"""
+    epoch = math.floor(moment.timestamp())
+    return epoch, calendar.timegm(moment.timetuple()) - epoch
+
+
+def local_epoch(wall, after=None):
+    """(Unix time, offset) of a local wall-clock reading given in seconds counted as if it were UTC.
+
+    In the hour repeated when clocks go back the first occurrence is taken,
+    unless it comes before `after` and the second does not.
+    """
+    moment = EPOCH + timedelta(seconds=wall)
+    epoch = math.floor(moment.timestamp())
+    if after is not None and epoch < after:
+        later = math.floor(moment.replace(fold=1).timestamp())
+        if later >= after:
+            epoch = later
+    return epoch, wall - epoch
+
+
+def format_timestamp(seconds, offset=0):
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(seconds + offset))
+
+
+def format_scheduled(seconds, offset=0):
+    if seconds == NO_SCHEDULE:
+        return NO_SCHEDULE_TEXT
+    return time.strftime(SCHEDULED_FORMAT, time.gmtime(seconds + offset))
+
+
+def scheduled_wall(text, wall):
+    """A CSV 'Scheduled Time' ('01:42 PM' or 'N/A') as the occurrence of that time nearest the wall-clock
+    seconds of its row"""
+    if text == NO_SCHEDULE_TEXT:
+        return NO_SCHEDULE
+    from power_e.history import scheduled_minutes
+
+    seconds = wall - wall % 86400 + scheduled_minutes(text) * 60
+    if seconds - wall > 43200:
+        seconds -= 86400
+    elif wall - seconds > 43200:
+        seconds += 86400
+    return seconds
+
+
+def read_strings(path):
+    """The string table; a last line torn by a crash is left out"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return ['']
+    return [json.loads(line) for line in data.split(b'\n')[:-1]] or ['']
+
+
+def check_header(data):
+    """The header's CSV columns string id; ValueError if data does not start an event log"""
+    if len(data) < HEADER.size:
+        raise ValueError("not a Power E event log (no header)")
+    magic, version, record_size, columns = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a Power E event log")
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"unsupported event log version {version}")
+    return columns
+
+
+class EventFile:
+    """Appends records and their strings to an event log; one thread (the writer or a converter) owns it"""
+
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.strings = read_strings(strings_path(path))
+        self.ids = {text: index for index, text in enumerate(self.strings)}
+        self._pending_strings = []
+        self._records = []
+
+        self._strings_file = open(strings_path(path), 'a+b')
+        # Drop a string torn by a crash so the next one starts on its own line
+        self._strings_file.seek(0)
+        self._strings_file.truncate(self._strings_file.read().rfind(b'\n') + 1)
+        if self._strings_file.seek(0, os.SEEK_END) == 0:
+            self._pending_strings.append('')
+
+        self._file = open(path, 'ab')
+        if self._file.tell() < HEADER.size:
+            self._file.truncate(0)
+            column_id = self.intern(json.dumps(columns)) if columns and columns != LOG_HEADER else 0
+            self.flush()
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, column_id))
+        else:
+            with open(path, 'rb') as f:
+                check_header(f.read(HEADER.size))
+            # Drop a record torn by a crash
+            torn = (self._file.tell() - HEADER.size) % RECORD.size
+            if torn:
+                self._file.truncate(self._file.tell() - torn)
+
+    def intern(self, text):
+        index = self.ids.get(text)
+        if index is None:
+            index = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+            self._pending_strings.append(text)
+        return index
+
+    def append(self, timestamp, scheduled, offset, scheduled_offset, action, host=''):
+        self._records.append(RECORD.pack(timestamp, scheduled, offset, scheduled_offset,
+                                         self.intern(action), self.intern(host)))
+        if len(self._records) >= CHUNK:
+            self.flush()
+
+    def flush(self):
+        """Write buffered strings, synced, then the records that refer to them"""
+        if self._pending_strings:
+            self._strings_file.write(b''.join(json.dumps(text).encode() + b'\n' for text in self._pending_strings))
+            self._strings_file.flush()
+            os.fsync(self._strings_file.fileno())
+            self._pending_strings = []
+        if self._records:
+            self._file.write(b''.join(self._records))
+            self._records = []
+        self._file.flush()
+
+    def tell(self):
+        return self._file.tell() + len(self._records) * RECORD.size
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+            self._strings_file.close()
+
+
+class EventLogWriter(ActionLogWriter):
+    """ActionLogWriter that writes event records instead of CSV rows, with the same thread, fsync and rotation.
+
+    Rotated segments are never compressed, so they can still be mapped.
+    """
+
+    def __init__(self, path="shutdown_log.bin", host=None, **options):
+        options.pop('compress', None)
+        self.host = socket.gethostname() if host is None else host
+        super().__init__(path, **options)
+
+    def log(self, action, scheduled_time="N/A", when=None, scheduled=None):
+        timestamp, offset = epoch_seconds(when or datetime.now())
+        if scheduled is not None:
+            scheduled, scheduled_offset = epoch_seconds(scheduled)
+        else:
+            # Only the time of day is known; it is taken in the same zone as the timestamp
+            wall = scheduled_wall(scheduled_time, timestamp + offset)
+            scheduled = NO_SCHEDULE if wall == NO_SCHEDULE else wall - offset
+            scheduled_offset = offset
+        self.append([timestamp, scheduled, offset, scheduled_offset, action, self.host])
+
+    def _write_rows(self, rows):
+        for row in rows:
+            self._file.append(*row)
+
+    def _open(self):
+        is_new = not os.path.isfile(self.path) or os.path.getsize(self.path) <= HEADER.size
+        self._segment_started = time.time() if is_new else self._first_row_time()
+        self._file = EventFile(self.path)
+
+    def _first_row_time(self):
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(HEADER.size)
+                (seconds,) = TIMESTAMP.unpack(f.read(TIMESTAMP.size))
+            return seconds
+        except (OSError, struct.error):
+            return time.time()
+
+    def segment_files(self, path):
+        return [path, strings_path(path)]
+
+
+class EventLog:
+    """Read-only view of an event log through mmap; records are decoded only when read"""
+
+    def __init__(self, path):
+        self.path = path
+        self.strings = read_strings(strings_path(path))
+        with open(path, 'rb') as f:
+            column_id = check_header(f.read(HEADER.size))
+            # Records appended after this point are not seen; open the log again to see them
+            self.count = (os.fstat(f.fileno()).st_size - HEADER.size) // RECORD.size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+        self.columns = json.loads(self.strings[column_id]) if column_id else None
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("event index out of range")
+        return Event._make(RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size))
+
+    def timestamp(self, index):
+        return TIMESTAMP.unpack_from(self._map, HEADER.size + index * RECORD.size)[0]
+
+    def bisect(self, seconds, right=False):
+        """Index of the first record logged at or after Unix time seconds (after, with right)"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            value = self.timestamp(middle)
+            if value < seconds or (right and value == seconds):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def scan(self, start=0, stop=None):
+        """Events from index start up to stop, decoded a slice of the map at a time"""
+        stop = self.count if stop is None else min(stop, self.count)
+        for first in range(start, stop, CHUNK):
+            last = min(first + CHUNK, stop)
+            chunk = self._map[HEADER.size + first * RECORD.size:HEADER.size + last * RECORD.size]
+            yield from map(Event._make, RECORD.iter_unpack(chunk))
+
+    __iter__ = scan
+
+    def between(self, since=None, until=None):
+        """Events logged at or after since and before until (Unix times; None for no bound)"""
+        start = 0 if since is None else self.bisect(since)
+        stop = self.count if until is None else self.bisect(until)
+        return self.scan(start, stop)
+
+    def csv_columns(self):
+        """Columns for the CSV form: the original header, or LOG_HEADER plus Host if any event has one"""
+        if self.columns:
+            return self.columns
+        if any(event.host for event in self.scan()):
+            return LOG_HEADER + ["Host"]
+        return list(LOG_HEADER)
+
+    def fields(self, event):
+        """{column: text} of an event as it appears in the CSV"""
+        return {"Timestamp": format_timestamp(event.timestamp, event.offset),
+                "Action": self.strings[event.action],
+                "Scheduled Time": format_scheduled(event.scheduled, event.scheduled_offset),
+                "Host": self.strings[event.host]}
+
+
+def open_csv(path):
+    return gzip.open(path, 'rt', newline='') if path.endswith('.gz') else open(path, newline='')
+
+
+def check_output(output, inputs):
+    """Refuse to overwrite an input; remove any old output"""
+    if any(os.path.abspath(output) == os.path.abspath(path) for path in inputs):
+        raise ValueError(f"{output} is also an input")
+    for path in (output, strings_path(output)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def csv_to_events(csv_path, output, host=None):
+    """Convert an action log CSV (.gz too) to a new event log. Returns the number of records.
+
+    host tags the rows of a log without a Host column. ValueError names the
+    line of any row that would not convert back to the same text.
+    """
+    from power_e.history import wall_seconds as parse_timestamp
+
+    check_output(output, [csv_path])
+    with open_csv(csv_path) as f:
+        reader = csv.reader(f)
+        columns = next(reader, None) or list(LOG_HEADER)
+        known = set(LOG_HEADER) | {"Host"}
+        if len(set(columns)) != len(columns) or not set(LOG_HEADER) <= set(columns) <= known:
+            raise ValueError(f"{csv_path}: unexpected columns {columns}")
+        at, action_at, scheduled_at = (columns.index(name) for name in LOG_HEADER)
+        host_at = columns.index("Host") if "Host" in columns else None
+
+        events = EventFile(output, columns if host_at is not None or columns != LOG_HEADER else None)
+        count = 0
+        previous = None
+        try:
+            for row in reader:
+                if len(row) != len(columns):
+                    raise ValueError(f"{csv_path} line {reader.line_num}: expected {len(columns)} fields")
+                try:
+                    wall = parse_timestamp(row[at])
+                    scheduled = scheduled_wall(row[scheduled_at], wall)
+                    # The CSV has local times; a repeated hour is read as the occurrence that keeps rows in order
+                    timestamp, offset = local_epoch(wall, previous)
+                    scheduled, scheduled_offset = (NO_SCHEDULE, 0) if scheduled == NO_SCHEDULE \
+                        else local_epoch(scheduled)
+                except (ValueError, OverflowError, OSError) as e:
+                    raise ValueError(f"{csv_path} line {reader.line_num}: {e}")
+                if format_timestamp(timestamp, offset) != row[at] or \
+                        format_scheduled(scheduled, scheduled_offset) != row[scheduled_at]:
+                    raise ValueError(f"{csv_path} line {reader.line_num}: times are not in the log's own format")
+                events.append(timestamp, scheduled, offset, scheduled_offset, row[action_at],
+                              row[host_at] if host_at is not None else host or '')
+                previous = timestamp
+                count += 1
+        except ValueError:
+            events.close()
+            check_output(output, [])
+            raise
+        events.close()
+    return count
+
+
+def events_to_csv(path, output):
+    """Write an event log back out as the CSV it came from (or would have been). Returns the number of rows."""
+    check_output(output, [path])
+    with EventLog(path) as log, open(output, 'w', newline='') as f:
+        writer = csv.writer(f)
+        columns = log.csv_columns()
+        writer.writerow(columns)
+        count = 0
+        for event in log.scan():
+            fields = log.fields(event)
+            writer.writerow([fields[name] for name in columns])
+            count += 1
+    return count
+
+
+def merge_event_logs(paths, output):
+    """Merge event logs (one per host, say) into one in time order. Returns the number of records."""
+    check_output(output, paths)
+    logs = [EventLog(path) for path in paths]
+    merged = EventFile(output)
+    count = 0
+    try:
+        def decoded(log):
+            strings = log.strings
+            for event in log.scan():
+                yield event._replace(action=strings[event.action], host=strings[event.host])
+
+        for event in heapq.merge(*[decoded(log) for log in logs], key=lambda event: event.timestamp):
+            merged.append(*event)
+            count += 1
+    finally:
+        merged.close()
+        for log in logs:
+            log.close()
+    return count
+
+
+def parse_bound(text):
+    """Local 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' as Unix time"""
+    if text is None:
+        return None
+    for fmt in (TIMESTAMP_FORMAT, "%Y-%m-%d"):
+        try:
+            return math.floor(datetime.strptime(text, fmt).timestamp())
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid time {text!r}; use YYYY-MM-DD or 'YYYY-MM-DD HH:MM:SS'")
+
+
+def run_events(args):
+    """Entry point for `PowerE.py events`"""
+    try:
+        if args.events_command == 'from-csv':
+            print(f"{args.output}: {csv_to_events(args.log, args.output, args.host)} events")
+        elif args.events_command == 'to-csv':
+            print(f"{args.output}: {events_to_csv(args.log, args.output)} rows")
+        elif args.events_command == 'merge':
+            print(f"{args.output}: {merge_event_logs(args.logs, args.output)} events")
+        elif args.events_command == 'show':
+            since, until = parse_bound(args.since), parse_bound(args.until)
+            with EventLog(args.log) as log:
+                columns = log.columns or LOG_HEADER + ["Host"]
+                writer = csv.writer(sys.stdout)
+                for event in log.between(since, until):
+                    fields = log.fields(event)
+                    if args.action and args.action not in fields["Action"]:
+                        continue
+                    writer.writerow([fields[name] for name in columns])
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
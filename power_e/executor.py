@@ -0,0 +1,196 @@
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from power_e.metrics import Histogram
+
+# Seconds allowed for cancel and for shutdown/reboot commands
+CANCEL_TIMEOUT = 10
+COMMAND_TIMEOUT = 30
+
+CommandResult = namedtuple('CommandResult', 'argv returncode latency error')
+
+
+class CommandPlan:
+    """Platform shutdown commands, resolved once at startup.
+
+    needs_sudo is flipped to True the first time a plain command fails and
+    the sudo retry succeeds, so later runs go straight to sudo.
+    """
+
+    def __init__(self, system, commands, needs_sudo=False, sudo_fallback=False, delay=60):
+        self.system = system
+        # action -> argv without any sudo prefix: 'shutdown', 'reboot', 'cancel'
+        self.commands = commands
+        # Seconds between the command and the machine going down, while it can still be cancelled
+        self.delay = delay
+        self.needs_sudo = needs_sudo
+        self.sudo_fallback = sudo_fallback
+
+    def __repr__(self):
+        return (f"CommandPlan({self.system!r}, {self.commands!r}, needs_sudo={self.needs_sudo}, "
+                f"sudo_fallback={self.sudo_fallback}, delay={self.delay})")
+
+    def argv(self, action, sudo=None):
+        argv = list(self.commands[action])
+        if self.needs_sudo if sudo is None else sudo:
+            argv.insert(0, 'sudo')
+        return argv
+
+
+def resolve_command_plan(system=None):
+    """Work out which binary to call, whether sudo is needed and how to cancel"""
+    system = system or platform.system()
+
+    if system == "Windows":
+        return CommandPlan(system, {
+            'cancel': ["shutdown", "/a"],
+            'shutdown': ["shutdown", "/s", "/t", "30", "/c", "Your PC will shut down in 30 seconds. Save your work."],
+            'reboot': ["shutdown", "/r", "/t", "30", "/c", "Your PC will restart in 30 seconds. Save your work."],
+        }, delay=30)
+
+    if system == "Darwin":
+        return CommandPlan(system, {
+            'cancel': ["shutdown", "-c"],
+            'shutdown': ["shutdown", "-h", "+1"],
+            'reboot': ["shutdown", "-r", "+1"],
+        }, needs_sudo=True)
+
+    # Linux and other Unix: shutdown often lives in /sbin, outside a normal user's PATH
+    binary = shutil.which("shutdown") or shutil.which("shutdown", path="/sbin:/usr/sbin") or "shutdown"
+    is_root = hasattr(os, 'geteuid') and os.geteuid() == 0
+    return CommandPlan(system, {
+        'cancel': [binary, "-c"],
+        'shutdown': [binary, "-h", "+1", "Daily Shutdown"],
+        'reboot': [binary, "-r", "+1", "Daily Reboot"],
+    }, sudo_fallback=not is_root and shutil.which("sudo") is not None)
+
+
+class SubprocessBackend:
+    """Runs commands for real"""
+
+    def run(self, argv, timeout):
+        return subprocess.run(argv, timeout=timeout).returncode
+
+
+class DryRunBackend:
+    """Prints commands instead of running them"""
+
+    def run(self, argv, timeout):
+        print(f"[dry-run] {subprocess.list2cmdline(argv)}")
+        return 0
+
+
+class FakeBackend:
+    """Records commands and returns scripted results, for testing without powering off.
+
+    results maps an argv tuple to a return code or an exception instance to
+    raise; anything else returns 0. delay simulates a slow binary.
+    """
+
+    def __init__(self, results=None, delay=0.0):
+        self.results = results or {}
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def run(self, argv, timeout):
+        with self._lock:
+            self.calls.append(list(argv))
+        if self.delay:
+            time.sleep(min(self.delay, timeout))
+            if self.delay > timeout:
+                raise subprocess.TimeoutExpired(argv, timeout)
+        result = self.results.get(tuple(argv), 0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+
+class ShutdownExecutor:
+    """Runs shutdown commands on a small bounded worker pool, off the timer thread"""
+
+    def __init__(self, plan=None, backend=None, max_workers=2, keep_results=200):
+        self.plan = plan or resolve_command_plan()
+        self.backend = backend or SubprocessBackend()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='power-e-exec')
+
+        # Latency and exit status of every command run, newest last
+        self.results = deque(maxlen=keep_results)
+        self.sudo_fallbacks = 0
+        self.failures = 0
+        # Command run time per action, for the metrics export
+        self.latency = {action: Histogram() for action in self.plan.commands}
+
+    def submit(self, action):
+        """Queue 'shutdown' or 'reboot' (cancelling any pending one first). Returns a Future."""
+        return self._pool.submit(self._execute, action)
+
+    def cancel(self):
+        """Queue cancellation of a pending shutdown. Returns a Future."""
+        return self._pool.submit(self._run_checked, 'cancel', CANCEL_TIMEOUT)
+
+    async def run(self, action):
+        """Async form of submit()"""
+        # Imported here: only async callers pay for asyncio, not the daemon's startup
+        import asyncio
+        return await asyncio.wrap_future(self.submit(action))
+
+    async def run_cancel(self):
+        import asyncio
+        return await asyncio.wrap_future(self.cancel())
+
+    def close(self, wait=False):
+        self._pool.shutdown(wait=wait)
+
+    def _execute(self, action):
+        # Cancel any existing shutdown first; failure just means none was pending, so it is not counted
+        try:
+            self._run('cancel', CANCEL_TIMEOUT, counted=False)
+        except Exception:
+            pass
+        return self._run_checked(action, COMMAND_TIMEOUT)
+
+    def _run_checked(self, action, timeout):
+        try:
+            returncode = self._run(action, timeout)
+            if returncode == 0:
+                return returncode
+            error = subprocess.CalledProcessError(returncode, self.plan.argv(action))
+        except FileNotFoundError as e:
+            error = e
+
+        if not (self.plan.sudo_fallback and not self.plan.needs_sudo):
+            raise error
+        self.sudo_fallbacks += 1
+        returncode = self._run(action, timeout, sudo=True)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, self.plan.argv(action, sudo=True))
+        # Remember for next time so we do not pay for the failing attempt again
+        self.plan.needs_sudo = True
+        return returncode
+
+    def _run(self, action, timeout, sudo=None, counted=True):
+        """Run one command and record it; with counted, a nonzero exit or error adds to failures"""
+        argv = self.plan.argv(action, sudo)
+        started = time.perf_counter()
+        try:
+            returncode = self.backend.run(argv, timeout)
+        except Exception as e:
+            latency = time.perf_counter() - started
+            self.latency[action].observe(latency)
+            if counted:
+                self.failures += 1
+            self.results.append(CommandResult(argv, None, latency, repr(e)))
+            raise
+        latency = time.perf_counter() - started
+        self.latency[action].observe(latency)
+        if returncode != 0 and counted:
+            self.failures += 1
+        self.results.append(CommandResult(argv, returncode, latency, None))
+        return returncode
@@ -0,0 +1,379 @@
+"""Schedule expressions compiled to bitsets and sorted time tables.
+
+Two notations are accepted:
+
+- Readable clauses separated by commas, each a set of days followed by
+  one or more times. Times without days repeat the previous clause's days.
+
+      weekdays 18:30, fri 16:00, sat-sun 11 PM except holidays
+
+- Five-field cron: minute hour day-of-month month day-of-week.
+
+      30 18 * * 1-5
+
+"except" (or "not on") excludes dates: ISO dates listed inline, or the
+name of a date list passed in as `holidays` ("holidays" is the default
+list). Each expression is parsed once into rules holding a sorted tuple of
+minutes of the day and bitmasks of weekdays, days of the month and months.
+next_fire() finds the next matching day with table lookups and bit
+arithmetic, stepping at most month by month, and the time with a bisect.
+"""
+import bisect
+import calendar
+import re
+from datetime import date, datetime, timedelta
+
+DAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+MONTH_NAMES = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+
+DAY_WORDS = {
+    'daily': 0b1111111, 'everyday': 0b1111111, 'day': 0b1111111, 'days': 0b1111111,
+    'weekdays': 0b0011111, 'weekday': 0b0011111, 'workdays': 0b0011111,
+    'weekends': 0b1100000, 'weekend': 0b1100000,
+}
+
+ALL_WEEKDAYS = 0b1111111
+ALL_MONTHDAYS = ((1 << 32) - 1) & ~1   # bits 1..31
+ALL_MONTHS = ((1 << 13) - 1) & ~1      # bits 1..12
+
+# NEXT_WEEKDAY[mask][weekday]: days from weekday to the next weekday in mask (0 if it matches), or None
+NEXT_WEEKDAY = tuple(
+    tuple(next((offset for offset in range(7) if mask >> ((weekday + offset) % 7) & 1), None)
+          for weekday in range(7))
+    for mask in range(128))
+
+# A day pattern that matches nothing (e.g. Feb 30) is given up on after this many months
+MAX_MONTHS = 12 * 8
+
+TIME_RE = re.compile(r'^(\d{1,2})(?::(\d{2}))?\s*(am|pm)?$')
+CRON_FIELD_RE = re.compile(r'^[\d*,/\-a-z]+$')
+
+# Words that read naturally in a clause but carry no meaning: "every friday at 16:00"
+FILLER_WORDS = ('at', 'on', 'every')
+
+
+class ExpressionError(ValueError):
+    """The expression text cannot be parsed"""
+
+
+def _lowest_bit_at_or_above(mask, position):
+    """Index of the lowest set bit of mask at or above position, or None"""
+    mask >>= position
+    if not mask:
+        return None
+    return position + (mask & -mask).bit_length() - 1
+
+
+class Rule:
+    """Times of day on the days matched by weekday, day-of-month and month masks.
+
+    With both day masks restricted the day matches either one, as in cron.
+    """
+
+    __slots__ = ('minutes', 'weekdays', 'monthdays', 'months')
+
+    def __init__(self, minutes, weekdays=ALL_WEEKDAYS, monthdays=ALL_MONTHDAYS, months=ALL_MONTHS):
+        if not minutes:
+            raise ExpressionError("No times given")
+        if not (weekdays and monthdays and months):
+            raise ExpressionError("Day pattern matches nothing")
+        self.minutes = tuple(sorted(set(minutes)))
+        self.weekdays = weekdays
+        self.monthdays = monthdays
+        self.months = months
+
+    def next_day(self, day):
+        """First date on or after day that this rule fires on, or None"""
+        for _ in range(MAX_MONTHS):
+            month = _lowest_bit_at_or_above(self.months, day.month)
+            if month is None:
+                day = date(day.year + 1, 1, 1)
+                continue
+            if month != day.month:
+                day = date(day.year, month, 1)
+
+            found = self._day_in_month(day)
+            if found is not None:
+                return found
+            day = date(day.year + 1, 1, 1) if day.month == 12 else date(day.year, day.month + 1, 1)
+        return None
+
+    def _day_in_month(self, day):
+        last = calendar.monthrange(day.year, day.month)[1]
+        candidates = []
+        if self.weekdays != ALL_WEEKDAYS or self.monthdays == ALL_MONTHDAYS:
+            offset = NEXT_WEEKDAY[self.weekdays][day.weekday()]
+            if offset is not None and day.day + offset <= last:
+                candidates.append(day.day + offset)
+        if self.monthdays != ALL_MONTHDAYS:
+            in_month = self.monthdays & ((1 << (last + 1)) - 1)
+            monthday = _lowest_bit_at_or_above(in_month, day.day)
+            if monthday is not None:
+                candidates.append(monthday)
+        if not candidates:
+            return None
+        # Only weekday-restricted: the weekday candidate; only monthday-restricted: the monthday one;
+        # both restricted: whichever comes first
+        return day.replace(day=min(candidates))
+
+    def next_fire(self, after):
+        today = after.date()
+        day = self.next_day(today)
+        if day is None:
+            return None
+        if day == today:
+            index = bisect.bisect_right(self.minutes, after.hour * 60 + after.minute)
+            if index < len(self.minutes):
+                return _at(day, self.minutes[index])
+            day = self.next_day(today + timedelta(days=1))
+            if day is None:
+                return None
+        return _at(day, self.minutes[0])
+
+
+def _at(day, minute_of_day):
+    return datetime(day.year, day.month, day.day, minute_of_day // 60, minute_of_day % 60)
+
+
+def parse_clock_time(text):
+    """'18:30', '6:30 PM', '6pm' -> minute of the day"""
+    match = TIME_RE.match(text.strip().lower())
+    if not match:
+        raise ExpressionError(f"Invalid time: {text!r}")
+    hour, minute, ampm = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if ampm:
+        if not 1 <= hour <= 12:
+            raise ExpressionError(f"Invalid time: {text!r}")
+        hour = hour % 12 + (12 if ampm == 'pm' else 0)
+    elif match.group(2) is None:
+        raise ExpressionError(f"Invalid time: {text!r} (use HH:MM or add AM/PM)")
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        raise ExpressionError(f"Invalid time: {text!r}")
+    return hour * 60 + minute
+
+
+def _day_index(word):
+    """Monday=0 from 'fri', 'tues', 'friday' or 'fridays'"""
+    for index, name in enumerate(DAY_NAMES):
+        if len(word) >= 3 and (name.startswith(word) or word == name + 's'):
+            return index
+    raise ExpressionError(f"Unknown day: {word!r}")
+
+
+def parse_days(words):
+    """Weekday bitmask from words like 'weekdays', 'fridays', 'mon-thu', 'sat/sun'"""
+    mask = 0
+    for word in words:
+        for part in re.split(r'[/&+]|\band\b', word):
+            part = part.strip()
+            if not part:
+                continue
+            if part in DAY_WORDS:
+                mask |= DAY_WORDS[part]
+            elif '-' in part:
+                first, last = (_day_index(name) for name in part.split('-', 1))
+                span = (last - first) % 7
+                for offset in range(span + 1):
+                    mask |= 1 << ((first + offset) % 7)
+            else:
+                mask |= 1 << _day_index(part)
+    return mask
+
+
+def _tokens_with_times(text):
+    """Split a clause into day words and minutes of the day, joining '6:30' + 'pm'"""
+    tokens = text.split()
+    days, minutes = [], []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token[0].isdigit():
+            if i + 1 < len(tokens) and tokens[i + 1] in ('am', 'pm'):
+                token += tokens[i + 1]
+                i += 1
+            minutes.append(parse_clock_time(token))
+        elif token not in FILLER_WORDS:
+            days.append(token)
+        i += 1
+    return days, minutes
+
+
+def _parse_readable(text):
+    rules = []
+    pending_days = []
+    weekdays = ALL_WEEKDAYS
+    for clause in text.split(','):
+        clause = clause.strip()
+        if not clause:
+            continue
+        days, minutes = _tokens_with_times(clause)
+        days = pending_days + days
+        if not minutes:
+            # "mon, wed 18:30": day names carry over to the clause that has the time
+            pending_days = days
+            continue
+        pending_days = []
+        if days:
+            weekdays = parse_days(days)
+        rules.append(Rule(minutes, weekdays=weekdays))
+    if pending_days:
+        raise ExpressionError(f"Days without a time: {' '.join(pending_days)}")
+    if not rules:
+        raise ExpressionError("No times given")
+    return rules
+
+
+def _cron_field(text, low, high, names=()):
+    """Set of integers from a cron field like '*/15', '1-5', 'mon-fri', '0,30'.
+
+    names are three-letter aliases for the values from low upwards.
+    """
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise ExpressionError(f"Invalid step in {text!r}")
+            step = int(step_text)
+        if part == '*':
+            first, last = low, high
+        elif '-' in part:
+            first, last = (_cron_value(value, low, names) for value in part.split('-', 1))
+        else:
+            first = _cron_value(part, low, names)
+            last = high if step > 1 else first
+        if not (low <= first <= high and low <= last <= high and first <= last):
+            raise ExpressionError(f"Value out of range in {text!r} ({low}-{high})")
+        values.update(range(first, last + 1, step))
+    return values
+
+
+def _cron_value(text, low, names):
+    if text[:3] in names:
+        return names.index(text[:3]) + low
+    if not text.isdigit():
+        raise ExpressionError(f"Invalid cron value: {text!r}")
+    return int(text)
+
+
+def _parse_cron(fields):
+    minutes = _cron_field(fields[0], 0, 59)
+    hours = _cron_field(fields[1], 0, 23)
+    monthdays = _cron_field(fields[2], 1, 31)
+    months = _cron_field(fields[3], 1, 12, MONTH_NAMES)
+    # Cron counts Sunday as 0 (and 7); Python's weekday() counts Monday as 0
+    cron_days = _cron_field(fields[4], 0, 7, ('sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'))
+    weekdays = 0
+    for day in cron_days:
+        weekdays |= 1 << ((day - 1) % 7)
+    return [Rule(
+        [hour * 60 + minute for hour in hours for minute in minutes],
+        weekdays=weekdays if fields[4] != '*' else ALL_WEEKDAYS,
+        monthdays=sum(1 << day for day in monthdays) if fields[2] != '*' else ALL_MONTHDAYS,
+        months=sum(1 << month for month in months),
+    )]
+
+
+def _parse_exclusions(text, holidays):
+    excluded = set()
+    for word in text.replace(',', ' ').split():
+        if word[0].isdigit():
+            try:
+                excluded.add(date.fromisoformat(word))
+            except ValueError:
+                raise ExpressionError(f"Invalid date: {word!r}")
+        elif word in holidays:
+            excluded.update(holidays[word])
+        elif word not in ('on', 'in', 'the', 'list'):
+            raise ExpressionError(f"Unknown date list: {word!r}")
+    return frozenset(excluded)
+
+
+class ScheduleExpression:
+    """A compiled schedule expression; cheap to evaluate any number of times"""
+
+    def __init__(self, text, holidays=None):
+        self.text = text
+        lowered = ' '.join(text.lower().split())
+        match = re.search(r'\b(?:except|not on)\b', lowered)
+        holidays = _holiday_lists(holidays)
+        if match:
+            self.excluded = _parse_exclusions(lowered[match.end():], holidays)
+            lowered = lowered[:match.start()].strip()
+        else:
+            self.excluded = frozenset()
+
+        fields = lowered.split()
+        # Cron minute and hour fields never contain names, which tells "sat/sun 9 am 9 pm" apart
+        if (len(fields) == 5 and all(CRON_FIELD_RE.match(field) for field in fields)
+                and not re.search(r'[a-z]', fields[0] + fields[1])):
+            self.rules = _parse_cron(fields)
+        else:
+            self.rules = _parse_readable(lowered)
+
+    def __repr__(self):
+        return f"ScheduleExpression({self.text!r})"
+
+    def next_fire(self, after, blackout_dates=()):
+        """First fire time strictly after `after`, skipping excluded and blackout dates"""
+        best = None
+        for rule in self.rules:
+            fire = rule.next_fire(after)
+            # Bounded by the number of excluded dates: each pass moves past one of them
+            while fire is not None and (fire.date() in self.excluded or fire.date() in blackout_dates):
+                day = rule.next_day(fire.date() + timedelta(days=1))
+                fire = _at(day, rule.minutes[0]) if day is not None else None
+            if fire is not None and (best is None or fire < best):
+                best = fire
+        return best
+
+    def next_fires(self, after, count, blackout_dates=()):
+        """The next `count` fire times after `after`, in order"""
+        fires = []
+        fire = after
+        while len(fires) < count:
+            fire = self.next_fire(fire, blackout_dates)
+            if fire is None:
+                break
+            fires.append(fire)
+        return fires
+
+
+def _holiday_lists(holidays):
+    """Normalise holidays: a list of dates is the default 'holidays' list; a dict maps names to lists"""
+    if not holidays:
+        return {}
+    if not isinstance(holidays, dict):
+        holidays = {'holidays': holidays}
+    lists = {}
+    for name, values in holidays.items():
+        lists[name.lower()] = frozenset(
+            value if isinstance(value, date) else date.fromisoformat(value) for value in values)
+    return lists
+
+
+def next_fire_times(expressions, after, count=1):
+    """Next `count` fire times for many compiled expressions, as {text: [datetime, ...]}"""
+    return {expression.text: expression.next_fires(after, count) for expression in expressions}
+
+
+class ExpressionEntry:
+    """Schedule entry driven by an expression; used by ScheduleEngine like a ScheduleEntry"""
+
+    def __init__(self, action, expression, message=None):
+        self.action = action
+        self.expression = expression
+        self.message = message
+
+    def __repr__(self):
+        return f"ExpressionEntry({self.to_dict()!r})"
+
+    def next_fire(self, after, blackout_dates=()):
+        return self.expression.next_fire(after, blackout_dates)
+
+    def to_dict(self):
+        data = {'action': self.action, 'expr': self.expression.text}
+        if self.message:
+            data['message'] = self.message
+        return data
@@ -0,0 +1,258 @@
+"""Fleet mode: one coordinator process driving the schedules of many hosts.
+
+All hosts share one ScheduleEngine heap and one asyncio event loop, so
+5,000 hosts cost one sleeping coroutine instead of 5,000 timer threads.
+Each host's schedule runs in that host's timezone (its config's
+"timezone", or the coordinator's local zone) and the heap is ordered by
+UTC instant, so hosts in different zones fire at their own local times.
+Host actions go through a Transport; RecordingTransport only records what
+would have been sent, which lets the coordinator be load-tested offline.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from power_e.schedule import ScheduleEngine, entries_from_config
+from power_e.zones import zone_settings, zoned_entries
+
+# Remote commands per action for the SSH transport (Linux targets)
+SSH_COMMANDS = {
+    'warn': ['wall', 'Scheduled shutdown is coming up. Save your work.'],
+    'shutdown': ['sudo', 'shutdown', '-h', '+1', 'Daily Shutdown'],
+    'reboot': ['sudo', 'shutdown', '-r', '+1', 'Daily Reboot'],
+}
+
+
+class HostEntry:
+    """A schedule entry bound to one host and that host's blackout dates"""
+
+    def __init__(self, host, entry, blackout_dates=(), generation=0):
+        self.host = host
+        self.entry = entry
+        self.blackout_dates = frozenset(blackout_dates)
+        self.generation = generation
+
+    @property
+    def action(self):
+        return self.entry.action
+
+    def next_fire(self, after, blackout_dates=()):
+        # The shared engine has no blackout dates of its own; each host brings its own
+        return self.entry.next_fire(after, self.blackout_dates)
+
+
+class Transport:
+    """How a host action is delivered. Subclasses implement execute()."""
+
+    async def execute(self, host, action):
+        raise NotImplementedError
+
+
+class RecordingTransport(Transport):
+    """Stand-in transport that records invocations instead of contacting hosts"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def execute(self, host, action):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.calls.append((host, action, utcnow()))
+
+
+class SSHTransport(Transport):
+    """Run the action on the host over ssh (key-based login assumed)"""
+
+    def __init__(self, commands=None, timeout=30, ssh_options=()):
+        self.commands = commands or SSH_COMMANDS
+        self.timeout = timeout
+        self.ssh_options = list(ssh_options) or ['-o', 'BatchMode=yes', '-o', 'ConnectTimeout=10']
+
+    async def execute(self, host, action):
+        process = await asyncio.create_subprocess_exec(
+            'ssh', *self.ssh_options, host, *self.commands[action],
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            raise RuntimeError(f"ssh exited with {process.returncode}: {stderr.decode(errors='replace').strip()}")
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def as_utc(moment):
+    """Aware UTC datetime; naive ones are taken as local time"""
+    return moment.astimezone(timezone.utc) if moment is not None else None
+
+
+class FleetCoordinator:
+    """Fire the schedules of many hosts from a single asyncio event loop"""
+
+    def __init__(self, transport, concurrency=256, keep_latencies=100000):
+        self.transport = transport
+        self.concurrency = concurrency
+        self.engine = ScheduleEngine()
+        self._generations = {}
+        # Heap entries queued per host, and how many belong to replaced or removed schedules
+        self._queued = {}
+        self._stale = 0
+        self._running = False
+        self._wakeup = None
+        self._semaphore = None
+        self._pending = set()
+
+        # Fire lag in seconds: when the transport was invoked minus the scheduled time
+        self.latencies = deque(maxlen=keep_latencies)
+        self.fired = 0
+        self.failures = deque(maxlen=1000)
+
+    @property
+    def hosts(self):
+        return list(self._generations)
+
+    def add_host(self, host, entries, blackout_dates=(), now=None, zone='local',
+                 nonexistent='shift', ambiguous='earlier'):
+        """Set the schedule for a host, replacing any previous one.
+
+        Entries are evaluated in the host's zone; with zone=None they must already return aware datetimes.
+        """
+        generation = self._generations.get(host, -1) + 1
+        self._generations[host] = generation
+        self._retire(host)
+        now = as_utc(now) or utcnow()
+        if zone:
+            entries = zoned_entries(entries, zone, nonexistent, ambiguous)
+        queued = len(self.engine)
+        for entry in entries:
+            self.engine.add(HostEntry(host, entry, blackout_dates, generation), now)
+        self._queued[host] = len(self.engine) - queued
+        self._wake()
+
+    def add_host_config(self, host, config, now=None):
+        """Set a host's schedule from a scheduler_config.json style dict; returns config errors"""
+        try:
+            zone, nonexistent, ambiguous = zone_settings(config)
+        except ValueError as e:
+            self.remove_host(host)
+            return [str(e)]
+        entries, blackout_dates, errors = entries_from_config(config)
+        self.add_host(host, entries, blackout_dates, now, zone or 'local', nonexistent, ambiguous)
+        return errors
+
+    def remove_host(self, host):
+        self._generations.pop(host, None)
+        self._retire(host)
+
+    def _alive(self, host_entry):
+        return self._generations.get(host_entry.host) == host_entry.generation
+
+    def _retire(self, host):
+        """Count a host's queued entries as stale; compact the heap once stale entries are half of it"""
+        self._stale += self._queued.pop(host, 0)
+        if self._stale and self._stale * 2 >= len(self.engine):
+            self.engine.compact(self._alive)
+            self._stale = 0
+
+    def stop(self):
+        self._running = False
+        self._wake()
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self, until=None):
+        """Fire due host actions until stop() is called or the `until` datetime passes"""
+        until = as_utc(until)
+        self._running = True
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        while self._running:
+            now = utcnow()
+            if until is not None and now >= until:
+                break
+
+            # Entries of replaced or removed schedules are dropped here rather than re-queued
+            for fire_time, host_entry in self.engine.pop_due(now, self._alive):
+                task = asyncio.ensure_future(self._dispatch(host_entry, fire_time))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+
+            next_fire = self.engine.next_fire_time()
+            timeout = None
+            if next_fire is not None:
+                timeout = max((next_fire - utcnow()).total_seconds(), 0)
+            if until is not None:
+                remaining = max((until - utcnow()).total_seconds(), 0)
+                timeout = remaining if timeout is None else min(timeout, remaining)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def _dispatch(self, host_entry, fire_time):
+        async with self._semaphore:
+            self.latencies.append((utcnow() - fire_time).total_seconds())
+            self.fired += 1
+            try:
+                await self.transport.execute(host_entry.host, host_entry.action)
+            except Exception as e:
+                self.failures.append((host_entry.host, host_entry.action, fire_time, str(e)))
+
+    def latency_summary(self):
+        """Percentiles of the recorded fire lag, in milliseconds"""
+        if not self.latencies:
+            return {'count': 0}
+        ordered = sorted(self.latencies)
+
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))] * 1000
+
+        return {
+            'count': len(ordered),
+            'p50_ms': percentile(50),
+            'p99_ms': percentile(99),
+            'max_ms': ordered[-1] * 1000,
+        }
+
+
+def load_inventory(path):
+    """Read {"hosts": {name: config}} (or a bare {name: config} mapping) from JSON"""
+    with open(path, 'r') as f:
+        inventory = json.load(f)
+    return inventory.get('hosts', inventory)
+
+
+def run_fleet(inventory_path, transport_name='ssh', concurrency=256):
+    """Entry point for `PowerE.py fleet`"""
+    transport = SSHTransport() if transport_name == 'ssh' else RecordingTransport()
+    coordinator = FleetCoordinator(transport, concurrency=concurrency)
+
+    started = time.perf_counter()
+    for host, config in load_inventory(inventory_path).items():
+        for error in coordinator.add_host_config(host, config):
+            print(f"{host}: {error}")
+    print(f"Fleet coordinator loaded {len(coordinator.hosts)} hosts "
+          f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    try:
+        asyncio.run(coordinator.run())
+    except KeyboardInterrupt:
+        print("\nShutting down fleet coordinator...")
+    print(f"Fired {coordinator.fired} actions, {len(coordinator.failures)} failed; "
+          f"lag {coordinator.latency_summary()}")
@@ -0,0 +1,492 @@
+import tkinter as tk
+import threading
+import math
+import os
+from datetime import datetime
+
+from power_e.scheduler import ShutdownScheduler
+from power_e.schedule import ACTION_LABELS
+from power_e.control import ControlClient, ControlError, address_from_config
+from power_e.instance import InstanceLock, StatusReader, paths_from_config, pid_alive
+from power_e.validation import clamp_ampm_text, clamp_hour_text, clamp_minute_text, normalize_time
+
+
+class ViewState:
+    """What the window shows, written from any thread and read by the Tk thread.
+
+    Writers only replace fields under a lock. The Tk thread copies them on
+    its next refresh, so a burst of changes between two refreshes is painted
+    once and no worker thread ever touches a widget.
+    """
+
+    def __init__(self, **fields):
+        self._lock = threading.Lock()
+        self._fields = fields
+
+    def update(self, **fields):
+        with self._lock:
+            self._fields.update(fields)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._fields)
+
+
+class ShutdownSchedulerGUI(ShutdownScheduler):
+    """Tk front end over the scheduling core"""
+
+    # Longest gap between repaints; the countdown is repainted on each second boundary
+    REFRESH_MS = 250
+
+    def __init__(self, root, dry_run=False):
+        super().__init__(headless_mode=False, dry_run=dry_run)
+        self.root = root
+
+        # Scheduler threads report through this; only refresh() paints it
+        self.view = ViewState(deadline=None, action=self.next_action,
+                              countdown="Next shutdown: --:--:--",
+                              status=("💡 Set time and start daily shutdown schedule", 'green'), popup=None)
+        # Options last applied to each widget, so unchanged text is not re-set
+        self.painted = {}
+        # Staged warning window: the (title, message, timeout) it shows, and the window while it is open
+        self.shown_popup = None
+        self.popup_window = None
+        # Set while another process owns the schedule; the window then mirrors its status file
+        self.owner_pid = None
+        self.status_reader = None
+
+        # Time input parts
+        self.selected_part = 'hour'
+        self.hour_var = tk.StringVar(value=self.saved_hour)
+        self.minute_var = tk.StringVar(value=self.saved_minute)
+        self.ampm_var = tk.StringVar(value=self.saved_ampm)
+
+        self.root.title("Power E v1.0")
+        self.root.geometry("500x500+520+200")
+        self.root.resizable(False, False)
+
+        # Style configuration
+        self.normal_bg = 'white'
+        self.selected_bg = '#4A90E2'
+        self.selected_fg = 'white'
+        self.normal_fg = 'black'
+
+        self.create_widgets()
+        self.update_selection_highlight()
+        if self.config_error:
+            self.set_status(f"❌ Saved settings are invalid: {self.config_error}", 'red')
+        self.attach_to_owner()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.refresh()
+
+    def time_fields(self):
+        # In GUI mode, use current GUI values
+        return self.hour_var.get(), self.minute_var.get(), self.ampm_var.get()
+
+    def create_widgets(self):
+        # Title frame
+        title_frame = tk.Frame(self.root, bg='#2C3E50')
+        title_frame.pack(fill='x', pady=(0, 20))
+
+        title_label = tk.Label(title_frame, text="Power E ⚡",
+                               font=('Arial', 16, 'bold'), fg='white', bg='#2C3E50')
+        title_label.pack(pady=15)
+
+        # Main time display frame
+        main_time_frame = tk.Frame(self.root)
+        main_time_frame.pack(pady=20)
+
+        # Time display with buttons
+        time_container = tk.Frame(main_time_frame)
+        time_container.pack()
+
+        # Time display frame
+        time_frame = tk.Frame(time_container)
+        time_frame.pack(side='left', padx=20)
+
+        # Editable hour entry
+        self.hour_entry = tk.Entry(time_frame, textvariable=self.hour_var, width=3,
+                                   font=('Arial', 24, 'bold'), justify='center', relief='raised', bd=2)
+        self.hour_entry.pack(side='left')
+        self.hour_entry.bind('<FocusIn>', lambda e: self.select_part('hour'))
+        self.hour_entry.bind('<KeyPress>', self.validate_hour_keypress)
+        self.hour_entry.bind('<FocusOut>', self.validate_hour_input)
+
+        # Colon separator
+        tk.Label(time_frame, text=":", font=('Arial', 24, 'bold')).pack(side='left')
+
+        # Editable minute entry
+        self.minute_entry = tk.Entry(time_frame, textvariable=self.minute_var, width=3,
+                                     font=('Arial', 24, 'bold'), justify='center', relief='raised', bd=2)
+        self.minute_entry.pack(side='left')
+        self.minute_entry.bind('<FocusIn>', lambda e: self.select_part('minute'))
+        self.minute_entry.bind('<KeyPress>', self.validate_minute_keypress)
+        self.minute_entry.bind('<FocusOut>', self.validate_minute_input)
+
+        # Space
+        tk.Label(time_frame, text=" ", font=('Arial', 24)).pack(side='left')
+
+        # Editable AM/PM entry
+        self.ampm_entry = tk.Entry(time_frame, textvariable=self.ampm_var, width=3,
+                                   font=('Arial', 20, 'bold'), justify='center', relief='raised', bd=2)
+        self.ampm_entry.pack(side='left')
+        self.ampm_entry.bind('<FocusIn>', lambda e: self.select_part('ampm'))
+        self.ampm_entry.bind('<KeyPress>', self.validate_ampm_keypress)
+        self.ampm_entry.bind('<KeyRelease>', self.validate_ampm_input)
+
+        # Right increment/decrement buttons
+        right_btn_frame = tk.Frame(time_container)
+        right_btn_frame.pack(side='left', padx=1)
+
+        self.inc_btn = tk.Button(right_btn_frame, text='▲', width=3, height=1,
+                                 font=('Arial', 6, 'bold'), command=self.increase_time_part,
+                                 bg='#E8F4FD', fg='#4A90E2', relief='raised', bd=2)
+        self.inc_btn.pack(pady=2)
+
+        self.dec_btn = tk.Button(right_btn_frame, text='▼', width=3, height=1,
+                                 font=('Arial', 6, 'bold'), command=self.decrease_time_part,
+                                 bg='#E8F4FD', fg='#4A90E2', relief='raised', bd=2)
+        self.dec_btn.pack(pady=2)
+
+        # Control buttons frame
+        control_frame = tk.Frame(self.root)
+        control_frame.pack(pady=20)
+
+        self.start_btn = tk.Button(control_frame, text='🚀 Start Daily Shutdown', command=self.start_scheduler,
+                                   font=('Arial', 12, 'bold'), bg='#4CAF50', fg='white',
+                                   padx=20, pady=8, relief='raised', bd=3)
+        self.start_btn.pack(side='left', padx=10)
+
+        self.stop_btn = tk.Button(control_frame, text='⏹️ Stop Scheduler', command=self.stop_scheduler,
+                                  font=('Arial', 12, 'bold'), bg='#F44336', fg='white',
+                                  padx=20, pady=8, relief='raised', bd=3)
+        self.stop_btn.pack(side='left', padx=10)
+
+        # Countdown label
+        self.countdown_label = tk.Label(self.root, text="Next shutdown: --:--:--",
+                                        font=('Arial', 16, 'bold'), fg='#333',
+                                        bg='#F0F0F0', relief='sunken', bd=2, pady=10)
+        self.countdown_label.pack(pady=15, padx=20, fill='x')
+
+        # Status label
+        self.status_label = tk.Label(self.root, text="💡 Set time and start daily shutdown schedule",
+                                     font=('Arial', 11), fg='green', wraplength=450)
+        self.status_label.pack(pady=5)
+
+    def select_part(self, part):
+        self.selected_part = part
+        self.update_selection_highlight()
+
+    def update_selection_highlight(self):
+        self.hour_entry.config(bg=self.normal_bg, fg=self.normal_fg)
+        self.minute_entry.config(bg=self.normal_bg, fg=self.normal_fg)
+        self.ampm_entry.config(bg=self.normal_bg, fg=self.normal_fg)
+
+    def validate_hour_keypress(self, event):
+        if event.char.isdigit() or event.keysym in ['BackSpace', 'Delete', 'Left', 'Right', 'Tab']:
+            return True
+        return "break"
+
+    def validate_minute_keypress(self, event):
+        if event.char.isdigit() or event.keysym in ['BackSpace', 'Delete', 'Left', 'Right', 'Tab']:
+            return True
+        return "break"
+
+    def validate_ampm_keypress(self, event):
+        if event.char.upper() in 'APM' or event.keysym in ['BackSpace', 'Delete', 'Left', 'Right', 'Tab']:
+            return True
+        return "break"
+
+    def validate_hour_input(self, event=None):
+        value = self.hour_var.get()
+        if value:
+            self.hour_var.set(clamp_hour_text(value))
+
+    def validate_minute_input(self, event=None):
+        value = self.minute_var.get()
+        if value:
+            self.minute_var.set(clamp_minute_text(value))
+
+    def validate_ampm_input(self, event=None):
+        value = self.ampm_var.get()
+        if value.strip():
+            self.ampm_var.set(clamp_ampm_text(value))
+
+    def increase_time_part(self):
+        if self.selected_part == 'hour':
+            hour = int(self.hour_var.get())
+            hour = 1 if hour == 12 else hour + 1
+            self.hour_var.set(f"{hour:02}")
+        elif self.selected_part == 'minute':
+            minute = int(self.minute_var.get())
+            minute = (minute + 1) % 60
+            self.minute_var.set(f"{minute:02}")
+        elif self.selected_part == 'ampm':
+            self.ampm_var.set('AM' if self.ampm_var.get() == 'PM' else 'PM')
+
+    def decrease_time_part(self):
+        if self.selected_part == 'hour':
+            hour = int(self.hour_var.get())
+            hour = 12 if hour == 1 else hour - 1
+            self.hour_var.set(f"{hour:02}")
+        elif self.selected_part == 'minute':
+            minute = int(self.minute_var.get())
+            minute = (minute - 1) % 60
+            self.minute_var.set(f"{minute:02}")
+        elif self.selected_part == 'ampm':
+            self.ampm_var.set('AM' if self.ampm_var.get() == 'PM' else 'PM')
+
+    def attach_to_owner(self):
+        """Mirror a scheduler running in another process instead of scheduling here. Returns whether one was found."""
+        lock_path, status_path = paths_from_config(self.raw_config)
+        pid = InstanceLock(lock_path).holder()
+        if pid is None or pid == os.getpid():
+            return False
+        self.owner_pid = pid
+        try:
+            self.status_reader = StatusReader(status_path)
+        except OSError:
+            self.status_reader = None
+        self.set_status(f"🔗 Power E is already running (PID {pid}); changes you start here are sent to it", 'blue')
+        return True
+
+    def detach_from_owner(self):
+        if self.status_reader is not None:
+            self.status_reader.close()
+        self.status_reader = None
+        self.owner_pid = None
+
+    def read_owner_status(self):
+        """Copy the owner's published state into the view; a memory read, no request to the owner"""
+        if not pid_alive(self.owner_pid):
+            self.detach_from_owner()
+            self.view.update(deadline=None, countdown="Next shutdown: --:--:--",
+                             status=("💡 The background scheduler exited; start the schedule here", 'orange'))
+            return
+        fields = self.status_reader.read() if self.status_reader else None
+        if fields is None:
+            return
+        if fields['running'] and fields['next_fire'] is not None and fields['next_action'] in ACTION_LABELS:
+            self.view.update(deadline=datetime.fromtimestamp(fields['next_fire']), action=fields['next_action'])
+        else:
+            self.view.update(deadline=None, countdown="⏸️ Scheduler stopped")
+
+    def send_to_owner(self, command, **arguments):
+        """Hand a change to the owning process over the control channel, off the Tk thread"""
+        address = address_from_config(self.raw_config)
+        owner = self.owner_pid
+
+        def send():
+            if address is None:
+                self.set_status(f"❌ Power E (PID {owner}) has its control socket disabled", 'red')
+                return
+            try:
+                with ControlClient(address) as client:
+                    reply = client.request(command, **arguments)
+            except ControlError as e:
+                self.set_status(f"❌ Could not reach the running scheduler: {e}", 'red')
+                return
+            when = reply.get('next_fire')
+            when = datetime.fromisoformat(when).strftime('%I:%M %p') if when else "--:--"
+            self.set_status(f"✅ Sent to the running scheduler (PID {owner}); next action at {when}", 'green')
+
+        threading.Thread(target=send, daemon=True).start()
+
+    def on_close(self):
+        self.detach_from_owner()
+        self.release_instance()
+        self.root.destroy()
+
+    def refresh(self):
+        """Paint the latest view state; runs on the Tk thread and re-arms itself with after()"""
+        if self.owner_pid is not None:
+            self.read_owner_status()
+        state = self.view.snapshot()
+        delay = self.REFRESH_MS
+        if state['deadline'] is not None:
+            # The countdown is derived here, so the timer thread does not wake every second for it
+            remaining = max(state['deadline'].timestamp() - self.clock.time(), 0)
+            hours, rest = divmod(math.ceil(remaining), 3600)
+            minutes, seconds = divmod(rest, 60)
+            countdown = f"⏰ Next {ACTION_LABELS[state['action']]}: {hours:02d}:{minutes:02d}:{seconds:02d}"
+            delay = min(delay, int(remaining % 1 * 1000) + 1)
+        else:
+            countdown = state['countdown']
+
+        status_text, status_fg = state['status']
+        self.paint(self.countdown_label, text=countdown)
+        self.paint(self.status_label, text=status_text, fg=status_fg)
+        if state['popup'] is not self.shown_popup:
+            self.shown_popup = state['popup']
+            self.open_popup(*self.shown_popup)
+        self.root.after(delay, self.refresh)
+
+    def paint(self, widget, **options):
+        if self.painted.get(widget) != options:
+            widget.config(**options)
+            self.painted[widget] = options
+
+    def set_status(self, text, fg):
+        self.view.update(status=(text, fg))
+
+    def countdown_tick(self, remaining):
+        # refresh() draws the countdown; the timer just sleeps to the deadline
+        return None
+
+    def announce_fire(self, action):
+        self.view.update(deadline=None,
+                         countdown="🔴 SHUTTING DOWN NOW..." if action == 'shutdown' else "🔴 REBOOTING NOW...",
+                         status=("Daily shutdown triggered! Computer will restart tomorrow.", 'red'))
+
+    def announce_executed(self):
+        self.set_status("✅ Shutdown command executed!", 'orange')
+
+    def announce_error(self, message):
+        self.set_status(message, 'red')
+
+    def announce_rescheduled(self):
+        self.view.update(
+            deadline=self.shutdown_time, action=self.next_action,
+            status=(f"✅ Daily shutdown rescheduled for {self.shutdown_time.strftime('%I:%M %p')} tomorrow",
+                    'green'))
+
+    def announce_deferred(self, reason):
+        self.view.update(
+            deadline=self.shutdown_time, action=self.next_action,
+            status=(f"⏳ {ACTION_LABELS[self.next_action].title()} put off until "
+                    f"{self.shutdown_time.strftime('%I:%M %p')}: {reason}", 'orange'))
+
+    def show_warning(self, message):
+        self.set_status(f"⚠️ {message}", 'orange')
+
+    def show_popup(self, title, message, timeout, ask=None):
+        # Opened by refresh() on the Tk thread; the calling worker thread does not wait for it
+        self.view.update(popup=(title, message, timeout))
+
+    def open_popup(self, title, message, timeout):
+        """Topmost window for a staged warning that replaces the previous one and closes itself"""
+        if self.popup_window is not None and self.popup_window.winfo_exists():
+            self.popup_window.destroy()
+        window = self.popup_window = tk.Toplevel(self.root)
+        window.title(title)
+        window.resizable(False, False)
+        window.attributes('-topmost', True)
+        tk.Label(window, text=message, font=("Arial", 11), justify="center", padx=20).pack(pady=10)
+        tk.Button(window, text="OK", command=window.destroy, padx=15).pack(pady=(0, 12))
+        window.after(int(timeout * 1000), window.destroy)
+
+    def start_scheduler(self):
+        if not self.hour_var.get() or not self.minute_var.get() or not self.ampm_var.get():
+            self.set_status("❌ Please fill in all time fields!", 'red')
+            return
+        try:
+            hour, minute, ampm = normalize_time(*self.time_fields())
+        except ValueError as e:
+            self.set_status(f"❌ {e}", 'red')
+            return
+        self.hour_var.set(hour)
+        self.minute_var.set(minute)
+        self.ampm_var.set(ampm)
+
+        confirm = self.show_confirmation_dialog(
+            "Start Scheduler",
+            "Are you sure you want to schedule daily shutdown at the selected time?",
+            yes_text="Yes, Start", no_text="Cancel"
+        )
+        if not confirm:
+            return
+
+        hour, minute, ampm = self.time_fields()
+        if self.owner_pid is not None:
+            self.send_to_owner('reschedule', time=f"{hour}:{minute} {ampm}")
+            return
+
+        if self.is_scheduler_running:
+            self.stop_scheduler()
+
+        # Another process may have taken the schedule since this window opened
+        if self.claim_instance() is not None:
+            if self.attach_to_owner():
+                self.send_to_owner('reschedule', time=f"{hour}:{minute} {ampm}")
+            else:
+                self.set_status("❌ Another Power E instance is starting; try again", 'red')
+            return
+
+        self.save_config()
+        self.shutdown_time = self.get_next_shutdown_datetime()
+        self.view.update(
+            deadline=self.shutdown_time, action=self.next_action,
+            status=(f"✅ Daily shutdown scheduled for {self.shutdown_time.strftime('%I:%M %p')} every day",
+                    'green'))
+        self.reset_timer()
+        self.is_scheduler_running = True
+        self.timer_thread = threading.Thread(target=self.countdown_loop, daemon=True)
+        self.timer_thread.start()
+        self.log_scheduler_action("Daily Shutdown Scheduled")
+
+    def stop_scheduler(self):
+        if self.owner_pid is not None:
+            self.set_status(f"ℹ️ The schedule belongs to Power E (PID {self.owner_pid}); stop that process to stop it",
+                            'orange')
+            return
+
+        confirm = self.show_confirmation_dialog(
+            "Stop Scheduler",
+            "Are you sure you want to stop the daily shutdown schedule?",
+            yes_text="Yes, Stop", no_text="Cancel"
+        )
+        if not confirm:
+            return
+
+        self.timer.cancel()
+        self.is_scheduler_running = False
+        self.view.update(deadline=None, countdown="⏸️ Scheduler stopped",
+                         status=("⏹️ Daily shutdown schedule stopped.", 'orange'))
+        self.log_scheduler_action("Daily shutdown schedule stopped")
+        self.release_instance()
+
+    def show_confirmation_dialog(self, title, message, yes_text="Yes", no_text="No", show_scheduled_time=False):
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        result = [False]
+
+        # Create message label
+        tk.Label(dialog, text=message, font=("Arial", 11), justify="center").pack(pady=10)
+
+        # Optional: Show scheduled time
+        if show_scheduled_time and self.shutdown_time:
+            formatted_time = self.shutdown_time.strftime("%I:%M %p")
+            tk.Label(dialog, text=f"Current scheduled time: {formatted_time}",
+                     font=("Arial", 10), fg="gray").pack()
+
+        # Button frame
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(pady=15)
+
+        def confirm():
+            result[0] = True
+            dialog.destroy()
+
+        def cancel():
+            result[0] = False
+            dialog.destroy()
+
+        tk.Button(button_frame, text=yes_text, command=confirm, bg="#4CAF50", fg="white", padx=15).pack(side="left",
+                                                                                                        padx=10)
+        tk.Button(button_frame, text=no_text, command=cancel, bg="#F44336", fg="white", padx=15).pack(side="left",
+                                                                                                      padx=10)
+
+        # Center the dialog relative to the root window
+        dialog.update_idletasks()
+        w = dialog.winfo_width()
+        h = dialog.winfo_height()
+        x = self.root.winfo_rootx() + (self.root.winfo_width() // 2) - (w // 2)
+        y = self.root.winfo_rooty() + (self.root.winfo_height() // 2) - (h // 2)
+        dialog.geometry(f"{w}x{h}+{x}+{y}")
+
+        dialog.wait_window(dialog)
+        return result[0]
@@ -0,0 +1,275 @@
+"""SQLite history store over shutdown_log.csv files.
+
+Rows are ingested incrementally: each file's byte offset is saved in the
+same transaction as its rows, so an interrupted or repeated ingest resumes
+where it stopped and a multi-GB merged log is streamed, never loaded whole.
+Offsets are keyed by the file's content (header and first row), not its
+path, so a log that was rotated to a new name resumes where it stopped.
+Timestamps are stored as local wall-clock seconds (the CSV has no zone),
+so grouping by day matches the dates in the file.
+"""
+import calendar
+import csv
+import gzip
+import hashlib
+import os
+import socket
+import sqlite3
+from datetime import datetime
+
+from power_e.actionlog import TIMESTAMP_FORMAT
+
+DEFAULT_DB = "shutdown_history.db"
+
+# Rows per transaction while ingesting
+BATCH_ROWS = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    scheduled TEXT,
+    delay_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS idx_events_action_ts ON events (action, ts);
+CREATE INDEX IF NOT EXISTS idx_events_host_ts ON events (host, ts);
+CREATE INDEX IF NOT EXISTS idx_events_delay ON events (delay_ms) WHERE delay_ms IS NOT NULL;
+CREATE TABLE IF NOT EXISTS ingest_state (
+    path TEXT PRIMARY KEY,
+    identity TEXT NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ingest_offsets (
+    identity TEXT NOT NULL,
+    host TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    path TEXT,
+    PRIMARY KEY (identity, host)
+);
+"""
+
+
+def wall_seconds(value):
+    """'2025-07-30 13:42:07' -> seconds, treating the local time as if it were UTC"""
+    # Slicing the fixed-width format is much faster than strptime on large imports
+    if len(value) == 19 and value[4] == '-' and value[10] == ' ':
+        try:
+            return calendar.timegm((int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                    int(value[11:13]), int(value[14:16]), int(value[17:19])))
+        except ValueError:
+            pass
+    return calendar.timegm(datetime.strptime(value, TIMESTAMP_FORMAT).timetuple())
+
+
+def scheduled_minutes(value):
+    """'01:42 PM' -> minutes after midnight"""
+    if len(value) == 8 and value[2] == ':' and value[5] == ' ':
+        hour, minute, ampm = int(value[0:2]), int(value[3:5]), value[6:].upper()
+        if 1 <= hour <= 12 and 0 <= minute <= 59 and ampm in ('AM', 'PM'):
+            return (hour % 12 + (12 if ampm == 'PM' else 0)) * 60 + minute
+    at = datetime.strptime(value, "%I:%M %p")
+    return at.hour * 60 + at.minute
+
+
+def fire_delay_ms(timestamp, scheduled):
+    """Milliseconds between the scheduled time of day and when the action was logged.
+
+    The scheduled column only has a time of day, so it is matched to the
+    latest occurrence at or before the timestamp (a shutdown scheduled for
+    11:59 PM and logged after midnight belongs to the previous day).
+    """
+    try:
+        logged = wall_seconds(timestamp)
+        fire = logged - logged % 86400 + scheduled_minutes(scheduled) * 60
+    except (TypeError, ValueError):
+        return None
+    if fire > logged:
+        fire -= 86400
+    return (logged - fire) * 1000
+
+
+def is_fire_action(action):
+    return action.endswith(" Executed") or action.endswith(" Failed")
+
+
+class HistoryStore:
+    """Indexed event history with incremental CSV ingest and aggregate queries"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _file_identity(self, path):
+        """Hashes of the header alone and of the header plus first data row.
+
+        Every log starts with the same header, so it is the first row that
+        tells a log apart from the one it was rotated from or replaced by.
+        """
+        with _open_log(path) as f:
+            header = f.readline()
+            first = f.readline()
+        if not first.endswith(b"\n"):
+            first = b""  # Still being written
+        return hashlib.sha1(header).hexdigest(), hashlib.sha1(header + first).hexdigest()
+
+    def _resume_offset(self, path, identity, header_only, host):
+        row = self.db.execute("SELECT offset FROM ingest_offsets WHERE identity = ? AND host = ?",
+                              (identity, host)).fetchone()
+        if row:
+            return row[0]
+        # Databases from before offsets were keyed by content kept them per path
+        row = self.db.execute("SELECT identity, offset FROM ingest_state WHERE path = ?",
+                              (os.path.abspath(path),)).fetchone()
+        return row[1] if row and row[0] in (identity, header_only) else 0
+
+    def ingest_csv(self, path, host=None):
+        """Import rows added to a CSV log since the last ingest. Returns the number of new rows."""
+        header_only, identity = self._file_identity(path)
+        host = host or socket.gethostname()
+        # Keyed by host too: logs copied from several machines may start with the same row
+        key = (identity, host, os.path.abspath(path))
+        offset = self._resume_offset(path, identity, header_only, host)
+        if not path.endswith(".gz") and offset > os.path.getsize(path):
+            offset = 0  # Truncated in place
+
+        imported = 0
+        with _open_log(path) as f:
+            header = f.readline()
+            columns = next(csv.reader([header.decode('utf-8', 'replace')]), [])
+            host_column = columns.index("Host") if "Host" in columns else None
+            if offset:
+                f.seek(offset)
+            else:
+                offset = f.tell()
+
+            batch = []
+            while True:
+                line = f.readline()
+                # A line without its newline is still being written; pick it up next time
+                if not line or not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                event = self._parse_line(line, host, host_column)
+                if event:
+                    batch.append(event)
+                if len(batch) >= BATCH_ROWS:
+                    imported += self._commit(key, offset, batch)
+                    batch = []
+            imported += self._commit(key, offset, batch)
+        return imported
+
+    def _parse_line(self, line, host, host_column):
+        fields = next(csv.reader([line.decode('utf-8', 'replace')]), None)
+        if not fields or len(fields) < 3:
+            return None
+        try:
+            ts = wall_seconds(fields[0])
+        except ValueError:
+            return None
+        action, scheduled = fields[1], fields[2]
+        if host_column is not None and len(fields) > host_column:
+            host = fields[host_column]
+        delay = fire_delay_ms(fields[0], scheduled) if is_fire_action(action) else None
+        return host, ts, action, scheduled, delay
+
+    def _commit(self, key, offset, batch):
+        identity, host, path = key
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO events (host, ts, action, scheduled, delay_ms) VALUES (?, ?, ?, ?, ?)", batch)
+            self.db.execute(
+                "INSERT OR REPLACE INTO ingest_offsets (identity, host, offset, path) VALUES (?, ?, ?, ?)",
+                (identity, host, offset, path))
+            # The per-path offset of an older database is used once, then lives on under the identity
+            self.db.execute("DELETE FROM ingest_state WHERE path = ?", (path,))
+        return len(batch)
+
+    def _where(self, host=None, since=None, until=None, action=None):
+        clauses, params = [], []
+        if host:
+            clauses.append("host = ?")
+            params.append(host)
+        if since:
+            clauses.append("ts >= ?")
+            params.append(wall_seconds(since + " 00:00:00"))
+        if until:
+            clauses.append("ts < ?")
+            params.append(wall_seconds(until + " 00:00:00"))
+        if action:
+            clauses.append("action LIKE ?")
+            params.append(f"%{action}%")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def counts_per_day(self, **filters):
+        """[(day, action, count)] ordered by day"""
+        where, params = self._where(**filters)
+        return self.db.execute(
+            "SELECT date(ts, 'unixepoch') AS day, action, COUNT(*) FROM events" + where +
+            " GROUP BY day, action ORDER BY day, action", params).fetchall()
+
+    def stop_start_ratio(self, **filters):
+        """[(host, starts, stops, stops per start)]"""
+        where, params = self._where(**filters)
+        rows = self.db.execute(
+            "SELECT host,"
+            " SUM(action LIKE '%Scheduled%'),"
+            " SUM(action LIKE '%stopped%')"
+            " FROM events" + where + " GROUP BY host ORDER BY host", params).fetchall()
+        return [(host, starts, stops, stops / starts if starts else None) for host, starts, stops in rows]
+
+    def delay_percentiles(self, percentiles=(50, 90, 99), late_ms=60000, **filters):
+        """Fire delay percentiles in ms, plus how many fires were later than late_ms"""
+        where, params = self._where(**filters)
+        where += (" AND " if where else " WHERE ") + "delay_ms IS NOT NULL"
+        count = self.db.execute("SELECT COUNT(*) FROM events" + where, params).fetchone()[0]
+        result = {'count': count}
+        if not count:
+            return result
+        for p in percentiles:
+            offset = min(count - 1, int(p / 100.0 * count))
+            result[f'p{p}_ms'] = self.db.execute(
+                "SELECT delay_ms FROM events" + where + " ORDER BY delay_ms LIMIT 1 OFFSET ?",
+                params + [offset]).fetchone()[0]
+        result['max_ms'] = self.db.execute("SELECT MAX(delay_ms) FROM events" + where, params).fetchone()[0]
+        result['late'] = self.db.execute(
+            "SELECT COUNT(*) FROM events" + where + " AND delay_ms > ?", params + [late_ms]).fetchone()[0]
+        return result
+
+
+def _open_log(path):
+    return gzip.open(path, 'rb') if path.endswith(".gz") else open(path, 'rb')
+
+
+def run_history(args):
+    """Entry point for `PowerE.py history`"""
+    with HistoryStore(args.db) as store:
+        if args.history_command == 'ingest':
+            for path in args.logs:
+                print(f"{path}: {store.ingest_csv(path, args.host)} new rows")
+            return
+
+        filters = {'host': args.host, 'since': args.since, 'until': args.until, 'action': args.action}
+        if args.history_command == 'per-day':
+            for day, action, count in store.counts_per_day(**filters):
+                print(f"{day}  {count:>6}  {action}")
+        elif args.history_command == 'ratio':
+            for host, starts, stops, ratio in store.stop_start_ratio(**filters):
+                shown = f"{ratio:.2f}" if ratio is not None else "-"
+                print(f"{host:<24} starts={starts:<6} stops={stops:<6} stops/start={shown}")
+        elif args.history_command == 'delays':
+            summary = store.delay_percentiles(late_ms=args.late_ms, **filters)
+            for key, value in summary.items():
+                print(f"{key:<8} {value}")
@@ -0,0 +1,269 @@
+"""Single-instance lock and the shared status file.
+
+Only one scheduler per user may own the schedule. The owner holds an OS
+lock on a lock file (flock, or a byte-range lock on Windows) and writes
+its PID into it. The OS drops the lock when the owner exits, even by a
+crash, so a later instance never has to judge whether a lock is stale;
+it simply takes the lock or finds it held.
+
+The owner publishes its state to a small fixed-layout status file that
+other processes memory-map read-only, so a settings window can show the
+live countdown without a round trip to the daemon. Writes use a sequence
+counter (odd while a write is in progress), and readers retry until they
+see the same even value before and after copying the fields.
+"""
+import errno
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+IS_WINDOWS = sys.platform == 'win32'
+
+if IS_WINDOWS:
+    import msvcrt
+else:
+    import fcntl
+
+MAGIC = b'PWRE'
+VERSION = 1
+# magic, version, reserved, sequence
+HEADER = struct.Struct('<4sHHI')
+# pid, running, next fire (Unix time, NaN if none), next action, state, pending action,
+# last logged action, when it was logged, when the record was written
+FIELDS = struct.Struct('<I?3xd16s16s16s48sdd')
+SIZE = HEADER.size + FIELDS.size
+
+# Reads attempted before giving up on a writer that keeps changing the record
+READ_RETRIES = 100
+
+# Windows locks a byte range and blocks reads of it; this byte lies past the PID
+LOCK_OFFSET = 4096
+
+
+def default_path(suffix):
+    """Per-user runtime file, next to the control socket on Linux"""
+    if IS_WINDOWS:
+        directory = os.environ.get('LOCALAPPDATA') or tempfile.gettempdir()
+        return os.path.join(directory, f'power-e-{os.environ.get("USERNAME", "user")}.{suffix}')
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, f'power-e.{suffix}')
+    return os.path.join('/tmp', f'power-e-{os.getuid()}.{suffix}')
+
+
+def paths_from_config(config):
+    """(lock path, status path) from the optional 'instance' section"""
+    options = config.get('instance', {}) if isinstance(config, dict) else {}
+    if not isinstance(options, dict):
+        options = {}
+    return options.get('lock') or default_path('lock'), options.get('status') or default_path('status')
+
+
+def pid_alive(pid):
+    """Whether a process with this PID exists"""
+    if pid <= 0:
+        return False
+    if IS_WINDOWS:
+        # os.kill() would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == 259
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+def try_lock(fd):
+    """Lock fd exclusively without waiting. Returns False if another open file holds the lock."""
+    try:
+        if IS_WINDOWS:
+            os.lseek(fd, LOCK_OFFSET, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError as e:
+        if e.errno in (errno.EACCES, errno.EAGAIN, errno.EWOULDBLOCK, errno.EDEADLK):
+            return False
+        raise
+    return True
+
+
+def unlock(fd):
+    if IS_WINDOWS:
+        os.lseek(fd, LOCK_OFFSET, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class InstanceLock:
+    """OS lock on a file that also holds the owner's PID"""
+
+    def __init__(self, path=None):
+        self.path = path or default_path('lock')
+        self.owned = False
+        self._fd = None
+
+    def holder(self):
+        """PID of the process holding the lock, or None. 0 if it has not written its PID yet."""
+        if self.owned:
+            return os.getpid()
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            if try_lock(fd):
+                unlock(fd)
+                return None
+            os.lseek(fd, 0, os.SEEK_SET)
+            try:
+                return int(os.read(fd, 32).strip() or 0)
+            except ValueError:
+                return 0
+        finally:
+            os.close(fd)
+
+    def acquire(self):
+        """Take the lock. Returns False if another process holds it."""
+        if self.owned:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if not try_lock(fd):
+                os.close(fd)
+                return False
+            # The file stays in place between owners; only its contents change
+            os.ftruncate(fd, 0)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, f"{os.getpid()}\n".encode())
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self.owned = True
+        return True
+
+    def release(self):
+        """Clear the PID and drop the lock"""
+        if not self.owned:
+            return
+        self.owned = False
+        fd, self._fd = self._fd, None
+        try:
+            os.ftruncate(fd, 0)
+            unlock(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def encode_text(text, size):
+    return (text or '').encode('utf-8')[:size]
+
+
+def decode_text(raw):
+    return raw.rstrip(b'\0').decode('utf-8', errors='replace') or None
+
+
+class StatusWriter:
+    """The owner's side of the status file; publish() costs a few struct packs"""
+
+    def __init__(self, path=None):
+        self.path = path or default_path('status')
+        self.writes = 0
+        # The timer, control and executor threads all publish; the sequence counter needs one writer at a time
+        self._lock = threading.Lock()
+        # Opened without truncating, so readers that mapped an older run's file see this one's updates
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            os.ftruncate(fd, SIZE)
+            self._map = mmap.mmap(fd, SIZE)
+        finally:
+            os.close(fd)
+        self.sequence = HEADER.unpack_from(self._map, 0)[3] if self._map[:4] == MAGIC else 0
+        self.sequence += self.sequence % 2
+
+    def publish(self, pid=None, running=False, next_fire=None, next_action=None, state=None, pending=None,
+                last_action=None, last_action_at=None):
+        self._write(pid or os.getpid(), running, math.nan if next_fire is None else next_fire,
+                    encode_text(next_action, 16), encode_text(state, 16), encode_text(pending, 16),
+                    encode_text(last_action, 48), math.nan if last_action_at is None else last_action_at)
+
+    def _write(self, *fields):
+        with self._lock:
+            if self._map.closed:
+                return
+            self.sequence += 1
+            HEADER.pack_into(self._map, 0, MAGIC, VERSION, 0, self.sequence)
+            FIELDS.pack_into(self._map, HEADER.size, *fields, time.time())
+            self.sequence += 1
+            HEADER.pack_into(self._map, 0, MAGIC, VERSION, 0, self.sequence)
+            self.writes += 1
+
+    def close(self):
+        """Mark the owner as gone and unmap"""
+        self._write(0, False, math.nan, b'', b'stopped', b'', b'', math.nan)
+        with self._lock:
+            self._map.close()
+
+
+class StatusReader:
+    """Read-only view of an owner's status file; read() never blocks the owner"""
+
+    def __init__(self, path=None):
+        self.path = path or default_path('status')
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < SIZE:
+                raise OSError(errno.EINVAL, "Status file is incomplete", self.path)
+            self._map = mmap.mmap(f.fileno(), SIZE, access=mmap.ACCESS_READ)
+
+    def read(self):
+        """Latest published fields, or None if there is no consistent record"""
+        data = self._map
+        for _ in range(READ_RETRIES):
+            magic, version, _, before = HEADER.unpack_from(data, 0)
+            if magic != MAGIC or version != VERSION:
+                return None
+            if before % 2:
+                continue
+            fields = FIELDS.unpack_from(data, HEADER.size)
+            if HEADER.unpack_from(data, 0)[3] == before:
+                break
+        else:
+            return None
+
+        pid, running, next_fire, next_action, state, pending, last_action, last_action_at, updated = fields
+        return {
+            'pid': pid,
+            'running': running,
+            'next_fire': None if math.isnan(next_fire) else next_fire,
+            'next_action': decode_text(next_action),
+            'state': decode_text(state),
+            'pending': decode_text(pending),
+            'last_action': decode_text(last_action),
+            'last_action_at': None if math.isnan(last_action_at) else last_action_at,
+            'updated': updated,
+            'sequence': before,
+        }
+
+    def close(self):
+        self._map.close()
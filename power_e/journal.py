@@ -0,0 +1,303 @@
+"""Write-ahead journal of scheduler state transitions.
+
+Every transition is appended as one text line with a sequence number and
+a CRC, so a line torn by a crash is detected and cut off on the next
+start:
+
+    <seq> <kind> <action> <fire time> <written at> <crc32>
+
+Kinds are 'armed' (the next fire was chosen), 'fired' (recorded before
+the command runs), 'cancelled' and 'skipped'. Times are Unix timestamps.
+
+Like the action log, lines are written by a background thread in batches
+with an fsync policy; a 'fired' record is written synchronously so it is
+on disk before the machine starts shutting down. Every `checkpoint_every`
+records (and on close) the folded state is written atomically to a
+checkpoint file and the journal is truncated, so a start after months of
+running replays at most that many lines.
+
+On start the scheduler looks for fires that fell between the last
+handled fire and now, and applies the missed-fire policy: 'fire' runs the
+latest missed power action now, 'skip' only records it, and 'grace' fires
+it if it was missed by no more than grace_minutes.
+"""
+import atexit
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import zlib
+
+from power_e.actionlog import FSYNC_POLICIES
+from power_e.metrics import Histogram
+
+KINDS = ('armed', 'fired', 'cancelled', 'skipped')
+MISSED_POLICIES = ('fire', 'skip', 'grace')
+# Transitions after which a fire counts as dealt with
+HANDLED = ('fired', 'cancelled', 'skipped')
+
+DEFAULT_PATH = "power_e_journal.log"
+CHECKPOINT_VERSION = 1
+
+
+def encode_record(seq, kind, action, fire, at):
+    body = f"{seq} {kind} {action} {fire:.3f} {at:.3f}"
+    return f"{body} {zlib.crc32(body.encode()):08x}\n"
+
+
+def decode_record(line):
+    """(seq, kind, action, fire, at) from a journal line, or None if it is torn or corrupt"""
+    body, _, crc = line.rstrip('\n').rpartition(' ')
+    try:
+        if not line.endswith('\n') or int(crc, 16) != zlib.crc32(body.encode()):
+            return None
+        seq, kind, action, fire, at = body.split(' ')
+        return int(seq), kind, action, float(fire), float(at)
+    except ValueError:
+        return None
+
+
+class JournalState:
+    """What replaying the journal tells the scheduler; small enough to checkpoint as JSON"""
+
+    def __init__(self, seq=0, armed=None, fired=None, handled=None, counts=None):
+        self.seq = seq
+        # (action, fire time) of the latest 'armed' and 'fired' records
+        self.armed = tuple(armed) if armed else None
+        self.fired = tuple(fired) if fired else None
+        # {action: latest fire time that was fired, cancelled or skipped}
+        self.handled = dict(handled or {})
+        self.counts = dict(counts or {})
+
+    def apply(self, seq, kind, action, fire):
+        self.seq = seq
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        if kind == 'armed':
+            self.armed = (action, fire)
+            return
+        if kind == 'fired':
+            self.fired = (action, fire)
+        if kind in HANDLED and fire > self.handled.get(action, fire - 1):
+            self.handled[action] = fire
+
+    def is_handled(self, action, fire):
+        return fire <= self.handled.get(action, fire - 1)
+
+    @property
+    def last_handled(self):
+        return max(self.handled.values()) if self.handled else None
+
+    def copy(self):
+        return JournalState(**self.to_dict())
+
+    def to_dict(self):
+        return {'seq': self.seq, 'armed': self.armed, 'fired': self.fired, 'handled': self.handled,
+                'counts': self.counts}
+
+
+def read_checkpoint(path):
+    """JournalState from a checkpoint file, or an empty state if there is none or it is unreadable"""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.pop('version', None) != CHECKPOINT_VERSION:
+            return JournalState()
+        return JournalState(**data)
+    except (OSError, ValueError, TypeError):
+        return JournalState()
+
+
+def replay(path, state):
+    """Apply the journal's records after state.seq. Returns (records applied, byte offset after the last good line)."""
+    applied = 0
+    offset = 0
+    try:
+        f = open(path, 'r', newline='')
+    except FileNotFoundError:
+        return 0, 0
+    with f:
+        for line in f:
+            record = decode_record(line)
+            if record is None:
+                break
+            offset += len(line.encode())
+            seq, kind, action, fire, _ = record
+            if seq <= state.seq or kind not in KINDS:
+                continue
+            state.apply(seq, kind, action, fire)
+            applied += 1
+    return applied, offset
+
+
+class Journal:
+    """Append-only transition journal with batched fsync and periodic checkpoints"""
+
+    def __init__(self, path=DEFAULT_PATH, fsync='batch', fsync_interval=5.0, checkpoint_every=1000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync!r}")
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1")
+        self.path = path
+        self.checkpoint_path = path + ".checkpoint"
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.checkpoint_every = checkpoint_every
+
+        started = time.perf_counter()
+        durable = read_checkpoint(self.checkpoint_path)
+        self.replayed, good_bytes = replay(self.path, durable)
+        self.replay_ms = (time.perf_counter() - started) * 1000
+        # State as written by the writer thread; checkpoints are taken from it
+        self._durable = durable
+        # State including records still queued; what the scheduler reads
+        self.state = durable.copy()
+        self._lock = threading.Lock()
+
+        self._file = open(self.path, 'a', newline='')
+        if self._file.tell() != good_bytes:
+            # A torn or corrupt tail from a crash: drop it so new records follow the last good one
+            self._file.truncate(good_bytes)
+            self.truncated = True
+        else:
+            self.truncated = False
+        self._since_checkpoint = self.replayed
+        self._last_fsync = 0.0
+        self._queue = queue.Queue()
+        self._closed = False
+
+        self.records_written = 0
+        self.checkpoints = 0
+        self.errors = 0
+        self.write_latency = Histogram()
+
+        self._thread = threading.Thread(target=self._run, name='power-e-journal', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, kind, action, fire, sync=False, timeout=5.0):
+        """Append a transition; with sync, return once it is on disk. fire is a Unix timestamp."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown journal record: {kind!r}")
+        if self._closed:
+            return False
+        with self._lock:
+            seq = self.state.seq + 1
+            self.state.apply(seq, kind, action, fire)
+            self._queue.put((seq, kind, action, fire, time.time()))
+        if not sync:
+            return True
+        return self.flush(timeout)
+
+    def flush(self, timeout=None):
+        """Block until everything recorded so far is written and synced. Returns False on timeout."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Write what is queued, checkpoint so the next start replays nothing, and close"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [item for item in items if isinstance(item, tuple)]
+            # Anyone waiting on this batch needs it synced, whatever the policy
+            waiting = any(isinstance(item, threading.Event) for item in items)
+            stopping = None in items
+            if records or waiting or stopping:
+                started = time.perf_counter()
+                try:
+                    self._write(records, waiting or stopping)
+                    if self._since_checkpoint >= self.checkpoint_every or (stopping and self._since_checkpoint):
+                        self._checkpoint()
+                    if records:
+                        self.write_latency.observe(time.perf_counter() - started)
+                except Exception:
+                    self.errors += 1
+
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if stopping:
+                self._file.close()
+                return
+
+    def _write(self, records, sync):
+        if records:
+            self._file.write(''.join(encode_record(*record) for record in records))
+            self._file.flush()
+            for seq, kind, action, fire, _ in records:
+                self._durable.apply(seq, kind, action, fire)
+            self.records_written += len(records)
+            self._since_checkpoint += len(records)
+
+        now = time.monotonic()
+        if sync or self.fsync == 'batch' or (
+                self.fsync == 'interval' and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def _checkpoint(self):
+        """Save the folded state atomically, then empty the journal it covers"""
+        os.fsync(self._file.fileno())
+        data = dict(self._durable.to_dict(), version=CHECKPOINT_VERSION)
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        fd, temp_path = tempfile.mkstemp(prefix=".power-e-journal.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.checkpoint_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        # Lines at or below the checkpoint's seq are ignored on replay, so a crash before this is harmless
+        self._file.truncate(0)
+        self._since_checkpoint = 0
+        self.checkpoints += 1
+
+
+def missed_policy_from_config(config):
+    """(policy, grace seconds) from the 'journal' section; ValueError for bad values"""
+    options = config.get('journal') if isinstance(config, dict) else None
+    if not isinstance(options, dict):
+        options = {}
+    policy = options.get('missed', 'skip')
+    if policy not in MISSED_POLICIES:
+        raise ValueError(f"journal.missed must be one of {', '.join(MISSED_POLICIES)}")
+    return policy, float(options.get('grace_minutes', 15)) * 60
+
+
+def fire_missed(policy, grace, late):
+    """Whether a power action missed by `late` seconds runs now under the policy"""
+    return policy == 'fire' or (policy == 'grace' and late <= grace)
+
+
+def journal_from_config(config, path=DEFAULT_PATH):
+    """Journal from the optional 'journal' section (on unless "enabled": false); ValueError for bad values"""
+    options = config.get('journal') if isinstance(config, dict) else None
+    if not isinstance(options, dict):
+        options = {}
+    if not options.get('enabled', True):
+        return None
+    return Journal(path=options.get('path', path),
+                   fsync=options.get('fsync', 'batch'),
+                   fsync_interval=float(options.get('fsync_interval', 5.0)),
+                   checkpoint_every=int(options.get('checkpoint_every', 1000)))
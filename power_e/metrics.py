@@ -0,0 +1,215 @@
+"""Timing and health metrics for the scheduler.
+
+Hot paths only observe into fixed-bucket histograms (one bisect and a few
+additions under a lock) or bump plain integer attributes, as the timer,
+executor and log writer already do. Counters and gauges are read through
+callbacks when an export runs, so they cost nothing to record.
+
+Exports are Prometheus text format (served on an optional local HTTP
+endpoint) and a periodic JSON snapshot file for collecting percentiles
+across a fleet.
+"""
+import bisect
+import socket
+import threading
+import time
+
+from power_e.config import write_config_atomic
+
+# Seconds; covers sub-millisecond log writes up to a minute-late fire
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DEFAULT_SNAPSHOT_INTERVAL = 60.0
+
+
+class Histogram:
+    """Cumulative-bucket histogram; percentiles are estimated as the bucket's upper bound"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the overflow (+Inf) bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, q):
+        with self._lock:
+            counts, count, largest = list(self.counts), self.count, self.max
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, largest)
+        return largest
+
+    def summary(self):
+        return {'count': self.count, 'sum': round(self.sum, 6), 'max': self.max,
+                'p50': self.percentile(0.5), 'p90': self.percentile(0.9), 'p99': self.percentile(0.99)}
+
+
+def _labels_text(labels, extra=None):
+    pairs = list(labels.items()) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+
+class Registry:
+    """Named metrics for export. Counters and gauges are callbacks read at export time."""
+
+    def __init__(self):
+        # name -> (type, help, [(labels, source)]), in registration order
+        self._metrics = {}
+
+    def _add(self, kind, name, help_text, source, labels):
+        entry = self._metrics.setdefault(name, (kind, help_text, []))
+        entry[2].append((dict(labels or {}), source))
+
+    def counter(self, name, help_text, read, labels=None):
+        self._add('counter', name, help_text, read, labels)
+
+    def gauge(self, name, help_text, read, labels=None):
+        self._add('gauge', name, help_text, read, labels)
+
+    def histogram(self, name, help_text, histogram, labels=None):
+        self._add('histogram', name, help_text, histogram, labels)
+
+    def render_prometheus(self):
+        lines = []
+        for name, (kind, help_text, series) in self._metrics.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, source in series:
+                if kind != 'histogram':
+                    value = source()
+                    if value is not None:
+                        lines.append(f"{name}{_labels_text(labels)} {value}")
+                    continue
+                with source._lock:
+                    counts, count, total = list(source.counts), source.count, source.sum
+                cumulative = 0
+                for bound, bucket_count in zip(source.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_labels_text(labels, ('le', bound))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels_text(labels, ('le', '+Inf'))} {count}")
+                lines.append(f"{name}_sum{_labels_text(labels)} {total}")
+                lines.append(f"{name}_count{_labels_text(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """Plain dict of every metric; histograms are summarised with percentiles"""
+        metrics = {}
+        for name, (kind, _, series) in self._metrics.items():
+            values = {}
+            for labels, source in series:
+                key = ','.join(f"{k}={v}" for k, v in labels.items()) or 'value'
+                values[key] = source.summary() if kind == 'histogram' else source()
+            metrics[name] = values['value'] if list(values) == ['value'] else values
+        return {'host': socket.gethostname(), 'timestamp': time.time(), 'metrics': metrics}
+
+
+class MetricsExporter:
+    """Serves /metrics over HTTP and/or writes a JSON snapshot file every interval seconds"""
+
+    def __init__(self, registry, port=None, bind='127.0.0.1', snapshot_path=None,
+                 snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL):
+        self.registry = registry
+        self.port = port
+        self.bind = bind
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.snapshots_written = 0
+        self._server = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self.port is not None:
+            self._server = self._make_server()
+            self._threads.append(threading.Thread(target=self._server.serve_forever,
+                                                  name='power-e-metrics-http', daemon=True))
+        if self.snapshot_path:
+            self._threads.append(threading.Thread(target=self._snapshot_loop,
+                                                  name='power-e-metrics-snapshot', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join(2)
+
+    def write_snapshot(self):
+        write_config_atomic(self.snapshot_path, self.registry.snapshot())
+        self.snapshots_written += 1
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                print(f"Could not write metrics snapshot: {e}")
+        try:
+            self.write_snapshot()
+        except OSError:
+            pass
+
+    def _make_server(self):
+        # Imported here so the daemon only loads http.server when the endpoint is enabled
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((self.bind, self.port), MetricsHandler)
+        server.daemon_threads = True
+        self.port = server.server_address[1]
+        return server
+
+
+def exporter_from_config(registry, config):
+    """Build an exporter from the optional 'metrics' section, or None if nothing is exported"""
+    options = config.get('metrics') if isinstance(config, dict) else None
+    if not isinstance(options, dict) or not (options.get('port') is not None or options.get('snapshot')):
+        return None
+    port = options.get('port')
+    return MetricsExporter(
+        registry,
+        port=int(port) if port is not None else None,
+        bind=options.get('bind', '127.0.0.1'),
+        snapshot_path=options.get('snapshot'),
+        snapshot_interval=float(options.get('snapshot_interval', DEFAULT_SNAPSHOT_INTERVAL)),
+    )
@@ -0,0 +1,220 @@
+"""Staged warnings before a power action, fanned out to several channels at once.
+
+The timer thread's on_tick already wakes on the way to each deadline; the
+Notifier tells it when the next stage (15, 5 and 1 minutes before by
+default) falls due and, when one does, hands a Notice to every channel:
+
+- console: the scheduler's show_warning (printed headless, the status
+  line in the GUI)
+- popup: a small window that closes itself after its timeout
+- wall: `wall` on Unix, `msg *` on Windows, to every logged-in terminal
+- socket: every control client that sent {"cmd": "subscribe"}
+
+Each delivery runs on its own daemon thread and returns at once, so a
+popup nobody answers or a hung terminal cannot hold up the shutdown, the
+next day's scheduling or process exit. Every channel has its own timeout;
+a channel whose previous delivery is still running is skipped rather
+than stacked up.
+"""
+import math
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from power_e.schedule import ACTION_LABELS
+
+# Minutes before the action
+DEFAULT_STAGES = (15, 5, 1)
+CHANNELS = ('console', 'popup', 'wall', 'socket')
+# wall broadcasts to every user on the machine, so it is only used when listed
+DEFAULT_CHANNELS = ('console', 'popup', 'socket')
+DEFAULT_TIMEOUTS = {'console': 5.0, 'popup': 60.0, 'wall': 10.0, 'socket': 2.0}
+OUTCOMES = ('delivered', 'failed', 'timeout', 'busy')
+
+Notice = namedtuple('Notice', 'action fire remaining message')
+
+
+def notice_message(action, fire, remaining):
+    minutes = max(math.ceil(remaining / 60), 1)
+    return (f"{ACTION_LABELS[action].title()} in {minutes} minute{'s' if minutes != 1 else ''} "
+            f"(at {fire.strftime('%I:%M %p')}). Save your work.")
+
+
+def broadcast(message, timeout):
+    """Write message to every terminal with wall, or to every session with msg on Windows"""
+    if sys.platform == 'win32':
+        argv = ['msg', '*', f'/TIME:{int(timeout)}', message]
+    else:
+        argv = ['wall', message]
+    if shutil.which(argv[0]) is None:
+        raise OSError(f"{argv[0]} is not available")
+    subprocess.run(argv, timeout=timeout, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, check=True)
+
+
+def popup(title, message, timeout, ask=None):
+    """Show a topmost window that closes itself after timeout seconds; tkinter is imported only here.
+
+    With ask (a button text), returns True if that button was pressed.
+    """
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.title(title)
+    root.resizable(False, False)
+    root.attributes('-topmost', True)
+    pressed = []
+
+    def press():
+        pressed.append(True)
+        root.destroy()
+
+    tk.Label(root, text=message, font=("Arial", 11), justify="center", padx=20).pack(pady=10)
+    buttons = tk.Frame(root)
+    buttons.pack(pady=(0, 12))
+    if ask:
+        tk.Button(buttons, text=ask, command=press, bg="#F44336", fg="white", padx=15).pack(side="left", padx=10)
+    tk.Button(buttons, text="Dismiss" if ask else "OK", command=root.destroy, padx=15).pack(side="left", padx=10)
+    root.after(int(timeout * 1000), root.destroy)
+    root.mainloop()
+    return bool(pressed)
+
+
+class ConsoleChannel:
+    name = 'console'
+
+    def __init__(self, scheduler, timeout):
+        self.scheduler = scheduler
+        self.timeout = timeout
+
+    def deliver(self, notice):
+        self.scheduler.show_warning(notice.message)
+
+
+class PopupChannel:
+    name = 'popup'
+
+    def __init__(self, scheduler, timeout):
+        self.scheduler = scheduler
+        self.timeout = timeout
+
+    def deliver(self, notice):
+        # Never left up past the action itself
+        self.scheduler.show_popup("Power E", notice.message, min(self.timeout, max(notice.remaining, 1)))
+
+
+class WallChannel:
+    name = 'wall'
+
+    def __init__(self, scheduler, timeout):
+        self.timeout = timeout
+
+    def deliver(self, notice):
+        broadcast(notice.message, self.timeout)
+
+
+class SocketChannel:
+    name = 'socket'
+
+    def __init__(self, scheduler, timeout):
+        self.scheduler = scheduler
+        self.timeout = timeout
+
+    def deliver(self, notice):
+        server = self.scheduler.control_server
+        if server is not None:
+            server.publish({'event': 'warning', 'action': notice.action, 'fire': notice.fire.isoformat(),
+                            'remaining': round(notice.remaining, 1), 'message': notice.message}, self.timeout)
+
+
+CHANNEL_TYPES = {channel.name: channel for channel in (ConsoleChannel, PopupChannel, WallChannel, SocketChannel)}
+
+
+class Notifier:
+    """Decides when each warning stage is due and fans its notice out to the channels"""
+
+    def __init__(self, channels, stages=DEFAULT_STAGES):
+        self.channels = list(channels)
+        # Seconds before the action, largest first
+        self.stages = sorted({float(minutes) * 60 for minutes in stages}, reverse=True)
+        # (action, fire timestamp) the sent stages belong to; a new deadline starts over
+        self._armed = None
+        self._sent = 0
+        self._busy = set()
+        self._lock = threading.Lock()
+
+        self.notices = 0
+        # {(channel, outcome): count}
+        self.outcomes = {(channel.name, outcome): 0 for channel in self.channels for outcome in OUTCOMES}
+
+    def tick(self, action, fire, remaining):
+        """Send the stage that is due for this deadline, if any. Returns seconds until the next stage, or None."""
+        armed = (action, fire.timestamp())
+        if armed != self._armed:
+            self._armed = armed
+            self._sent = 0
+        # Stages already passed when the deadline was armed (a late start) get one notice, not several
+        due = self._sent
+        while due < len(self.stages) and self.stages[due] >= remaining:
+            due += 1
+        if due > self._sent:
+            self._sent = due
+            self.notify(Notice(action, fire, remaining, notice_message(action, fire, remaining)))
+        if self._sent < len(self.stages):
+            return remaining - self.stages[self._sent]
+        return None
+
+    def notify(self, notice):
+        """Start delivery on every channel and return without waiting for any of them"""
+        self.notices += 1
+        for channel in self.channels:
+            with self._lock:
+                if channel.name in self._busy:
+                    self.outcomes[channel.name, 'busy'] += 1
+                    continue
+                self._busy.add(channel.name)
+            threading.Thread(target=self._deliver, args=(channel, notice), name=f'power-e-notify-{channel.name}',
+                             daemon=True).start()
+
+    def _deliver(self, channel, notice):
+        started = time.monotonic()
+        try:
+            channel.deliver(notice)
+            outcome = 'timeout' if time.monotonic() - started > channel.timeout else 'delivered'
+        except subprocess.TimeoutExpired:
+            outcome = 'timeout'
+        except Exception as e:
+            outcome = 'failed'
+            print(f"Warning via {channel.name} failed: {e}")
+        with self._lock:
+            self._busy.discard(channel.name)
+            self.outcomes[channel.name, outcome] += 1
+
+
+def notifier_from_config(config, scheduler):
+    """Notifier from the optional 'notify' section (on unless "enabled": false); ValueError for bad values"""
+    options = config.get('notify') if isinstance(config, dict) else None
+    if not isinstance(options, dict):
+        options = {}
+    if not options.get('enabled', True):
+        return None
+    stages = [float(minutes) for minutes in options.get('stages', DEFAULT_STAGES)]
+    if any(minutes <= 0 for minutes in stages):
+        raise ValueError("notify.stages must be positive minutes")
+    names = options.get('channels', DEFAULT_CHANNELS)
+    unknown = [name for name in names if name not in CHANNEL_TYPES]
+    if unknown:
+        raise ValueError(f"unknown notify channel {unknown[0]!r}; expected one of {', '.join(CHANNELS)}")
+    timeouts = dict(DEFAULT_TIMEOUTS, **(options.get('timeouts') or {}))
+    channels = []
+    for name in dict.fromkeys(names):
+        timeout = float(timeouts[name])
+        if timeout <= 0:
+            raise ValueError(f"notify.timeouts.{name} must be positive")
+        channels.append(CHANNEL_TYPES[name](scheduler, timeout))
+    if not stages or not channels:
+        return None
+    return Notifier(channels, stages)
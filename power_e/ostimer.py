@@ -0,0 +1,675 @@
+"""Hand the schedule to the operating system's timers and exit.
+
+`PowerE.py os-timer` compiles scheduler_config.json into native timer
+artifacts, so no Power E process stays resident between actions:
+
+- systemd: a .timer/.service pair per action with one OnCalendar= line per
+  rule, plus a .path unit that regenerates them when the config changes
+- at: a job for the next action only, which queues the following one
+- Windows: a Task Scheduler XML task per action
+
+The OS timer runs `PowerE.py fire ACTION`, which checks the action is
+really due against the full schedule before running it. Blackout dates
+and "except" dates have no equivalent in the OS formats and are enforced
+there, as is anything else a stale artifact would get wrong.
+
+Artifacts are only rewritten when their content changes. Every
+generated file is parsed back and its next fire times compared with the
+compiled schedule before anything is installed, so a set of artifacts can
+be generated and checked in a temporary directory without touching the
+system.
+"""
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as ElementTree
+from datetime import date, datetime, timedelta, timezone
+
+from power_e.config import ConfigError, read_config
+from power_e.expression import ALL_MONTHDAYS, ALL_MONTHS, ALL_WEEKDAYS, Rule
+from power_e.notify import DEFAULT_TIMEOUTS, broadcast
+from power_e.schedule import ACTION_LABELS, ACTIONS, ScheduleEngine, ScheduleEntry, to_24_hour
+from power_e.zones import zoned_entries
+
+BACKENDS = ('systemd', 'at', 'schtasks')
+
+MARKER = "Generated by PowerE.py os-timer"
+DAY_ABBREVIATIONS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+TASK_DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+TASK_MONTHS = ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+               'October', 'November', 'December')
+TASK_NAMESPACE = 'http://schemas.microsoft.com/windows/2004/02/mit/task'
+# Task Scheduler accepts at most this many triggers per task
+MAX_TASK_TRIGGERS = 48
+# Recurring task triggers need a start date; a fixed one keeps the XML identical between runs
+TASK_ANCHOR = date(2000, 1, 1)
+
+# Fire times compared per action when validating artifacts
+VALIDATE_FIRES = 200
+# `fire` accepts an action scheduled up to this many seconds ago (timer delay, at's minute resolution)
+DEFAULT_GRACE = 300
+# ... or this many seconds ahead
+FIRE_LEEWAY = 60
+
+
+class OSTimerError(Exception):
+    """The schedule cannot be expressed for the chosen backend, or an artifact is invalid"""
+
+
+def default_backend():
+    if sys.platform == 'win32':
+        return 'schtasks'
+    return 'systemd' if shutil.which('systemctl') else 'at'
+
+
+def power_e_command():
+    """argv that starts this program: the frozen executable, or the interpreter and PowerE.py"""
+    if getattr(sys, 'frozen', False):
+        return [sys.executable]
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'PowerE.py')
+    return [sys.executable, script]
+
+
+# Compiling entries to triggers. A trigger is a Rule (recurring) or a datetime (once).
+
+def config_entries(config):
+    """The entries the scheduler would run: the daily shutdown plus the config's extra entries"""
+    daily = ScheduleEntry('shutdown', to_24_hour(config.hour, config.ampm), int(config.minute))
+    return [daily] + list(config.entries)
+
+
+def entry_triggers(entry):
+    inner = getattr(entry, 'entry', entry)
+    if isinstance(inner, ScheduleEntry):
+        minute = inner.hour * 60 + inner.minute
+        if inner.on_date is not None:
+            return [datetime.combine(inner.on_date, datetime.min.time()) + timedelta(minutes=minute)]
+        weekdays = ALL_WEEKDAYS if inner.days is None else sum(1 << day for day in inner.days)
+        return [Rule([minute], weekdays=weekdays)]
+    expression = getattr(inner, 'expression', None)
+    if expression is not None:
+        return list(expression.rules)
+    raise OSTimerError(f"Cannot compile schedule entry {entry!r}")
+
+
+def compile_triggers(entries):
+    """{action: [trigger, ...]} for every action with at least one entry"""
+    triggers = {}
+    for entry in entries:
+        triggers.setdefault(entry.action, []).extend(entry_triggers(entry))
+    return triggers
+
+
+def trigger_fires(triggers, after, count):
+    """The next `count` fire times of a list of triggers, merged and without duplicates"""
+    fires = []
+    current = after
+    while len(fires) < count:
+        candidates = [trigger.next_fire(current) if isinstance(trigger, Rule) else trigger
+                      for trigger in triggers]
+        candidates = [fire for fire in candidates if fire is not None and fire > current]
+        if not candidates:
+            break
+        current = min(candidates)
+        fires.append(current)
+    return fires
+
+
+def bit_list(mask, low, high):
+    return [value for value in range(low, high + 1) if mask >> value & 1]
+
+
+def time_groups(minutes):
+    """'HH,HH:MM,MM' strings covering minutes of the day; hours sharing the same minutes share a string"""
+    by_hour = {}
+    for minute in minutes:
+        by_hour.setdefault(minute // 60, []).append(minute % 60)
+    hours_by_minutes = {}
+    for hour, values in sorted(by_hour.items()):
+        hours_by_minutes.setdefault(tuple(values), []).append(hour)
+    return [f"{','.join(f'{h:02}' for h in hours)}:{','.join(f'{m:02}' for m in values)}"
+            for values, hours in hours_by_minutes.items()]
+
+
+def day_patterns(rule):
+    """(weekdays, monthdays) pairs that each must fully match; cron's either-day rule becomes two"""
+    if rule.weekdays != ALL_WEEKDAYS and rule.monthdays != ALL_MONTHDAYS:
+        return [(rule.weekdays, ALL_MONTHDAYS), (ALL_WEEKDAYS, rule.monthdays)]
+    return [(rule.weekdays, rule.monthdays)]
+
+
+# systemd
+
+def on_calendar(trigger, zone=None):
+    """OnCalendar= values for one trigger"""
+    suffix = f" {zone}" if zone and zone != 'local' else ""
+    if not isinstance(trigger, Rule):
+        return [f"{trigger:%Y-%m-%d %H:%M}:00{suffix}"]
+    values = []
+    for weekdays, monthdays in day_patterns(trigger):
+        days = "" if weekdays == ALL_WEEKDAYS else ",".join(
+            DAY_ABBREVIATIONS[day] for day in bit_list(weekdays, 0, 6)) + " "
+        months = "*" if trigger.months == ALL_MONTHS else ",".join(map(str, bit_list(trigger.months, 1, 12)))
+        monthday = "*" if monthdays == ALL_MONTHDAYS else ",".join(map(str, bit_list(monthdays, 1, 31)))
+        for times in time_groups(trigger.minutes):
+            values.append(f"{days}*-{months}-{monthday} {times}:00{suffix}")
+    return values
+
+
+def parse_on_calendar(value):
+    """Trigger for an OnCalendar= value in the form on_calendar() writes"""
+    fields = value.split()
+    weekdays = ALL_WEEKDAYS
+    if fields and fields[0][0].isalpha():
+        weekdays = sum(1 << DAY_ABBREVIATIONS.index(day) for day in fields.pop(0).split(','))
+    if len(fields) < 2:
+        raise OSTimerError(f"Unsupported OnCalendar value: {value!r}")
+    day_field, time_field = fields[0], fields[1]
+    year, months, monthdays = day_field.split('-')
+    hours, minutes, seconds = time_field.split(':')
+    if seconds != '00':
+        raise OSTimerError(f"OnCalendar value with seconds: {value!r}")
+    if year != '*':
+        return datetime(int(year), int(months), int(monthdays), int(hours), int(minutes))
+
+    def mask(text):
+        return 0 if text == '*' else sum(1 << int(part) for part in text.split(','))
+
+    return Rule([int(h) * 60 + int(m) for h in hours.split(',') for m in minutes.split(',')],
+                weekdays=weekdays, monthdays=mask(monthdays) or ALL_MONTHDAYS, months=mask(months) or ALL_MONTHS)
+
+
+def systemd_quote(argv):
+    """ExecStart= command line; % is systemd's specifier character"""
+    return " ".join('"' + arg.replace('\\', '\\\\').replace('"', '\\"') + '"' if re.search(r'[\s"\\]', arg)
+                    else arg for arg in argv).replace('%', '%%')
+
+
+def systemd_units(triggers, zone, config_path, regenerate_args):
+    """{file name: content} for the timer, service and config watch units"""
+    directory = os.path.dirname(config_path)
+    command = power_e_command()
+    header = f"# {MARKER} from {config_path}; edits are overwritten\n"
+    units = {}
+    for action in ACTIONS:
+        if action not in triggers:
+            continue
+        label = ACTION_LABELS[action]
+        values = [value for trigger in triggers[action] for value in on_calendar(trigger, zone)]
+        calendar_lines = "".join(f"OnCalendar={value}\n" for value in dict.fromkeys(values))
+        units[f"power-e-{action}.timer"] = (
+            f"{header}[Unit]\nDescription=Power E scheduled {label}\n\n"
+            f"[Timer]\n{calendar_lines}AccuracySec=1s\nUnit=power-e-{action}.service\n\n"
+            f"[Install]\nWantedBy=timers.target\n")
+        units[f"power-e-{action}.service"] = (
+            f"{header}[Unit]\nDescription=Power E scheduled {label}\n\n"
+            f"[Service]\nType=oneshot\nWorkingDirectory={directory}\n"
+            f"ExecStart={systemd_quote(command + ['fire', action])}\n")
+    units["power-e-config.path"] = (
+        f"{header}[Unit]\nDescription=Regenerate Power E timers when the config changes\n\n"
+        f"[Path]\nPathChanged={config_path}\nUnit=power-e-config.service\n\n"
+        f"[Install]\nWantedBy=paths.target\n")
+    units["power-e-config.service"] = (
+        f"{header}[Unit]\nDescription=Regenerate Power E timers\n\n"
+        f"[Service]\nType=oneshot\nWorkingDirectory={directory}\n"
+        f"ExecStart={systemd_quote(command + ['os-timer'] + regenerate_args)}\n")
+    return units
+
+
+def read_unit(text):
+    """{section: [(key, value), ...]} of a unit file"""
+    sections = {}
+    current = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(('#', ';')):
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            current = sections.setdefault(line[1:-1], [])
+        elif current is None or '=' not in line:
+            raise OSTimerError(f"Malformed unit line: {line!r}")
+        else:
+            key, value = line.split('=', 1)
+            current.append((key.strip(), value.strip()))
+    return sections
+
+
+def systemd_triggers(files):
+    """{action: [trigger, ...]} read back from generated timer units, checking each unit's structure"""
+    triggers = {}
+    for name, text in files.items():
+        sections = read_unit(text)
+        if name.endswith('.timer'):
+            action = name[len('power-e-'):-len('.timer')]
+            values = [value for key, value in sections.get('Timer', []) if key == 'OnCalendar']
+            if not values or ('Unit', f"power-e-{action}.service") not in sections['Timer']:
+                raise OSTimerError(f"{name}: missing OnCalendar= or Unit=")
+            if f"power-e-{action}.service" not in files:
+                raise OSTimerError(f"{name}: no matching service unit")
+            triggers[action] = [parse_on_calendar(value) for value in values]
+        elif name.endswith('.service'):
+            keys = dict(sections.get('Service', []))
+            if keys.get('Type') != 'oneshot' or not keys.get('ExecStart'):
+                raise OSTimerError(f"{name}: needs Type=oneshot and ExecStart=")
+    return triggers
+
+
+# Windows Task Scheduler
+
+def task_element(parent, tag, text=None):
+    element = ElementTree.SubElement(parent, tag)
+    if text is not None:
+        element.text = text
+    return element
+
+
+def task_triggers(parent, trigger):
+    """Add the CalendarTrigger/TimeTrigger elements for one trigger"""
+    if not isinstance(trigger, Rule):
+        time_trigger = task_element(parent, 'TimeTrigger')
+        task_element(time_trigger, 'StartBoundary', trigger.strftime('%Y-%m-%dT%H:%M:%S'))
+        return
+    for weekdays, monthdays in day_patterns(trigger):
+        for minute in trigger.minutes:
+            calendar = task_element(parent, 'CalendarTrigger')
+            start = datetime.combine(TASK_ANCHOR, datetime.min.time()) + timedelta(minutes=minute)
+            task_element(calendar, 'StartBoundary', start.strftime('%Y-%m-%dT%H:%M:%S'))
+            months = bit_list(trigger.months, 1, 12)
+            if monthdays != ALL_MONTHDAYS or (weekdays == ALL_WEEKDAYS and months != list(range(1, 13))):
+                schedule = task_element(calendar, 'ScheduleByMonth')
+                days = task_element(schedule, 'DaysOfMonth')
+                for day in bit_list(monthdays, 1, 31):
+                    task_element(days, 'Day', str(day))
+            elif weekdays == ALL_WEEKDAYS:
+                schedule = task_element(calendar, 'ScheduleByDay')
+                task_element(schedule, 'DaysInterval', '1')
+                continue
+            elif months == list(range(1, 13)):
+                schedule = task_element(calendar, 'ScheduleByWeek')
+                task_element(schedule, 'WeeksInterval', '1')
+            else:
+                schedule = task_element(calendar, 'ScheduleByMonthDayOfWeek')
+                weeks = task_element(schedule, 'Weeks')
+                for week in ('1', '2', '3', '4', 'Last'):
+                    task_element(weeks, 'Week', week)
+            if weekdays != ALL_WEEKDAYS:
+                days = task_element(schedule, 'DaysOfWeek')
+                for day in bit_list(weekdays, 0, 6):
+                    task_element(days, TASK_DAYS[day])
+            if schedule.tag != 'ScheduleByWeek':
+                month_element = task_element(schedule, 'Months')
+                for month in months:
+                    task_element(month_element, TASK_MONTHS[month - 1])
+
+
+def task_xml(action, triggers, config_path):
+    """Task Scheduler XML (as text) running `PowerE.py fire action` at the triggers"""
+    command = power_e_command()
+    task = ElementTree.Element('Task', {'version': '1.2', 'xmlns': TASK_NAMESPACE})
+    info = task_element(task, 'RegistrationInfo')
+    task_element(info, 'Description', f"Power E scheduled {ACTION_LABELS[action]}. {MARKER} from {config_path}")
+    trigger_element = task_element(task, 'Triggers')
+    for trigger in triggers:
+        task_triggers(trigger_element, trigger)
+    if len(trigger_element) > MAX_TASK_TRIGGERS:
+        raise OSTimerError(f"{ACTION_LABELS[action].title()} needs {len(trigger_element)} Task Scheduler "
+                           f"triggers; at most {MAX_TASK_TRIGGERS} are allowed")
+    settings = task_element(task, 'Settings')
+    for tag, value in (('MultipleInstancesPolicy', 'IgnoreNew'), ('DisallowStartIfOnBatteries', 'false'),
+                       ('StopIfGoingOnBatteries', 'false'), ('StartWhenAvailable', 'false'),
+                       ('ExecutionTimeLimit', 'PT10M'), ('Enabled', 'true')):
+        task_element(settings, tag, value)
+    actions = task_element(task, 'Actions', None)
+    actions.set('Context', 'Author')
+    execute = task_element(actions, 'Exec')
+    task_element(execute, 'Command', command[0])
+    task_element(execute, 'Arguments', subprocess.list2cmdline(command[1:] + ['fire', action]))
+    task_element(execute, 'WorkingDirectory', os.path.dirname(config_path))
+    if hasattr(ElementTree, 'indent'):
+        ElementTree.indent(task)
+    return '<?xml version="1.0" encoding="UTF-16"?>\n' + ElementTree.tostring(task, encoding='unicode') + '\n'
+
+
+def xml_triggers(text):
+    """Triggers read back from a task written by task_xml()"""
+    root = ElementTree.fromstring(text.split('\n', 1)[1])
+    ns = {'t': TASK_NAMESPACE}
+    if root.find('t:Actions/t:Exec/t:Command', ns) is None:
+        raise OSTimerError("Task has no Exec action")
+    triggers = []
+    for element in root.find('t:Triggers', ns):
+        start = datetime.strptime(element.find('t:StartBoundary', ns).text, '%Y-%m-%dT%H:%M:%S')
+        tag = element.tag.split('}')[1]
+        if tag == 'TimeTrigger':
+            triggers.append(start)
+            continue
+        schedule = next(child for child in element if child.tag.split('}')[1].startswith('ScheduleBy'))
+        kind = schedule.tag.split('}')[1]
+        weekdays = sum(1 << TASK_DAYS.index(day.tag.split('}')[1])
+                       for day in schedule.findall('t:DaysOfWeek/*', ns)) or ALL_WEEKDAYS
+        monthdays = sum(1 << int(day.text) for day in schedule.findall('t:DaysOfMonth/t:Day', ns))
+        months = sum(1 << (TASK_MONTHS.index(month.tag.split('}')[1]) + 1)
+                     for month in schedule.findall('t:Months/*', ns))
+        triggers.append(Rule([start.hour * 60 + start.minute], weekdays=weekdays,
+                             monthdays=monthdays or ALL_MONTHDAYS, months=months or ALL_MONTHS))
+    return triggers
+
+
+# at
+
+def at_job(engine, config_path):
+    """(at -t time, script text) for the schedule's next action, or None if nothing is left"""
+    head = engine.peek()
+    if head is None:
+        return None
+    fire, entry = head
+    # at reads local time
+    local = fire.astimezone().replace(tzinfo=None) if fire.tzinfo else fire
+    command = power_e_command()
+    script = (f"#!/bin/sh\n# {MARKER}; next: {ACTION_LABELS[entry.action]} at {local:%Y-%m-%d %H:%M}\n"
+              f"# at -t {local:%Y%m%d%H%M}\n"
+              f"{shlex.join(command + ['fire', entry.action])}\n"
+              f"exec {shlex.join(command + ['os-timer', '--backend', 'at', '--config', config_path, '--install'])}\n")
+    return local.strftime('%Y%m%d%H%M'), script
+
+
+# Writing, checking and installing
+
+def generate(backend, config_path, regenerate_args=(), now=None):
+    """{file name: text} of the artifacts for a config file, plus warnings. Raises ConfigError or OSTimerError."""
+    config_path = os.path.abspath(config_path)
+    config = read_config(config_path)
+    entries = config_entries(config)
+    triggers = compile_triggers(entries)
+    warnings = list(config.errors)
+    excluded = any(getattr(getattr(entry, 'expression', None), 'excluded', None) for entry in entries)
+    if backend != 'at' and (config.blackout_dates or excluded):
+        warnings.append("Blackout and except dates are checked when the timer fires, not by the OS timer")
+
+    if backend == 'systemd':
+        return systemd_units(triggers, config.timezone, config_path, list(regenerate_args)), warnings
+    if backend == 'schtasks':
+        if config.timezone and config.timezone != 'local':
+            warnings.append(f"Task Scheduler runs in local time; timezone {config.timezone!r} is not applied")
+        return {f"PowerE-{action}.xml": task_xml(action, triggers[action], config_path)
+                for action in ACTIONS if action in triggers}, warnings
+    if backend == 'at':
+        # at holds one job, so blackout dates and exclusions can be applied when choosing it
+        if config.timezone:
+            entries = zoned_entries(entries, config.timezone, config.nonexistent, config.ambiguous)
+            now = now or datetime.now(timezone.utc)
+        engine = ScheduleEngine(entries, config.blackout_dates, now=now or datetime.now())
+        job = at_job(engine, config_path)
+        return ({'power-e.at': job[1]} if job else {}), warnings
+    raise OSTimerError(f"Unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+
+def validate(backend, files, config_path, now=None):
+    """Parse generated artifacts back and check they fire when the compiled schedule does"""
+    config = read_config(os.path.abspath(config_path))
+    if backend == 'at':
+        for name, text in files.items():
+            if not re.search(r'^# at -t \d{12}$', text, re.M):
+                raise OSTimerError(f"{name}: missing at time")
+        return
+    expected = compile_triggers(config_entries(config))
+    if backend == 'systemd':
+        found = systemd_triggers(files)
+    else:
+        found = {name[len('PowerE-'):-len('.xml')]: xml_triggers(text) for name, text in files.items()}
+    if set(found) != set(expected):
+        raise OSTimerError(f"Artifacts cover {sorted(found)}, the schedule has {sorted(expected)}")
+    after = now or datetime.now()
+    for action, triggers in expected.items():
+        want = trigger_fires(triggers, after, VALIDATE_FIRES)
+        got = trigger_fires(found[action], after, VALIDATE_FIRES)
+        if want != got:
+            mismatch = next((w, g) for w, g in zip(want + [None], got + [None]) if w != g)
+            raise OSTimerError(f"{action} artifacts fire at {mismatch[1]}, the schedule at {mismatch[0]}")
+
+
+def systemd_verify(files):
+    """Run `systemd-analyze verify` on the units in a scratch directory, if it is installed"""
+    if not shutil.which('systemd-analyze'):
+        return
+    with tempfile.TemporaryDirectory(prefix='power-e-units.') as directory:
+        paths = []
+        for name, text in files.items():
+            paths.append(os.path.join(directory, name))
+            with open(paths[-1], 'w') as f:
+                f.write(text)
+        result = subprocess.run(['systemd-analyze', 'verify'] + paths, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise OSTimerError(f"systemd-analyze verify: {result.stderr.strip()}")
+
+
+def holds_text(path, text, encoding='utf-8'):
+    """Whether the file at path exists and holds exactly text"""
+    try:
+        with open(path, 'r', encoding=encoding, newline='') as f:
+            return f.read() == text
+    except (OSError, UnicodeError):
+        return False
+
+
+def write_if_changed(path, text, encoding='utf-8'):
+    """Write atomically unless the file already holds text. Returns whether it was written."""
+    if holds_text(path, text, encoding):
+        return False
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(prefix='.power-e.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline='') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def owned_artifacts(directory):
+    """Files in directory that an earlier run generated"""
+    names = []
+    for name in sorted(os.listdir(directory)):
+        if not re.match(r'^(power-e-[\w-]+\.(timer|service|path)|PowerE-\w+\.xml|power-e\.at)$', name):
+            continue
+        try:
+            with open(os.path.join(directory, name), 'rb') as f:
+                head = f.read(4096)
+        except OSError:
+            continue
+        if MARKER.encode() in head or MARKER.encode('utf-16-le') in head:
+            names.append(name)
+    return names
+
+
+def write_artifacts(files, directory, encoding='utf-8'):
+    """Bring directory in line with files. Returns (written, removed, unchanged) name lists."""
+    os.makedirs(directory, exist_ok=True)
+    written, unchanged = [], []
+    for name, text in sorted(files.items()):
+        (written if write_if_changed(os.path.join(directory, name), text, encoding) else unchanged).append(name)
+    removed = [name for name in owned_artifacts(directory) if name not in files]
+    for name in removed:
+        os.remove(os.path.join(directory, name))
+    return written, removed, unchanged
+
+
+def default_unit_directory(user):
+    if user:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+        return os.path.join(base, 'systemd', 'user')
+    return '/etc/systemd/system'
+
+
+def run_command(argv):
+    print("$ " + " ".join(argv))
+    result = subprocess.run(argv, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise OSTimerError(f"{argv[0]} failed ({result.returncode}): {result.stderr.strip()}")
+    return result.stdout + result.stderr
+
+
+def activate_systemd(written, removed, user):
+    systemctl = ['systemctl'] + (['--user'] if user else [])
+    units = [name for name in written if name.endswith(('.timer', '.path'))]
+    for name in removed:
+        if name.endswith(('.timer', '.path')):
+            run_command(systemctl + ['disable', '--now', name])
+    run_command(systemctl + ['daemon-reload'])
+    if units:
+        run_command(systemctl + ['enable', '--now'] + units)
+        # A changed timer keeps its old elapse time until restarted
+        run_command(systemctl + ['restart'] + units)
+
+
+def activate_schtasks(directory, written, removed):
+    for name in removed:
+        run_command(['schtasks', '/Delete', '/TN', f"PowerE\\{name[len('PowerE-'):-len('.xml')]}", '/F'])
+    for name in written:
+        run_command(['schtasks', '/Create', '/TN', f"PowerE\\{name[len('PowerE-'):-len('.xml')]}",
+                     '/XML', os.path.join(directory, name), '/F'])
+
+
+def activate_at(directory, files):
+    """Replace the queued at job with the current one"""
+    job_file = os.path.join(directory, 'power-e.at.job')
+    try:
+        with open(job_file) as f:
+            old_job = f.read().strip()
+    except OSError:
+        old_job = None
+    if old_job:
+        try:
+            run_command(['atrm', old_job])
+        except OSTimerError as e:
+            print(f"Previous at job already gone: {e}")
+    if 'power-e.at' not in files:
+        if old_job:
+            os.remove(job_file)
+        return
+    when = re.search(r'^# at -t (\d{12})$', files['power-e.at'], re.M).group(1)
+    output = run_command(['at', '-t', when, '-f', os.path.join(directory, 'power-e.at')])
+    match = re.search(r'job (\d+)', output)
+    if match:
+        write_if_changed(job_file, match.group(1) + "\n")
+
+
+def run_os_timer(args):
+    """Entry point for `PowerE.py os-timer`"""
+    backend = args.backend or default_backend()
+    if args.install and backend == 'systemd' and not args.output:
+        directory = default_unit_directory(args.user)
+    elif args.install and backend == 'at' and not args.output:
+        directory = os.path.join(os.path.dirname(os.path.abspath(args.config)), '.power-e-at')
+    else:
+        directory = args.output or 'power-e-timers'
+    regenerate = ['--backend', backend, '--config', os.path.abspath(args.config), '--install']
+    if args.user:
+        regenerate.append('--user')
+    if args.output:
+        regenerate += ['--output', os.path.abspath(args.output)]
+
+    try:
+        files, warnings = generate(backend, args.config, regenerate)
+        validate(backend, files, args.config)
+        if backend == 'systemd':
+            systemd_verify(files)
+    except FileNotFoundError:
+        print(f"❌ {args.config} not found. Run the GUI first to set up your shutdown time.")
+        sys.exit(1)
+    except (ConfigError, OSTimerError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for warning in warnings:
+        print(f"⚠️ {warning}")
+
+    encoding = 'utf-16' if backend == 'schtasks' else 'utf-8'
+    if args.check:
+        stale = [name for name, text in files.items()
+                 if not holds_text(os.path.join(directory, name), text, encoding)]
+        if os.path.isdir(directory):
+            stale += [name for name in owned_artifacts(directory) if name not in files]
+        if stale:
+            print(f"❌ Out of date in {directory}: {', '.join(stale)}")
+            sys.exit(1)
+        print(f"✅ {len(files)} artifacts in {directory} match {args.config}")
+        return
+
+    written, removed, unchanged = write_artifacts(files, directory, encoding)
+    if backend == 'at':
+        for name in written:
+            os.chmod(os.path.join(directory, name), 0o755)
+    print(f"{directory}: {len(written)} written, {len(removed)} removed, {len(unchanged)} unchanged")
+    if not args.install:
+        return
+    if not written and not removed:
+        print("✅ Installed timers are up to date")
+        return
+    try:
+        if backend == 'systemd':
+            activate_systemd(written, removed, args.user)
+        elif backend == 'schtasks':
+            activate_schtasks(directory, written, removed)
+        else:
+            activate_at(directory, files)
+    except (OSError, OSTimerError) as e:
+        print(f"❌ Could not activate timers: {e}")
+        sys.exit(1)
+    print("✅ Timers installed; no Power E process needs to keep running")
+
+
+def run_fire(args):
+    """Entry point for `PowerE.py fire`: run an action an OS timer started, if the schedule agrees"""
+    from power_e.scheduler import ShutdownScheduler
+
+    scheduler = ShutdownScheduler(headless_mode=True, dry_run=args.dry_run)
+    try:
+        if scheduler.config_error:
+            print(f"Configuration is invalid: {scheduler.config_error}")
+            sys.exit(1)
+        owner = scheduler.claim_instance()
+        if owner is not None:
+            print(f"Power E is running (PID {owner}) and fires its own schedule; not running {args.action}")
+            return
+        now = scheduler.now()
+        engine = scheduler.build_schedule(now=now - timedelta(seconds=args.grace))
+        due = [(fire, entry) for fire, entry in engine.pop_due(now + timedelta(seconds=FIRE_LEEWAY))
+               if entry.action == args.action]
+        label = ACTION_LABELS[args.action].title()
+        if not due:
+            # Blackout or except date, or an artifact older than the config
+            print(f"No {ACTION_LABELS[args.action]} is scheduled now; not running it")
+            scheduler.log_scheduler_action(f"{label} Skipped (not scheduled now)", now)
+            return
+        fire_time, entry = due[0]
+        if scheduler.journal is not None and scheduler.journal.state.is_handled(args.action, fire_time.timestamp()):
+            # The timer started twice, or a resident scheduler already ran it before exiting
+            print(f"The {ACTION_LABELS[args.action]} due {fire_time:%I:%M %p} was already handled")
+            return
+        scheduler.shutdown_time = fire_time
+        if args.action == 'warn':
+            message = entry.message or "Scheduled shutdown is coming up. Save your work."
+            scheduler.record_transition('fired', 'warn', fire_time)
+            scheduler.show_warning(message)
+            try:
+                broadcast(message, DEFAULT_TIMEOUTS['wall'])
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"Could not broadcast the warning: {e}")
+            scheduler.log_scheduler_action("Warning Shown", fire_time)
+            return
+        scheduler.record_transition('fired', args.action, fire_time, sync=True)
+        scheduler.announce_fire(args.action)
+        scheduler.perform_shutdown(args.action, fire_time).result()
+    finally:
+        scheduler.executor.close(wait=True)
+        scheduler.action_log.close()
+        scheduler.release_instance()
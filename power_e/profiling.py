@@ -0,0 +1,258 @@
+"""Opt-in profiling for `PowerE.py --profile`.
+
+Nothing here is imported unless the option is given, and the scheduler
+has no profiling checks of its own: the hooks are installed from outside
+by replacing methods on the scheduler classes and tkinter's callback
+wrapper, so without --profile the code that runs is exactly the normal
+code.
+
+With it, a run collects:
+
+- cProfile stats for every thread (before Python 3.12 each thread gets
+  its own profiler when it starts and they are merged when dumped; from
+  3.12 one profiler sees every thread, and only one may be active)
+- wall and CPU time per call of the hot paths (timer loop steps, command
+  execution, action log, config load/save) and of every Tk callback,
+  with the slowest call, which is what a frozen window shows up as
+- tracemalloc snapshots, with the top allocation sites and their growth
+  since the first snapshot
+
+Everything is written every `interval` seconds and at exit to a
+directory per run under the profile directory; only the newest `keep`
+runs and `snapshots` memory snapshots per run are kept.
+"""
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import shutil
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+DEFAULT_DIRECTORY = "power_e_profiles"
+
+# cProfile runs on sys.monitoring from 3.12: one process-wide profiler, and a second enable() raises ValueError
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+# Scheduler methods timed per call; the GUI adds its own overrides of these
+HOT_PATHS = ('countdown_loop', 'run_due_actions', 'on_tick', 'advance_schedule', 'perform_shutdown',
+             'on_shutdown_done', 'log_scheduler_action', 'publish_status', 'load_config', 'reload_config',
+             'apply_config', 'save_config', 'get_next_shutdown_datetime', 'status')
+GUI_PATHS = ('refresh', 'start_scheduler', 'stop_scheduler', 'read_owner_status')
+
+
+class ProfileSnapshot:
+    """A running cProfile.Profile as pstats.Stats loads it, without disabling it like create_stats() does"""
+
+    def __init__(self, profile):
+        profile.snapshot_stats()
+        self.stats = profile.stats
+
+    def create_stats(self):
+        pass
+
+
+class Profiler:
+    """Collects cProfile, timer and tracemalloc data for one run and dumps it periodically"""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, interval=60.0, keep=10, snapshots=10, frames=5):
+        self.root = directory
+        self.interval = interval
+        self.keep = keep
+        self.snapshots = snapshots
+        self.frames = frames
+        self.directory = os.path.join(directory, f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+
+        # {name: [calls, wall seconds, CPU seconds, slowest call]}
+        self.timers = {}
+        self._timers_lock = threading.Lock()
+        self._profiles = []
+        self._profiles_lock = threading.Lock()
+        self._first_snapshot = None
+        self._snapshot_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._patched = []
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.prune()
+        tracemalloc.start(self.frames)
+        self._profiles.append(('main', self._new_profile()))
+        if not PROCESS_WIDE_PROFILER:
+            # Threads started from now on enable their own profiler on their first profiled event
+            threading.setprofile(self._thread_started)
+        self._thread = threading.Thread(target=self._run, name='power-e-profiler', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        if threading.current_thread() is threading.main_thread() and \
+                signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+            # Exit normally on `kill`, so the final dump is written
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        print(f"Profiling to {os.path.abspath(self.directory)}")
+        return self
+
+    def _new_profile(self):
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def _thread_started(self, frame, event, arg):
+        # Called once per thread: enabling the profiler replaces this hook for the thread
+        if threading.current_thread() is self._thread:
+            sys.setprofile(None)
+            return
+        profile = self._new_profile()
+        with self._profiles_lock:
+            self._profiles.append((threading.current_thread().name, profile))
+
+    def stop(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        threading.setprofile(None)
+        self.dump()
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        tracemalloc.stop()
+
+    # Per-call timers
+
+    def timed(self, name, function):
+        """Wrap function to add its wall and CPU time per call to timers[name]"""
+        stats = self.timers.setdefault(name, [0, 0.0, 0.0, 0.0])
+        lock = self._timers_lock
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            wall = time.perf_counter()
+            cpu = time.thread_time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - wall
+                cpu = time.thread_time() - cpu
+                with lock:
+                    stats[0] += 1
+                    stats[1] += elapsed
+                    stats[2] += cpu
+                    if elapsed > stats[3]:
+                        stats[3] = elapsed
+        return wrapper
+
+    def instrument(self, cls, names):
+        """Time the named methods of cls; must run before instances bind them (e.g. as Tk callbacks)"""
+        for name in names:
+            method = getattr(cls, name, None)
+            if method is None:
+                continue
+            self._patched.append((cls, name, cls.__dict__.get(name, method)))
+            setattr(cls, name, self.timed(f"{cls.__name__}.{name}", method))
+
+    def instrument_tk(self):
+        """Time every Tk callback (bindings, after() and widget commands) by the function it calls"""
+        import tkinter
+
+        original = tkinter.CallWrapper.__call__
+        timers = {}
+
+        def call(wrapper, *args):
+            function = wrapper.func
+            timed = timers.get(function)
+            if timed is None:
+                name = getattr(function, '__qualname__', None) or repr(function)
+                timed = timers[function] = self.timed(f"tk {name}", original)
+            return timed(wrapper, *args)
+
+        self._patched.append((tkinter.CallWrapper, '__call__', original))
+        tkinter.CallWrapper.__call__ = call
+
+    # Dumping
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except Exception as e:
+                print(f"Profile dump failed: {e}")
+
+    def dump(self):
+        """Write the current stats, timers and a memory snapshot to this run's directory"""
+        self.dump_cprofile()
+        self.dump_timers()
+        if tracemalloc.is_tracing():
+            self.dump_memory()
+
+    def dump_cprofile(self):
+        with self._profiles_lock:
+            profiles = list(self._profiles)
+        with open(os.path.join(self.directory, 'cprofile.txt'), 'w') as f:
+            stats = pstats.Stats(*[ProfileSnapshot(profile) for _, profile in profiles], stream=f)
+            stats.dump_stats(os.path.join(self.directory, 'cprofile.pstats'))
+            stats.sort_stats('cumulative').print_stats(40)
+
+    def dump_timers(self):
+        with self._timers_lock:
+            timers = {name: list(values) for name, values in self.timers.items() if values[0]}
+        rows = sorted(timers.items(), key=lambda item: item[1][1], reverse=True)
+        with open(os.path.join(self.directory, 'timers.json'), 'w') as f:
+            json.dump({name: {'calls': calls, 'wall_s': wall, 'cpu_s': cpu, 'max_wall_s': slowest}
+                       for name, (calls, wall, cpu, slowest) in rows}, f, indent=1)
+        with open(os.path.join(self.directory, 'timers.txt'), 'w') as f:
+            f.write(f"{'calls':>9} {'wall ms':>11} {'cpu ms':>11} {'mean ms':>9} {'max ms':>9}  function\n")
+            for name, (calls, wall, cpu, slowest) in rows:
+                f.write(f"{calls:9d} {wall * 1000:11.1f} {cpu * 1000:11.1f} {wall / calls * 1000:9.3f} "
+                        f"{slowest * 1000:9.1f}  {name}\n")
+
+    def dump_memory(self):
+        # Leave out the profiler's own allocations
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, module.__file__) for module in (tracemalloc, cProfile, pstats)] +
+            [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, '<frozen importlib._bootstrap*>')])
+        if self._first_snapshot is None:
+            self._first_snapshot = snapshot
+        self._snapshot_count += 1
+        snapshot.dump(os.path.join(self.directory, f"memory-{self._snapshot_count:04d}.snapshot"))
+        stale = self._snapshot_count - self.snapshots
+        if stale > 0:
+            try:
+                os.remove(os.path.join(self.directory, f"memory-{stale:04d}.snapshot"))
+            except OSError:
+                pass
+
+        current, peak = tracemalloc.get_traced_memory()
+        with open(os.path.join(self.directory, 'memory.txt'), 'w') as f:
+            f.write(f"traced {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB, "
+                    f"snapshot {self._snapshot_count}\n\nTop allocation sites:\n")
+            for stat in snapshot.statistics('lineno')[:25]:
+                f.write(f"{stat}\n")
+            f.write("\nGrowth since the first snapshot:\n")
+            for stat in snapshot.compare_to(self._first_snapshot, 'lineno')[:25]:
+                f.write(f"{stat}\n")
+
+    def prune(self):
+        """Remove all but the newest `keep` run directories"""
+        runs = sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+        for name in runs[:max(len(runs) - self.keep, 0)]:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+def start_profiler(directory=DEFAULT_DIRECTORY, interval=60.0, gui=False):
+    """Start profiling this process and hook the scheduler's hot paths (and Tk callbacks with gui)"""
+    from power_e.scheduler import ShutdownScheduler
+
+    profiler = Profiler(directory, interval)
+    profiler.instrument(ShutdownScheduler, HOT_PATHS)
+    if gui:
+        from power_e.gui import ShutdownSchedulerGUI
+        # The GUI overrides some hot paths; its own versions are timed too
+        profiler.instrument(ShutdownSchedulerGUI, [name for name in HOT_PATHS + GUI_PATHS
+                                                   if name in ShutdownSchedulerGUI.__dict__])
+        profiler.instrument_tk()
+    return profiler.start()
@@ -0,0 +1,237 @@
+import heapq
+import itertools
+from datetime import datetime, timedelta
+
+CONFIG_VERSION = 2
+
+ACTIONS = ('warn', 'shutdown', 'reboot')
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+# Readable names for countdown and status text
+ACTION_LABELS = {'warn': 'warning', 'shutdown': 'shutdown', 'reboot': 'reboot'}
+
+
+def to_24_hour(hour, ampm):
+    """Convert a 12-hour clock value to 0-23"""
+    hour = int(hour)
+    if ampm == 'PM' and hour != 12:
+        hour += 12
+    elif ampm == 'AM' and hour == 12:
+        hour = 0
+    return hour
+
+
+def parse_time(value):
+    """Parse '06:30 PM' or '18:30' into (hour, minute)"""
+    value = value.strip().upper()
+    for fmt in ("%I:%M %p", "%I:%M%p", "%H:%M"):
+        try:
+            parsed = datetime.strptime(value, fmt)
+            return parsed.hour, parsed.minute
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid time: {value!r}")
+
+
+def parse_date(value):
+    return datetime.strptime(value.strip(), "%Y-%m-%d").date()
+
+
+class ScheduleEntry:
+    """A single action at a time of day, repeating on weekdays or once on a date"""
+
+    def __init__(self, action, hour, minute, days=None, on_date=None, message=None):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action: {action!r}")
+        if not (0 <= hour <= 23 and 0 <= minute <= 59):
+            raise ValueError(f"Invalid time: {hour:02d}:{minute:02d}")
+        self.action = action
+        self.hour = hour
+        self.minute = minute
+        # Weekday numbers (Monday is 0); None means every day
+        self.days = frozenset(days) if days is not None else None
+        self.on_date = on_date
+        self.message = message
+
+    def __repr__(self):
+        return f"ScheduleEntry({self.to_dict()!r})"
+
+    def next_fire(self, after, blackout_dates=()):
+        """First fire time strictly after `after`, or None if it never fires again"""
+        if self.on_date is not None:
+            fire = datetime.combine(self.on_date, datetime.min.time()).replace(
+                hour=self.hour, minute=self.minute)
+            if fire <= after or self.on_date in blackout_dates:
+                return None
+            return fire
+
+        fire = after.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if fire <= after:
+            fire += timedelta(days=1)
+        # Bounded: at most a week to reach a matching weekday, plus one day per blackout date
+        for _ in range(7 + len(blackout_dates)):
+            if (self.days is None or fire.weekday() in self.days) and fire.date() not in blackout_dates:
+                return fire
+            fire += timedelta(days=1)
+        return None
+
+    @classmethod
+    def from_dict(cls, data):
+        action = data.get('action', 'shutdown')
+        hour, minute = parse_time(data['time'])
+        days = None
+        if data.get('days') is not None:
+            days = []
+            for day in data['days']:
+                day = day.strip().lower()[:3]
+                if day not in WEEKDAYS:
+                    raise ValueError(f"Invalid weekday: {day!r}")
+                days.append(WEEKDAYS.index(day))
+        on_date = parse_date(data['date']) if data.get('date') else None
+        return cls(action, hour, minute, days=days, on_date=on_date, message=data.get('message'))
+
+    def to_dict(self):
+        data = {
+            'action': self.action,
+            'time': datetime(2000, 1, 1, self.hour, self.minute).strftime("%I:%M %p"),
+        }
+        if self.days is not None:
+            data['days'] = [WEEKDAYS[day] for day in sorted(self.days)]
+        if self.on_date is not None:
+            data['date'] = self.on_date.isoformat()
+        if self.message:
+            data['message'] = self.message
+        return data
+
+
+class ScheduleEngine:
+    """Priority queue of schedule entries keyed by their next fire time.
+
+    Only the head of the heap is looked at on each tick: due entries are
+    popped and pushed back with their following fire time, so a tick costs
+    O(log n) per fired entry regardless of how many entries exist.
+    """
+
+    def __init__(self, entries=(), blackout_dates=(), now=None):
+        self.blackout_dates = frozenset(blackout_dates)
+        self._heap = []
+        self._counter = itertools.count()
+        now = now or datetime.now()
+        for entry in entries:
+            self.add(entry, now)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, entry, now=None):
+        """Queue an entry at its next fire time after now"""
+        fire = entry.next_fire(now or datetime.now(), self.blackout_dates)
+        if fire is not None:
+            # The counter keeps entries with equal fire times in insertion order
+            heapq.heappush(self._heap, (fire, next(self._counter), entry))
+
+    def peek(self):
+        """Return (fire_time, entry) for the next entry without removing it"""
+        if not self._heap:
+            return None
+        fire, _, entry = self._heap[0]
+        return fire, entry
+
+    def next_fire_time(self):
+        head = self.peek()
+        return head[0] if head else None
+
+    def pop_due(self, now, alive=None):
+        """Remove and return all (fire_time, entry) pairs due at or before now.
+
+        Entries for which alive(entry) is false are dropped instead of being returned and re-queued.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire, _, entry = heapq.heappop(self._heap)
+            if alive is not None and not alive(entry):
+                continue
+            due.append((fire, entry))
+            # Re-queue from now so an entry that is overdue by days fires once, not once per missed day
+            following = entry.next_fire(max(fire, now), self.blackout_dates)
+            if following is not None:
+                heapq.heappush(self._heap, (following, next(self._counter), entry))
+        return due
+
+    def compact(self, alive):
+        """Drop every queued entry for which alive(entry) is false"""
+        self._heap = [item for item in self._heap if alive(item[2])]
+        heapq.heapify(self._heap)
+
+    def skip_next(self):
+        """Drop the head entry's next firing, re-queueing it for the one after. Returns (fire_time, entry)."""
+        if not self._heap:
+            return None
+        fire, _, entry = heapq.heappop(self._heap)
+        following = entry.next_fire(fire, self.blackout_dates)
+        if following is not None:
+            heapq.heappush(self._heap, (following, next(self._counter), entry))
+        return fire, entry
+
+
+def parse_schedule_config(config):
+    """Read extra schedule entries and blackout dates from a config dict.
+
+    Version 1 files only carry the hour/minute/ampm keys and yield nothing
+    here. Invalid entries are returned as error strings instead of failing
+    the whole file.
+    """
+    entries = []
+    errors = []
+    for data in config.get('schedules', []):
+        try:
+            if 'expr' in data:
+                entries.append(expression_entry(data, config.get('holidays')))
+            else:
+                entries.append(ScheduleEntry.from_dict(data))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            errors.append(f"Ignoring schedule entry {data!r}: {e}")
+
+    blackout_dates = set()
+    for value in config.get('blackout_dates', []):
+        try:
+            blackout_dates.add(parse_date(value))
+        except (TypeError, ValueError, AttributeError) as e:
+            errors.append(f"Ignoring blackout date {value!r}: {e}")
+
+    return entries, blackout_dates, errors
+
+
+def expression_entry(data, holidays=None):
+    """Entry for {"action": ..., "expr": "weekdays 18:30, fri 16:00 except holidays"}"""
+    # Imported here: power_e.expression is only loaded by configs that use expressions
+    from power_e.expression import ExpressionEntry, ScheduleExpression
+
+    action = data.get('action', 'shutdown')
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action: {action!r}")
+    return ExpressionEntry(action, ScheduleExpression(data['expr'], holidays), message=data.get('message'))
+
+
+def entries_from_config(config):
+    """All entries of a config dict: the daily shutdown from hour/minute/ampm plus the extras"""
+    entries, blackout_dates, errors = parse_schedule_config(config)
+    try:
+        hour = to_24_hour(config.get('hour', '06'), config.get('ampm', 'PM'))
+        daily = ScheduleEntry('shutdown', hour, int(config.get('minute', '00')))
+        entries.insert(0, daily)
+    except (TypeError, ValueError) as e:
+        errors.append(f"Ignoring daily shutdown time: {e}")
+    return entries, blackout_dates, errors
+
+
+def build_config(hour, minute, ampm, entries=(), blackout_dates=()):
+    """Build a versioned config dict; the legacy keys stay readable by older builds"""
+    return {
+        'version': CONFIG_VERSION,
+        'hour': hour,
+        'minute': minute,
+        'ampm': ampm,
+        'schedules': [entry.to_dict() for entry in entries],
+        'blackout_dates': sorted(d.isoformat() for d in blackout_dates),
+    }
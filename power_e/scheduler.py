@@ -0,0 +1,772 @@
+import threading
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from power_e.activity import gate_from_config
+from power_e.clock import SystemClock
+from power_e.timer import DeadlineTimer
+from power_e.executor import ShutdownExecutor, DryRunBackend
+from power_e.actionlog import ActionLogWriter, writer_from_config
+from power_e.schedule import ScheduleEntry, ScheduleEngine, ACTION_LABELS, build_config, parse_time, to_24_hour
+from power_e.config import (ConfigCache, ConfigError, ConfigWatcher, default_config,
+                            write_config_atomic)
+from power_e.control import ControlError, ControlServer, address_from_config
+from power_e.instance import InstanceLock, StatusWriter, paths_from_config
+from power_e.journal import fire_missed, journal_from_config, missed_policy_from_config
+from power_e.metrics import Histogram, Registry, exporter_from_config
+from power_e.notify import CHANNELS, OUTCOMES, notifier_from_config, popup
+from power_e.zones import zoned_entries
+
+
+class ShutdownScheduler:
+    """Scheduling core: config, next fire time, timer, executor and action log.
+
+    This class never imports tkinter; it reports progress by printing and is
+    what the headless daemon runs. The Tk front end in power_e.gui subclasses
+    it and overrides the announce_* hooks and time field accessors.
+
+    Every reading of the current time goes through clock, so the whole class
+    can run against a VirtualClock (see power_e.simulate).
+    """
+
+    def __init__(self, headless_mode=True, dry_run=False, clock=None, backend=None,
+                 config_file="scheduler_config.json"):
+        self.headless_mode = headless_mode
+        self.clock = clock or SystemClock()
+
+        # Shutdown commands are resolved once here and run off the timer thread
+        self.executor = ShutdownExecutor(backend=backend or (DryRunBackend() if dry_run else None))
+
+        # Configuration file for persistence, parsed once per change
+        self.config_file = config_file
+        self.config_cache = ConfigCache()
+        self.config = None
+        self.config_watcher = None
+        self.control_server = None
+        self.metrics_exporter = None
+        # Held while this process owns the schedule; other instances attach instead of scheduling
+        self.instance_lock = None
+        self.status_writer = None
+        self.last_action = None
+        self.last_action_at = None
+        self.reload_count = 0
+        self.last_reload_ms = None
+        self.reload_latency = Histogram()
+        # Seconds each fire came after its deadline
+        self.fire_lag = Histogram()
+
+        self.shutdown_time = None
+        self.next_action = 'shutdown'
+        self.schedule = None
+        # Guards the schedule, which a config reload may swap while the timer thread reads it
+        self.schedule_lock = threading.Lock()
+        self.timer_thread = None
+        self.stop_thread = threading.Event()
+        self.timer = DeadlineTimer(self.stop_thread, clock=self.clock)
+        # Wakeups and clock jumps of timers replaced by reset_timer(), so the exported totals keep counting up
+        self.past_wakeups = 0
+        self.past_clock_jumps = 0
+        self.is_scheduler_running = False
+        self.daily_mode = True
+        # Where the timer thread is: 'stopped', 'waiting', 'firing' or 'rescheduling'
+        self.state = 'stopped'
+        # Action whose OS countdown is running and can still be cancelled
+        self.pending_action = None
+        # Optional check that puts off a due power action while the machine is busy
+        self.load_gate = None
+        self.defer_options = None
+        # (action, scheduled fire time, deferred until, reason) while a power action waits for the machine
+        self.deferred = None
+        # Write-ahead record of armed/fired/cancelled/skipped fires, kept by the instance owner
+        self.journal = None
+        self.missed_policy = ('skip', 0.0)
+        # Staged warnings before each power action
+        self.notifier = None
+        self.notify_options = None
+
+        # Load saved configuration first
+        self.load_config()
+
+        # Action log keeps its file open and writes from a background thread
+        try:
+            self.action_log = writer_from_config(self.raw_config)
+        except (TypeError, ValueError) as e:
+            print(f"Invalid log settings, using defaults: {e}")
+            self.action_log = ActionLogWriter()
+
+        self.metrics = self.build_metrics()
+
+    def load_config(self):
+        """Load saved configuration from file"""
+        # Set when the file exists but cannot be used; defaults are loaded instead
+        self.config_error = None
+        try:
+            config = self.config_cache.load(self.config_file)
+        except FileNotFoundError:
+            config = default_config()
+        except (OSError, ConfigError) as e:
+            self.config_error = str(e)
+            config = default_config()
+        self.apply_config(config)
+
+    def apply_config(self, config):
+        """Swap in a parsed config and re-arm a running timer for the new schedule"""
+        for error in config.errors:
+            print(error)
+        self.config = config
+        self.saved_hour = config.hour
+        self.saved_minute = config.minute
+        self.saved_ampm = config.ampm
+        # Extra entries from a version 2 config (warnings, reboots, per-weekday times)
+        self.extra_schedules = config.entries
+        self.timezone = config.timezone
+        self.blackout_dates = config.blackout_dates
+        # Whole file as read, so saving keeps sections this class does not manage
+        self.raw_config = config.raw
+        self.apply_defer_options(config.raw.get('defer') if isinstance(config.raw, dict) else None)
+        self.apply_notify_options(config.raw.get('notify') if isinstance(config.raw, dict) else None)
+        try:
+            self.missed_policy = missed_policy_from_config(config.raw)
+        except (TypeError, ValueError) as e:
+            print(f"Missed-fire policy not valid, skipping missed actions: {e}")
+            self.missed_policy = ('skip', 0.0)
+
+        if self.is_scheduler_running and self.headless_mode:
+            with self.schedule_lock:
+                self.shutdown_time = self.get_next_shutdown_datetime()
+                if self.deferred is not None:
+                    # A new schedule does not drop an action that is already waiting
+                    self.next_action, _, self.shutdown_time, _ = self.deferred
+            self.timer.wake()
+            self.record_armed()
+            self.publish_status()
+
+    def apply_defer_options(self, options):
+        """Rebuild the load gate when the 'defer' section changed"""
+        if options == self.defer_options:
+            return
+        self.defer_options = options
+        if self.load_gate is not None:
+            self.load_gate.close()
+        try:
+            self.load_gate = gate_from_config(self.raw_config)
+        except (TypeError, ValueError, OSError) as e:
+            print(f"Load-aware deferral disabled: {e}")
+            self.load_gate = None
+
+    def apply_notify_options(self, options):
+        """Rebuild the staged warnings when the 'notify' section changed"""
+        if self.notifier is not None and options == self.notify_options:
+            return
+        self.notify_options = options
+        try:
+            self.notifier = notifier_from_config(self.raw_config, self)
+        except (TypeError, ValueError) as e:
+            print(f"Staged warnings disabled: {e}")
+            self.notifier = None
+
+    def reload_config(self):
+        """Re-read the config file after a change; an invalid file leaves the running schedule alone"""
+        started = time.perf_counter()
+        try:
+            config = self.config_cache.load(self.config_file)
+        except (OSError, ConfigError) as e:
+            print(f"Keeping current configuration, reload failed: {e}")
+            return False
+        if config is self.config:
+            return False
+
+        self.apply_config(config)
+        self.reload_count += 1
+        elapsed = time.perf_counter() - started
+        self.reload_latency.observe(elapsed)
+        self.last_reload_ms = elapsed * 1000
+        print(f"Configuration reloaded in {self.last_reload_ms:.1f} ms; "
+              f"next {ACTION_LABELS[self.next_action]} at {self.shutdown_time.strftime('%I:%M %p')}")
+        self.log_scheduler_action("Configuration Reloaded")
+        return True
+
+    def time_fields(self):
+        """(hour, minute, ampm) strings for the daily shutdown; the GUI returns its entry fields"""
+        return self.saved_hour, self.saved_minute, self.saved_ampm
+
+    def save_config(self):
+        """Save current configuration to file. Returns False if it could not be written."""
+        hour, minute, ampm = self.time_fields()
+        config = dict(self.raw_config)
+        config.update(build_config(hour, minute, ampm, self.extra_schedules, self.blackout_dates))
+        try:
+            # Temp file + rename, so a crash mid-write never leaves a truncated config
+            write_config_atomic(self.config_file, config)
+            return True
+        except OSError as e:
+            self.announce_error(f"❌ Could not save settings: {e}")
+            return False
+
+    def run_headless(self):
+        """Run in headless mode without GUI"""
+        print("Power E running in headless mode...")
+
+        # Check if config exists
+        if not os.path.exists(self.config_file):
+            print("No configuration found. Please run with GUI first to set up your shutdown time.")
+            return
+        if self.config_error:
+            print(f"Configuration is invalid: {self.config_error}")
+            return
+
+        owner = self.claim_instance()
+        if owner is not None:
+            print(f"Power E is already running (PID {owner}). "
+                  "Change its schedule with the GUI or 'PowerE.py ctl reschedule'.")
+            return
+
+        try:
+            # Start scheduler automatically
+            self.start_headless_scheduler()
+
+            # Pick up edits to the config file without restarting
+            self.config_watcher = ConfigWatcher(self.config_file, self.reload_config,
+                                                interval=self.config.reload_interval)
+            self.config_watcher.start()
+
+            # Let `PowerE.py ctl` and other local clients query and steer this daemon
+            self.start_control_server()
+            self.start_metrics_exporter()
+
+            # Keep the program running until the timer thread exits
+            try:
+                while self.timer_thread and self.timer_thread.is_alive():
+                    self.timer_thread.join(self.timer.max_sleep)
+            except KeyboardInterrupt:
+                print("\nShutting down scheduler...")
+                self.timer.cancel()
+                self.config_watcher.stop()
+                if self.control_server:
+                    self.control_server.stop()
+                if self.metrics_exporter:
+                    self.metrics_exporter.stop()
+        finally:
+            self.release_instance()
+
+    def claim_instance(self):
+        """Take the single-instance lock and open the status file. Returns the owner's PID if another process has it."""
+        if self.instance_lock is not None and self.instance_lock.owned:
+            return None
+        lock_path, status_path = paths_from_config(self.raw_config)
+        lock = InstanceLock(lock_path)
+        try:
+            if not lock.acquire():
+                return lock.holder() or 0
+        except OSError as e:
+            # An unusable lock directory should not stop the schedule itself
+            print(f"Single-instance lock not available: {e}")
+            return None
+        self.instance_lock = lock
+        try:
+            self.status_writer = StatusWriter(status_path)
+        except (OSError, ValueError) as e:
+            print(f"Status file not available: {e}")
+        self.open_journal()
+        self.publish_status()
+        return None
+
+    def release_instance(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if self.status_writer is not None:
+            self.status_writer.close()
+            self.status_writer = None
+        if self.instance_lock is not None:
+            self.instance_lock.release()
+            self.instance_lock = None
+
+    def open_journal(self):
+        """Replay the state journal; only the instance owner writes it"""
+        try:
+            self.journal = journal_from_config(self.raw_config)
+        except (TypeError, ValueError, OSError) as e:
+            print(f"State journal disabled: {e}")
+            self.journal = None
+            return
+        if self.journal is not None and self.journal.truncated:
+            print("State journal: dropped a record left incomplete by a crash")
+
+    def record_transition(self, kind, action, fire_time, sync=False):
+        """Journal a transition of the fire at fire_time; sync waits until it is on disk"""
+        if self.journal is not None and fire_time is not None:
+            self.journal.record(kind, action, fire_time.timestamp(), sync=sync)
+
+    def record_armed(self):
+        """Journal the fire the timer now waits for, unless it is the one already recorded"""
+        journal = self.journal
+        if journal is None or self.shutdown_time is None:
+            return
+        armed = (self.next_action, self.shutdown_time.timestamp())
+        if journal.state.armed != armed:
+            journal.record('armed', *armed)
+
+    def record_cancelled(self, action):
+        """Journal the cancellation of the last fired action"""
+        fired = self.journal.state.fired if self.journal is not None else None
+        if fired is not None:
+            self.journal.record('cancelled', action or fired[0], fired[1])
+
+    def publish_status(self):
+        """Write the current state to the status file for attached readers"""
+        writer = self.status_writer
+        if writer is None:
+            return
+        shutdown_time = self.shutdown_time if self.is_scheduler_running else None
+        writer.publish(running=self.is_scheduler_running,
+                       next_fire=shutdown_time.timestamp() if shutdown_time else None,
+                       next_action=self.next_action, state=self.state, pending=self.pending_action,
+                       last_action=self.last_action, last_action_at=self.last_action_at)
+
+    def start_control_server(self):
+        address = address_from_config(self.raw_config)
+        if address is None:
+            return
+        try:
+            self.control_server = ControlServer(self, address).start()
+            print(f"Control socket: {address}")
+        except (ControlError, OSError) as e:
+            print(f"Control socket not available: {e}")
+
+    def start_metrics_exporter(self):
+        try:
+            self.metrics_exporter = exporter_from_config(self.metrics, self.raw_config)
+            if self.metrics_exporter is None:
+                return
+            self.metrics_exporter.start()
+        except (TypeError, ValueError, OSError) as e:
+            print(f"Metrics export not available: {e}")
+            self.metrics_exporter = None
+            return
+        if self.metrics_exporter.port is not None:
+            print(f"Metrics: http://{self.metrics_exporter.bind}:{self.metrics_exporter.port}/metrics")
+
+    def build_metrics(self):
+        """Register the timing histograms and health counters of this scheduler and its parts"""
+        registry = Registry()
+        registry.histogram('power_e_fire_lag_seconds', 'Delay between a deadline and its firing',
+                           self.fire_lag)
+        registry.counter('power_e_timer_wakeups_total', 'Timer thread wakeups',
+                         lambda: self.past_wakeups + self.timer.wakeups)
+        registry.counter('power_e_clock_jumps_total', 'Wall clock changes or suspends seen by the timer',
+                         lambda: self.past_clock_jumps + self.timer.clock_jumps)
+        registry.gauge('power_e_next_fire_timestamp_seconds', 'When the next action is due (Unix time)',
+                       lambda: self.shutdown_time.timestamp()
+                       if self.is_scheduler_running and self.shutdown_time else None)
+
+        for action, histogram in self.executor.latency.items():
+            registry.histogram('power_e_command_seconds', 'Run time of shutdown commands', histogram,
+                               {'action': action})
+        registry.counter('power_e_deferrals_total', 'Power actions put off because the machine was busy',
+                         lambda: self.load_gate.deferrals if self.load_gate else 0)
+        registry.counter('power_e_command_failures_total', 'Shutdown commands that failed or timed out',
+                         lambda: self.executor.failures)
+        registry.counter('power_e_sudo_fallbacks_total', 'Commands retried with sudo',
+                         lambda: self.executor.sudo_fallbacks)
+
+        registry.counter('power_e_config_reloads_total', 'Config reloads applied', lambda: self.reload_count)
+        registry.histogram('power_e_config_reload_seconds', 'Time to load and apply a changed config',
+                           self.reload_latency)
+
+        registry.histogram('power_e_log_write_seconds', 'Action log batch write time, including fsync',
+                           self.action_log.write_latency)
+        registry.counter('power_e_log_rows_total', 'Action log rows written', lambda: self.action_log.rows_written)
+        registry.counter('power_e_log_errors_total', 'Action log write errors', lambda: self.action_log.errors)
+        registry.counter('power_e_journal_records_total', 'State journal records written',
+                         lambda: self.journal.records_written if self.journal else 0)
+        registry.counter('power_e_journal_errors_total', 'State journal write errors',
+                         lambda: self.journal.errors if self.journal else 0)
+        for channel in CHANNELS:
+            for outcome in OUTCOMES:
+                registry.counter('power_e_notifications_total', 'Staged warning deliveries per channel and outcome',
+                                 lambda key=(channel, outcome):
+                                 self.notifier.outcomes.get(key, 0) if self.notifier else 0,
+                                 {'channel': channel, 'outcome': outcome})
+        registry.counter('power_e_control_requests_total', 'Control socket requests served',
+                         lambda: self.control_server.requests if self.control_server else 0)
+        return registry
+
+    def start_headless_scheduler(self):
+        """Start scheduler in headless mode"""
+        try:
+            self.shutdown_time = self.get_next_shutdown_datetime()
+            print(f"Daily shutdown scheduled for {self.shutdown_time.strftime('%I:%M %p')}")
+            if self.next_action != 'shutdown':
+                print(f"Next action: {ACTION_LABELS[self.next_action]}")
+            self.recover_missed()
+
+            self.is_scheduler_running = True
+            self.reset_timer()
+
+            self.timer_thread = threading.Thread(target=self.countdown_loop, daemon=True)
+            self.timer_thread.start()
+
+        except Exception as e:
+            print(f"Failed to start headless scheduler: {str(e)}")
+
+    def countdown_loop(self):
+        """Timer thread body: wait, fire, move to the next entry, and repeat until stopped.
+
+        One flat loop for the life of the scheduler, so a year of fires (or of
+        cancelled shutdowns) uses the same stack and memory as the first day.
+        """
+        timer = self.timer
+        deadline = lambda: self.shutdown_time
+        try:
+            while True:
+                self.state = 'waiting'
+                self.record_armed()
+                self.publish_status()
+                if not timer.wait_until(deadline, on_tick=self.on_tick):
+                    break
+                self.state = 'firing'
+                self.fire_lag.observe(timer.last_fire_lag)
+                self.run_due_actions()
+                if (not self.daily_mode and self.deferred is None) or timer.is_cancelled():
+                    break
+                self.state = 'rescheduling'
+                if not self.schedule_next_day():
+                    break
+        finally:
+            self.state = 'stopped'
+            self.publish_status()
+
+    def on_tick(self, remaining):
+        """Countdown output, plus staged warnings and activity sampling before a power action"""
+        next_tick = self.countdown_tick(remaining)
+        if self.next_action == 'warn':
+            return next_tick
+        notifier = self.notifier
+        if notifier is not None:
+            notice_in = notifier.tick(self.next_action, self.shutdown_time, remaining)
+            if notice_in is not None:
+                next_tick = notice_in if next_tick is None else min(next_tick, notice_in)
+        gate = self.load_gate
+        if gate is not None:
+            sample_in = gate.tick(remaining, self.clock.monotonic())
+            next_tick = sample_in if next_tick is None else min(next_tick, sample_in)
+        return next_tick
+
+    def countdown_tick(self, remaining):
+        """Print status every 10 minutes or in last 5 minutes, sleeping in between"""
+        total = math.ceil(remaining)
+        hours, rest = divmod(total, 3600)
+        minutes, seconds = divmod(rest, 60)
+        if (minutes % 10 == 0 and seconds == 0) or remaining <= 300:
+            print(f"Next {ACTION_LABELS[self.next_action]} in: {hours:02d}:{minutes:02d}:{seconds:02d}")
+
+        if remaining <= 300:
+            return (remaining % 1) or 1.0
+        # Sleep until the next 10-minute mark, or until the final 5 minutes start
+        next_mark = max((total - 1) // 600 * 600, 300)
+        return remaining - next_mark
+
+    def reset_timer(self):
+        """Give a new run its own stop event so a stopped loop cannot be revived"""
+        self.past_wakeups += self.timer.wakeups
+        self.past_clock_jumps += self.timer.clock_jumps
+        self.stop_thread = threading.Event()
+        self.timer = DeadlineTimer(self.stop_thread, max_sleep=self.timer.max_sleep, clock=self.clock)
+
+    def get_next_shutdown_datetime(self):
+        """Rebuild the schedule from the current time settings and return its first fire time"""
+        self.schedule = self.build_schedule()
+        head = self.schedule.peek()
+        if head is None:
+            raise ValueError("Nothing is scheduled")
+        shutdown_time, entry = head
+        self.next_action = entry.action
+        return shutdown_time
+
+    def recover_missed(self):
+        """Deal with fires that fell due while no scheduler was running, using the missed-fire policy.
+
+        Only the latest missed power action can run; older misses and missed warnings are logged as skipped.
+        """
+        state = self.journal.state if self.journal is not None else None
+        if state is None or (state.last_handled is None and state.armed is None):
+            return
+        # From just before the last handled fire, so another action due at the same time is not passed over
+        since = (state.last_handled if state.last_handled is not None else state.armed[1]) - 1
+        now = self.now()
+        engine = self.build_schedule(now=self.from_timestamp(since))
+        missed = []
+        for first, entry in engine.pop_due(now):
+            fire = self.latest_fire(entry, first, now)
+            if not state.is_handled(entry.action, fire.timestamp()):
+                missed.append((fire, entry))
+        if not missed:
+            return
+
+        policy, grace = self.missed_policy
+        power = [(fire, entry) for fire, entry in missed if entry.action != 'warn']
+        run = max(power, key=lambda item: item[0]) if power else None
+        if run is not None and not fire_missed(policy, grace, self.clock.time() - run[0].timestamp()):
+            run = None
+        for fire, entry in sorted(missed, key=lambda item: item[0]):
+            if run is not None and entry is run[1]:
+                continue
+            self.record_transition('skipped', entry.action, fire)
+            self.log_scheduler_action(f"{ACTION_LABELS[entry.action].title()} Missed", fire)
+            print(f"⚠️ {ACTION_LABELS[entry.action].title()} due {fire.strftime('%Y-%m-%d %I:%M %p')} "
+                  "was missed while Power E was not running")
+        if run is not None:
+            fire, entry = run
+            late = (self.clock.time() - fire.timestamp()) / 60
+            # Runs through the deferred path, so the load gate and the journal see it like any other fire
+            self.deferred = (entry.action, fire, now, f"missed by {late:.0f} min while Power E was not running")
+            self.shutdown_time, self.next_action = now, entry.action
+            print(f"⚠️ {ACTION_LABELS[entry.action].title()} due {fire.strftime('%Y-%m-%d %I:%M %p')} "
+                  f"was missed; running it now ({policy} policy)")
+
+    def latest_fire(self, entry, fire, now, limit=10000):
+        """The last fire of entry at or before now, starting from one known to be due"""
+        for _ in range(limit):
+            following = entry.next_fire(fire, self.blackout_dates)
+            if following is None or following > now:
+                break
+            fire = following
+        return fire
+
+    def from_timestamp(self, seconds):
+        """A Unix time in the form the schedule uses"""
+        if self.timezone:
+            return datetime.fromtimestamp(seconds, timezone.utc)
+        return datetime.fromtimestamp(seconds)
+
+    def build_schedule(self, now=None):
+        """Daily shutdown at the configured time plus any extra entries from the config, queued from now"""
+        hour, minute, ampm = self.time_fields()
+        entries = [ScheduleEntry('shutdown', to_24_hour(hour, ampm), int(minute))] + self.extra_schedules
+        if self.timezone:
+            entries = zoned_entries(entries, self.timezone, self.config.nonexistent, self.config.ambiguous)
+        return ScheduleEngine(entries, self.blackout_dates, now=now or self.now())
+
+    def now(self):
+        """Current time in the form the schedule uses: aware with a timezone, naive local without"""
+        return self.clock.utcnow() if self.timezone else self.clock.now()
+
+    def run_due_actions(self):
+        """Pop every due schedule entry; warnings are shown, the first power action is executed.
+
+        A deferred action comes before anything due now. Only one power action runs per pass, since the
+        machine goes down with it; the others are logged and journalled as skipped.
+        """
+        power = []
+        if self.deferred is not None:
+            action, fire_time, _, _ = self.deferred
+            self.deferred = None
+            power.append((action, fire_time))
+        with self.schedule_lock:
+            due = self.schedule.pop_due(self.now())
+        for fire_time, entry in due:
+            if entry.action == 'warn':
+                self.record_transition('fired', 'warn', fire_time)
+                self.show_warning(entry.message or "Scheduled shutdown is coming up. Save your work.")
+            else:
+                power.append((entry.action, fire_time))
+
+        if not power:
+            return
+        (power_action, power_time), superseded = power[0], power[1:]
+        for action, fire_time in superseded:
+            self.record_transition('skipped', action, fire_time)
+            self.log_scheduler_action(f"Skipped {ACTION_LABELS[action].title()}: the "
+                                      f"{ACTION_LABELS[power_action]} due at {power_time:%I:%M %p} runs instead",
+                                      fire_time)
+        if self.load_gate is not None and self.defer_action(power_action, power_time):
+            return
+        # Written ahead, so a restart while the command runs cannot fire it twice
+        self.record_transition('fired', power_action, power_time, sync=True)
+        self.announce_fire(power_action)
+        self.perform_shutdown(power_action, power_time)
+
+    def defer_action(self, action, fire_time):
+        """Ask the load gate about a due power action and log its decision. Returns True if it was put off."""
+        delay, reason = self.load_gate.decide(fire_time, self.clock.monotonic())
+        label = ACTION_LABELS[action].title()
+        if not delay:
+            self.log_scheduler_action(f"{label} Load Check: running now, {reason}", fire_time)
+            return False
+        self.deferred = (action, fire_time, self.now() + timedelta(seconds=delay), reason)
+        self.log_scheduler_action(f"{label} Deferred {delay / 60:g} min: {reason}", fire_time)
+        return True
+
+    def perform_shutdown(self, action='shutdown', fire_time=None):
+        """Hand the shutdown (or reboot) command to the executor without blocking the timer"""
+        future = self.executor.submit(action)
+        future.add_done_callback(lambda done: self.on_shutdown_done(done, action, fire_time))
+        return future
+
+    def on_shutdown_done(self, future, action='shutdown', fire_time=None):
+        """Report the executor result and show cancellation confirmation"""
+        error = future.exception()
+        outcome = "Executed" if error is None else "Failed"
+        self.log_scheduler_action(f"Daily {action.title()} {outcome}", fire_time)
+        if error is None:
+            self.pending_action = action
+            self.publish_status()
+            self.announce_executed()
+        else:
+            self.announce_error(f"❌ Shutdown failed: {str(error)}")
+
+    def show_shutdown_confirmation(self):
+        """Offer to cancel on the desktop, from its own thread so an unanswered prompt holds nothing up"""
+        threading.Thread(target=self.ask_cancel, name='power-e-confirm', daemon=True).start()
+
+    def ask_cancel(self):
+        # The prompt closes itself once the command's countdown is over and cancelling no longer helps
+        delay = self.executor.plan.delay
+        label = ACTION_LABELS[self.pending_action or 'shutdown'].title()
+        try:
+            if self.show_popup("Shutdown Confirmation", f"🛑 {label} in {delay} seconds.\nDo you want to cancel?",
+                               delay, ask="Cancel"):
+                self.executor.cancel().add_done_callback(self.on_cancel_done)
+        except Exception as e:
+            print(f"Could not show popup: {e}")
+
+    def show_popup(self, title, message, timeout, ask=None):
+        """Self-closing desktop window; the GUI shows it in its own window instead"""
+        return popup(title, message, timeout, ask)
+
+    def on_cancel_done(self, future):
+        error = future.exception()
+        if error is None:
+            self.record_cancelled(self.pending_action)
+            self.pending_action = None
+            self.publish_status()
+            print("❌ Shutdown cancelled by user")
+        else:
+            print(f"❌ Cancel failed: {error}")
+
+    # Control channel commands. These run on control client threads.
+
+    def status(self):
+        """Current state for control clients; reads attributes only, so polling never blocks the timer"""
+        status = {
+            'running': self.is_scheduler_running,
+            'state': self.state,
+            'daily_time': f"{self.saved_hour}:{self.saved_minute} {self.saved_ampm}",
+            'timezone': self.timezone,
+            'pending': self.pending_action,
+            'deferred_until': self.deferred[2].isoformat() if self.deferred else None,
+            'reloads': self.reload_count,
+            'wakeups': self.timer.wakeups,
+            'pid': os.getpid(),
+        }
+        status.update(self.next_fire_fields())
+        return status
+
+    def next_fire_fields(self):
+        shutdown_time, action = self.shutdown_time, self.next_action
+        if not self.is_scheduler_running or shutdown_time is None:
+            return {'next_action': None, 'next_fire': None, 'remaining': None}
+        remaining = shutdown_time.timestamp() - self.clock.time()
+        return {'next_action': action, 'next_fire': shutdown_time.isoformat(),
+                'remaining': round(max(remaining, 0), 1)}
+
+    def cancel_pending(self):
+        """Abort a shutdown or reboot whose OS countdown has started"""
+        cancelled = self.pending_action
+        if cancelled is None:
+            return {'cancelled': None}
+        self.executor.cancel().result()
+        self.record_cancelled(cancelled)
+        self.pending_action = None
+        self.log_scheduler_action("Shutdown Cancelled")
+        return {'cancelled': cancelled}
+
+    def skip_next(self):
+        """Drop the next firing only; the entry fires again at its following time"""
+        if not self.is_scheduler_running:
+            raise ValueError("Scheduler is not running")
+        with self.schedule_lock:
+            skipped = self.schedule.skip_next()
+            head = self.schedule.peek()
+            if skipped is None or head is None:
+                raise ValueError("Nothing is scheduled")
+            self.shutdown_time, entry = head
+            self.next_action = entry.action
+        self.timer.wake()
+        skipped_time, skipped_entry = skipped
+        self.record_transition('skipped', skipped_entry.action, skipped_time)
+        self.record_armed()
+        self.publish_status()
+        self.log_scheduler_action(f"Skipped {ACTION_LABELS[skipped_entry.action].title()}", skipped_time)
+        fields = self.next_fire_fields()
+        fields['skipped'] = skipped_time.isoformat()
+        return fields
+
+    def reschedule(self, time_text):
+        """Move the daily shutdown to a new time ('06:30 PM' or '18:30'), saving it to the config"""
+        hour, minute = parse_time(time_text)
+        config = dict(self.raw_config)
+        config.update(build_config(f"{hour % 12 or 12:02}", f"{minute:02}", 'PM' if hour >= 12 else 'AM',
+                                   self.extra_schedules, self.blackout_dates))
+        write_config_atomic(self.config_file, config)
+        # The watcher would notice too; reloading here makes the reply show the new time
+        self.reload_config()
+        return self.next_fire_fields()
+
+    def log_scheduler_action(self, action, scheduled=None):
+        scheduled = scheduled or self.shutdown_time
+        scheduled_time = scheduled.strftime("%I:%M %p") if scheduled else "N/A"
+        self.action_log.log(action, scheduled_time, when=self.clock.now(), scheduled=scheduled)
+        self.last_action, self.last_action_at = action, self.clock.time()
+        self.publish_status()
+
+    def schedule_next_day(self):
+        """Pause after a fire, then move to the next entry. Returns False if stopped meanwhile."""
+        # The pause is a timer wait, so a stop request ends it at once
+        return self.timer.wait(2) and self.advance_schedule()
+
+    def advance_schedule(self):
+        """Point the countdown at the schedule's next entry. Returns False if nothing is left."""
+        if self.deferred is not None:
+            # A deferred action comes first; the schedule already moved past it
+            self.next_action, _, self.shutdown_time, reason = self.deferred
+            self.announce_deferred(reason)
+            return True
+        with self.schedule_lock:
+            head = self.schedule.peek()
+        if head is None:
+            return False
+        self.shutdown_time, entry = head
+        self.next_action = entry.action
+        self.announce_rescheduled()
+        return True
+
+    # Progress hooks. The headless daemon prints; the GUI overrides these to update its labels.
+
+    def announce_fire(self, action):
+        print("Executing shutdown..." if action == 'shutdown' else "Executing reboot...")
+
+    def announce_executed(self):
+        print("Shutdown command executed!")
+        if self.control_server:
+            print("Cancel with: PowerE.py ctl cancel-pending")
+        # "control": {"popup": false} leaves cancelling to control clients instead of a Tk prompt
+        options = self.raw_config.get('control')
+        if not isinstance(options, dict) or options.get('popup', True):
+            self.show_shutdown_confirmation()
+
+    def announce_error(self, message):
+        print(message)
+
+    def announce_rescheduled(self):
+        print(f"Rescheduled for tomorrow at {self.shutdown_time.strftime('%I:%M %p')}")
+
+    def announce_deferred(self, reason):
+        print(f"⏳ {ACTION_LABELS[self.next_action].title()} put off until "
+              f"{self.shutdown_time.strftime('%I:%M %p')}: {reason}")
+
+    def show_warning(self, message):
+        print(f"⚠️ {message}")
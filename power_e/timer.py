@@ -0,0 +1,102 @@
+import threading
+
+from power_e.clock import SystemClock
+
+
+class DeadlineTimer:
+    """Sleep until a wall-clock deadline instead of polling every second.
+
+    The timer blocks on an event with a timeout computed from the time left,
+    so an idle day costs a handful of wakeups. Every wakeup compares how far
+    the wall clock moved against the monotonic clock; a mismatch means the
+    clock was changed or the machine was suspended, and the remaining time
+    is recomputed from the wall clock.
+
+    All time is read and waited on through clock, so a VirtualClock can run
+    the same logic in simulated time.
+    """
+
+    # Longest single sleep, so a suspend/resume or clock change is picked up in bounded time
+    MAX_SLEEP = 3600.0
+    # Wall and monotonic elapsed time may differ this much before it counts as a jump
+    JUMP_TOLERANCE = 2.0
+
+    def __init__(self, stop_event=None, max_sleep=None, clock=None):
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.clock = clock or SystemClock()
+        self.max_sleep = max_sleep or self.MAX_SLEEP
+        self._wake = threading.Event()
+
+        # Counters for checking the idle cost of a schedule
+        self.wakeups = 0
+        self.clock_jumps = 0
+        self.last_jump = 0.0
+        # Seconds between the deadline and the moment wait_until() returned, on the monotonic clock
+        self.last_fire_lag = None
+
+    def cancel(self):
+        """Stop the timer and release any pending wait right away"""
+        self.stop_event.set()
+        self._wake.set()
+
+    def wake(self):
+        """Interrupt the current sleep so the deadline is re-evaluated"""
+        self._wake.set()
+
+    def is_cancelled(self):
+        return self.stop_event.is_set()
+
+    def wait(self, timeout):
+        """Sleep for up to timeout seconds. Returns False if the timer was cancelled."""
+        clock = self.clock
+        wall_start = clock.time()
+        mono_start = clock.monotonic()
+
+        clock.wait(self._wake, timeout)
+        self._wake.clear()
+        self.wakeups += 1
+
+        # Wall clock moved differently than monotonic time: clock set or suspend/resume
+        drift = (clock.time() - wall_start) - (clock.monotonic() - mono_start)
+        if abs(drift) > self.JUMP_TOLERANCE:
+            self.clock_jumps += 1
+            self.last_jump = drift
+
+        return not self.stop_event.is_set()
+
+    def wait_until(self, deadline, on_tick=None):
+        """Block until deadline (a naive local or timezone-aware datetime) is reached.
+
+        deadline may also be a callable returning the current deadline; it is
+        re-read on every wakeup, so wake() after changing it re-arms the wait.
+
+        on_tick(remaining) is called on every wakeup before the deadline and
+        may return the number of seconds until it wants to run again; return
+        None to sleep straight through to the deadline.
+
+        Returns True when the deadline is due, False when cancelled.
+        """
+        mono_target = None
+        while not self.stop_event.is_set():
+            target = deadline() if callable(deadline) else deadline
+            # Compared as timestamps, so an aware deadline and a naive one both work
+            remaining = target.timestamp() - self.clock.time()
+            if remaining <= 0:
+                # Measured against where the last sleep expected the deadline, so a clock
+                # change while sleeping does not count as lateness
+                if mono_target is None:
+                    self.last_fire_lag = -remaining
+                else:
+                    self.last_fire_lag = max(self.clock.monotonic() - mono_target, 0.0)
+                return True
+            mono_target = self.clock.monotonic() + remaining
+
+            timeout = min(remaining, self.max_sleep)
+            if on_tick:
+                next_tick = on_tick(remaining)
+                if next_tick is not None and next_tick > 0:
+                    timeout = min(timeout, next_tick)
+
+            if not self.wait(timeout):
+                return False
+        return False
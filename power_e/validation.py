@@ -0,0 +1,355 @@
+"""Validation and normalization of schedule times, one value or whole columns.
+
+The scalar parsers (parse_hour, parse_minute, parse_ampm) are the single
+definition of a valid time: the GUI fields, parse_config() and the bulk
+path all go through them. validate_columns() checks whole hour, minute,
+AM/PM and timezone columns in one pass. With NumPy installed, each column
+is turned into a matrix of code points and checked with array operations;
+without it, the scalar parsers run row by row. Both give the same
+results, and rows that fail are re-run through the scalar parsers so the
+error messages are identical too.
+
+provision() builds on this to turn a CSV or JSON inventory of machines
+into normalized per-host configs in the fleet inventory format.
+"""
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+from power_e.zones import get_zone
+
+DIGITS_RE = re.compile(r'^[0-9]{1,2}$')
+AMPM_VALUES = {'A': 'AM', 'AM': 'AM', 'P': 'PM', 'PM': 'PM'}
+# Characters allowed around a value
+BLANKS = ' \t'
+TWO_DIGITS = tuple(f"{number:02}" for number in range(60))
+
+# Inventory keys that need a full parse_config() beyond the time columns
+SCHEDULE_KEYS = frozenset(('schedules', 'blackout_dates', 'holidays', 'dst_policy'))
+# Rejected rows printed by `PowerE.py provision`; the rest go to --errors
+SHOWN_ERRORS = 20
+
+
+def parse_hour(value):
+    """1-12 from one or two digits, surrounding blanks allowed"""
+    text = str(value).strip(BLANKS)
+    if not (DIGITS_RE.match(text) and 1 <= int(text) <= 12):
+        raise ValueError(f"Invalid hour: {text!r}")
+    return int(text)
+
+
+def parse_minute(value):
+    text = str(value).strip(BLANKS)
+    if not (DIGITS_RE.match(text) and int(text) <= 59):
+        raise ValueError(f"Invalid minute: {text!r}")
+    return int(text)
+
+
+def parse_ampm(value):
+    """'AM' or 'PM' from am/pm/a/p in any case"""
+    text = str(value).strip(BLANKS).upper()
+    if text not in AMPM_VALUES:
+        raise ValueError(f"Invalid AM/PM value: {text!r}")
+    return AMPM_VALUES[text]
+
+
+def parse_zone(value):
+    """IANA zone name, or None for an empty value (system local time)"""
+    text = '' if value is None else str(value).strip(BLANKS)
+    if not text:
+        return None
+    get_zone(text)
+    return text
+
+
+def normalize_time(hour, minute, ampm):
+    """('HH', 'MM', 'AM'/'PM') strings as the config file stores them; raises ValueError"""
+    return f"{parse_hour(hour):02}", f"{parse_minute(minute):02}", parse_ampm(ampm)
+
+
+def clamp_hour_text(text):
+    """What a hand-edited hour field should show: the normalized hour, 12 for 0 or 3+ digits, else unchanged"""
+    try:
+        return f"{parse_hour(text):02}"
+    except ValueError:
+        if text.isdigit() and (int(text) == 0 or int(text) > 99):
+            return "12"
+        return text
+
+
+def clamp_minute_text(text):
+    try:
+        return f"{parse_minute(text):02}"
+    except ValueError:
+        if text.isdigit() and int(text) > 99:
+            return "59"
+        return text
+
+
+def clamp_ampm_text(text):
+    try:
+        return parse_ampm(text)
+    except ValueError:
+        return text
+
+
+class TimeColumns:
+    """Normalized columns of a validated batch; rejected rows hold placeholders and are listed in errors"""
+
+    def __init__(self, hours, minutes, pm, zones, errors, engine):
+        # Lists: hour 1-12, minute 0-59, PM flag, zone name or None
+        self.hours = hours
+        self.minutes = minutes
+        self.pm = pm
+        self.zones = zones
+        # {row index: [message, ...]}
+        self.errors = errors
+        # 'numpy' or 'python'
+        self.engine = engine
+
+    def __len__(self):
+        return len(self.hours)
+
+    def time_fields(self, row):
+        return TWO_DIGITS[self.hours[row]], TWO_DIGITS[self.minutes[row]], 'PM' if self.pm[row] else 'AM'
+
+
+def numpy_module():
+    """numpy if it is installed; imported on first use so the daemon never loads it"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def zone_error(zone, checked):
+    """Why a zone value is invalid, or None; checked caches the answer per distinct value"""
+    key = '' if zone is None else str(zone).strip(BLANKS)
+    if key not in checked:
+        try:
+            parse_zone(key)
+            checked[key] = None
+        except ValueError as e:
+            checked[key] = str(e)
+    return checked[key]
+
+
+def row_errors(hour, minute, ampm, zone, checked_zones):
+    """Error messages for one row, from the scalar parsers"""
+    errors = []
+    for parse, value in ((parse_hour, hour), (parse_minute, minute), (parse_ampm, ampm)):
+        try:
+            parse(value)
+        except ValueError as e:
+            errors.append(str(e))
+    message = zone_error(zone, checked_zones)
+    if message:
+        errors.append(message)
+    return errors
+
+
+def validate_rows(hours, minutes, ampms, zones):
+    """Pure-Python batch: the scalar parsers on every row, zones looked up once per distinct value"""
+    count = len(hours)
+    out_hours, out_minutes, out_pm, out_zones = [0] * count, [0] * count, [False] * count, [None] * count
+    checked_zones = {}
+    errors = {}
+    for row in range(count):
+        try:
+            out_hours[row] = parse_hour(hours[row])
+            out_minutes[row] = parse_minute(minutes[row])
+            out_pm[row] = parse_ampm(ampms[row]) == 'PM'
+        except ValueError:
+            errors[row] = row_errors(hours[row], minutes[row], ampms[row], zones[row], checked_zones)
+            continue
+        zone = zones[row]
+        if zone_error(zone, checked_zones):
+            errors[row] = row_errors(hours[row], minutes[row], ampms[row], zone, checked_zones)
+        else:
+            out_zones[row] = parse_zone(zone) if zone else None
+    return TimeColumns(out_hours, out_minutes, out_pm, out_zones, errors, 'python')
+
+
+def code_points(np, column):
+    """(rows, width) uint32 matrix of a column's characters, zero padded"""
+    strings = np.asarray(column, dtype=str)
+    width = strings.dtype.itemsize // 4
+    if width == 0:
+        return np.zeros((len(strings), 1), dtype=np.uint32)
+    return strings.view(np.uint32).reshape(len(strings), width)
+
+
+def first_two(np, codes, keep):
+    """(count, first, second) of the characters matching keep in each row, and whether they are adjacent"""
+    rows = np.arange(len(codes))
+    count = keep.sum(axis=1)
+    start = keep.argmax(axis=1)
+    following = np.minimum(start + 1, codes.shape[1] - 1)
+    first = codes[rows, start].astype(np.int64)
+    second = codes[rows, following].astype(np.int64)
+    adjacent = (count < 2) | keep[rows, following]
+    return count, first, second, adjacent
+
+
+def digit_column(np, column, low, high):
+    """(values, valid) for a column of one or two digit numbers within low..high"""
+    codes = code_points(np, column)
+    digits = (codes >= 48) & (codes <= 57)
+    blank = (codes == 32) | (codes == 9) | (codes == 0)
+    count, first, second, adjacent = first_two(np, codes, digits)
+    values = np.where(count == 2, (first - 48) * 10 + second - 48, first - 48)
+    valid = (digits | blank).all(axis=1) & (count >= 1) & (count <= 2) & adjacent & (values >= low) & (values <= high)
+    return values, valid
+
+
+def ampm_column(np, column):
+    """(pm flags, valid) for a column of am/pm/a/p values"""
+    codes = code_points(np, column)
+    blank = (codes == 32) | (codes == 9) | (codes == 0)
+    # ASCII upper case; other characters are never valid here
+    upper = np.where((codes >= 97) & (codes <= 122), codes - 32, codes)
+    count, first, second, adjacent = first_two(np, upper, ~blank)
+    valid = ((count == 1) | ((count == 2) & (second == 77) & adjacent)) & ((first == 65) | (first == 80))
+    return first == 80, valid
+
+
+def validate_arrays(np, hours, minutes, ampms, zones):
+    """NumPy batch: each column checked with array operations, zones once per distinct name"""
+    hour_values, hour_ok = digit_column(np, hours, 1, 12)
+    minute_values, minute_ok = digit_column(np, minutes, 0, 59)
+    pm, ampm_ok = ampm_column(np, ampms)
+    ok = hour_ok & minute_ok & ampm_ok
+
+    # Zones repeat a lot: look up and strip each distinct value once
+    raw_zones = ['' if zone is None else zone for zone in zones] if None in zones else zones
+    distinct, inverse = np.unique(np.asarray(raw_zones, dtype=str), return_inverse=True)
+    checked_zones = {}
+    zone_ok = np.array([zone_error(name, checked_zones) is None for name in distinct.tolist()], dtype=bool)
+    inverse = inverse.reshape(-1)
+    ok &= zone_ok[inverse]
+    zone_names = np.array([name.strip(BLANKS) or None for name in distinct.tolist()], dtype=object)[inverse].tolist()
+
+    errors = {row: row_errors(hours[row], minutes[row], ampms[row], zones[row], checked_zones)
+              for row in np.flatnonzero(~ok).tolist()}
+    return TimeColumns(hour_values.tolist(), minute_values.tolist(), pm.tolist(), zone_names, errors, 'numpy')
+
+
+def validate_columns(hours, minutes, ampms, zones=None, use_numpy=None):
+    """Validate and normalize equal-length columns of raw values.
+
+    use_numpy None picks NumPy when it is installed; False forces the pure-Python path.
+    """
+    if zones is None:
+        zones = [None] * len(hours)
+    if not len(hours) == len(minutes) == len(ampms) == len(zones):
+        raise ValueError("Columns must have the same length")
+    np = numpy_module() if use_numpy is not False else None
+    if use_numpy and np is None:
+        raise ValueError("NumPy is not installed")
+    if np is None or not len(hours):
+        return validate_rows(hours, minutes, ampms, zones)
+    return validate_arrays(np, hours, minutes, ampms, zones)
+
+
+# Inventories
+
+def read_inventory(path):
+    """[(host, config dict)] from a CSV (host, hour, minute, ampm, timezone columns) or fleet JSON inventory"""
+    if path.lower().endswith('.csv'):
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            columns = [name.strip().lower() for name in reader.fieldnames or ()]
+            if 'host' not in columns:
+                raise ValueError(f"{path} needs a 'host' column")
+            reader.fieldnames = columns
+            rows = []
+            for record in reader:
+                config = {key: record.get(key) or '' for key in ('hour', 'minute', 'ampm')}
+                if record.get('timezone'):
+                    config['timezone'] = record['timezone']
+                rows.append(((record.get('host') or '').strip(), config))
+            return rows
+
+    with open(path, 'r') as f:
+        inventory = json.load(f)
+    hosts = inventory.get('hosts', inventory) if isinstance(inventory, dict) else None
+    if not isinstance(hosts, dict):
+        raise ValueError(f"{path} must map host names to configs")
+    return [(host, config if isinstance(config, dict) else {}) for host, config in hosts.items()]
+
+
+def provision(rows, use_numpy=None):
+    """Validate inventory rows. Returns ({host: normalized config}, [(row index, host, message)], engine)."""
+    from power_e.config import ConfigError, parse_config
+
+    columns = validate_columns([config.get('hour', '') for _, config in rows],
+                               [config.get('minute', '') for _, config in rows],
+                               [config.get('ampm', '') for _, config in rows],
+                               [config.get('timezone') for _, config in rows], use_numpy)
+    configs = {}
+    first_row = {}
+    errors = []
+    for row, (host, config) in enumerate(rows):
+        if not host:
+            errors.append((row, host, "Missing host name"))
+            continue
+        if host in first_row:
+            errors.append((row, host, f"Duplicate host (also row {first_row[host] + 1})"))
+            continue
+        first_row[host] = row
+        if row in columns.errors:
+            errors.extend((row, host, message) for message in columns.errors[row])
+            continue
+
+        normalized = dict(config)
+        normalized['hour'], normalized['minute'], normalized['ampm'] = columns.time_fields(row)
+        if columns.zones[row]:
+            normalized['timezone'] = columns.zones[row]
+        else:
+            normalized.pop('timezone', None)
+        if not SCHEDULE_KEYS.isdisjoint(normalized):
+            # Extra entries are only reported when a running scheduler loads them; here they reject the row
+            try:
+                problems = parse_config(normalized).errors
+            except ConfigError as e:
+                problems = [str(e)]
+            if problems:
+                errors.extend((row, host, message) for message in problems)
+                continue
+        configs[host] = normalized
+    return configs, errors, columns.engine
+
+
+def run_provision(args):
+    """Entry point for `PowerE.py provision`"""
+    from power_e.config import write_config_atomic
+
+    started = time.perf_counter()
+    try:
+        rows = read_inventory(args.inventory)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    configs, errors, engine = provision(rows, use_numpy=False if args.no_numpy else None)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    write_config_atomic(args.output, {'hosts': configs})
+    if args.errors:
+        with open(args.errors, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Row', 'Host', 'Error'])
+            writer.writerows((row + 1, host, message) for row, host, message in errors)
+
+    for row, host, message in errors[:SHOWN_ERRORS]:
+        print(f"row {row + 1} ({host or 'no host'}): {message}")
+    if len(errors) > SHOWN_ERRORS:
+        print(f"... and {len(errors) - SHOWN_ERRORS} more" + (f" in {args.errors}" if args.errors else ""))
+    rejected = len({row for row, _, _ in errors})
+    print(f"{len(rows)} rows checked in {elapsed_ms:.0f} ms ({engine}): {len(configs)} hosts written to "
+          f"{os.path.abspath(args.output)}, {rejected} rejected")
+    if errors:
+        sys.exit(1)
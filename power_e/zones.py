@@ -0,0 +1,242 @@
+"""Timezone-aware schedules.
+
+Schedule entries work in naive wall-clock time. ZonedEntry runs one in a
+given IANA zone and turns its wall times into exact instants, so a
+schedule fires at the same local time on both sides of a DST change, and
+hosts in different zones can share one engine.
+
+Wall/UTC conversions use a TransitionTable: the zone's UTC offsets for
+one calendar year, found once with zoneinfo and cached, then read with a
+bisect. Evaluating thousands of host/zone pairs costs table lookups, not
+tz conversions.
+
+Local times that do not exist (the hour skipped when clocks go forward)
+or exist twice (the hour repeated when they go back) follow an explicit
+policy:
+
+- nonexistent: 'shift' fires as many minutes after the jump as the time
+  was after its start (02:30 -> 03:30, the default), 'transition' fires
+  at the jump itself (03:00), 'skip' does not fire that day
+- ambiguous: 'earlier' fires at the first occurrence (the default),
+  'later' at the second. Either way the entry fires once.
+"""
+import bisect
+import calendar
+import os
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+NONEXISTENT_POLICIES = ('shift', 'transition', 'skip')
+AMBIGUOUS_POLICIES = ('earlier', 'later')
+
+DAY = 86400
+# Offsets are sampled this often while building a table; changes closer together than this could be missed
+SAMPLE_STEP = DAY // 4
+# Tables reach this far into the neighbouring years, so wall times near New Year resolve in either table
+YEAR_MARGIN = 2 * DAY
+
+# Candidate wall times tried before giving up, e.g. an entry whose time is skipped every day
+MAX_CANDIDATES = 8
+
+EPOCH = datetime(1970, 1, 1)
+SECOND = timedelta(seconds=1)
+
+
+class TimezoneError(ValueError):
+    """Unknown timezone, or timezone support is not available"""
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """tzinfo for an IANA name, or the system zone for 'local'"""
+    try:
+        import zoneinfo
+    except ImportError:
+        zoneinfo = None
+
+    if name == 'local':
+        if zoneinfo is not None:
+            tz_name = os.environ.get('TZ', '').lstrip(':')
+            try:
+                if tz_name:
+                    return zoneinfo.ZoneInfo(tz_name)
+                if os.path.exists('/etc/localtime'):
+                    with open('/etc/localtime', 'rb') as f:
+                        return zoneinfo.ZoneInfo.from_file(f, key='localtime')
+            except (zoneinfo.ZoneInfoNotFoundError, ValueError, OSError):
+                pass
+        # No tz database for the system zone (e.g. Windows without tzdata): a fixed offset, no DST
+        return datetime.now().astimezone().tzinfo
+
+    if zoneinfo is None:
+        raise TimezoneError("Timezone names need Python 3.9 or later (zoneinfo)")
+    try:
+        return zoneinfo.ZoneInfo(name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError) as e:
+        raise TimezoneError(f"Unknown timezone: {name!r} ({e})")
+
+
+@lru_cache(maxsize=None)
+def fixed_offset(seconds):
+    """Shared fixed-offset tzinfo, attached to the instants ZonedEntry returns"""
+    return timezone(timedelta(seconds=seconds))
+
+
+class TransitionTable:
+    """A zone's UTC offsets over one calendar year as sorted arrays.
+
+    starts[i] is the UTC second from which offsets[i] applies; walls[i] is
+    the wall-clock second just before the change at starts[i + 1].
+    """
+
+    def __init__(self, zone, year):
+        self.year = year
+        self.first = start = calendar.timegm((year, 1, 1, 0, 0, 0)) - YEAR_MARGIN
+        self.last = end = calendar.timegm((year + 1, 1, 1, 0, 0, 0)) + YEAR_MARGIN
+
+        def offset(utc_seconds):
+            return int(datetime.fromtimestamp(utc_seconds, zone).utcoffset().total_seconds())
+
+        self.starts = [start]
+        self.offsets = [offset(start)]
+        t = start
+        while t < end:
+            following = min(t + SAMPLE_STEP, end)
+            new_offset = offset(following)
+            if new_offset != self.offsets[-1]:
+                # Binary search for the exact second the offset changed
+                low, high = t, following
+                while high - low > 1:
+                    middle = (low + high) // 2
+                    if offset(middle) == self.offsets[-1]:
+                        low = middle
+                    else:
+                        high = middle
+                self.starts.append(high)
+                self.offsets.append(new_offset)
+            t = following
+        self.walls = [self.starts[i + 1] + self.offsets[i] for i in range(len(self.starts) - 1)]
+
+    def covers(self, seconds):
+        return self.first <= seconds < self.last
+
+    def offset_at(self, utc_seconds):
+        return self.offsets[max(bisect.bisect_right(self.starts, utc_seconds) - 1, 0)]
+
+    def resolve(self, wall_seconds, nonexistent='shift', ambiguous='earlier'):
+        """UTC second and offset for a wall time (seconds since the epoch as if it were UTC).
+
+        Returns None when the time does not exist and the policy is 'skip'.
+        """
+        starts, offsets = self.starts, self.offsets
+        # Segment k is the one whose wall-clock range starts at or before this time
+        k = bisect.bisect_right(self.walls, wall_seconds)
+        offset = offsets[k]
+
+        if k > 0 and wall_seconds < starts[k] + offset:
+            # Clocks went forward at starts[k] and skipped this time
+            if nonexistent == 'skip':
+                return None
+            if nonexistent == 'transition':
+                return starts[k], offset
+            return wall_seconds - offsets[k - 1], offset
+
+        if k + 1 < len(starts) and wall_seconds >= starts[k + 1] + offsets[k + 1]:
+            # Clocks go back at starts[k + 1] and this time comes round again
+            if ambiguous == 'later':
+                return wall_seconds - offsets[k + 1], offsets[k + 1]
+        return wall_seconds - offset, offset
+
+
+@lru_cache(maxsize=4096)
+def transition_table(zone_name, year):
+    """Cached table for a zone and year; built on first use"""
+    return TransitionTable(get_zone(zone_name), year)
+
+
+def utc_year(seconds):
+    return (EPOCH + timedelta(seconds=seconds)).year
+
+
+class ZonedEntry:
+    """A schedule entry evaluated in a timezone; next_fire() returns timezone-aware instants"""
+
+    def __init__(self, entry, zone_name, nonexistent='shift', ambiguous='earlier'):
+        if nonexistent not in NONEXISTENT_POLICIES:
+            raise ValueError(f"Unknown nonexistent-time policy: {nonexistent!r}")
+        if ambiguous not in AMBIGUOUS_POLICIES:
+            raise ValueError(f"Unknown ambiguous-time policy: {ambiguous!r}")
+        get_zone(zone_name)
+        self.entry = entry
+        self.zone_name = zone_name
+        self.nonexistent = nonexistent
+        self.ambiguous = ambiguous
+        # Most queries fall in the same year as the previous one
+        self._table = None
+
+    @property
+    def action(self):
+        return self.entry.action
+
+    @property
+    def message(self):
+        return getattr(self.entry, 'message', None)
+
+    def __repr__(self):
+        return f"ZonedEntry({self.entry!r}, {self.zone_name!r})"
+
+    def to_dict(self):
+        return self.entry.to_dict()
+
+    def table(self, seconds):
+        """Transition table covering a UTC or wall-clock second"""
+        table = self._table
+        if table is None or not table.covers(seconds):
+            table = self._table = transition_table(self.zone_name, utc_year(seconds))
+        return table
+
+    def wall_time(self, utc_seconds):
+        """Naive wall-clock datetime in this zone for a UTC second"""
+        return EPOCH + timedelta(seconds=utc_seconds + self.table(utc_seconds).offset_at(utc_seconds))
+
+    def localize(self, wall):
+        """(UTC second, offset) for a naive wall time under this entry's policies, or None to skip"""
+        wall_seconds = (wall - EPOCH) // SECOND
+        return self.table(wall_seconds).resolve(wall_seconds, self.nonexistent, self.ambiguous)
+
+    def next_fire(self, after, blackout_dates=()):
+        """First instant strictly after `after` (an aware datetime) when the entry fires in this zone"""
+        after_utc = after.timestamp()
+        wall = self.wall_time(after_utc)
+        for _ in range(MAX_CANDIDATES):
+            wall = self.entry.next_fire(wall, blackout_dates)
+            if wall is None:
+                return None
+            resolved = self.localize(wall)
+            # A time in the repeated hour can resolve to before `after`; the next candidate is tried
+            if resolved is not None and resolved[0] > after_utc:
+                utc, offset = resolved
+                return datetime.fromtimestamp(utc, fixed_offset(offset))
+        return None
+
+
+def zone_settings(config):
+    """(zone name or None, nonexistent policy, ambiguous policy) from a config dict, validated"""
+    zone_name = config.get('timezone') if isinstance(config, dict) else None
+    policy = config.get('dst_policy', {}) if isinstance(config, dict) else {}
+    if not isinstance(policy, dict):
+        raise ValueError("dst_policy must be an object")
+    nonexistent = policy.get('nonexistent', 'shift')
+    ambiguous = policy.get('ambiguous', 'earlier')
+    if nonexistent not in NONEXISTENT_POLICIES:
+        raise ValueError(f"dst_policy.nonexistent must be one of {', '.join(NONEXISTENT_POLICIES)}")
+    if ambiguous not in AMBIGUOUS_POLICIES:
+        raise ValueError(f"dst_policy.ambiguous must be one of {', '.join(AMBIGUOUS_POLICIES)}")
+    if zone_name:
+        get_zone(zone_name)
+    return zone_name or None, nonexistent, ambiguous
+
+
+def zoned_entries(entries, zone_name, nonexistent='shift', ambiguous='earlier'):
+    return [entry if isinstance(entry, ZonedEntry) else ZonedEntry(entry, zone_name, nonexistent, ambiguous)
+            for entry in entries]
@@ -0,0 +1,65 @@
+import csv
+import gc
+import os
+import weakref
+
+import pytest
+
+from power_e.actionlog import LOG_HEADER, ActionLogWriter, writer_from_config
+
+
+def write_log(path, rows=50):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_HEADER)
+        for _ in range(rows):
+            writer.writerow(["2025-07-30 13:42:07", "Daily Shutdown Scheduled", "01:42 PM"])
+    return os.path.getsize(path)
+
+
+def read_rows(path):
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_log_already_over_max_bytes_rotates_before_the_next_write(tmp_path):
+    path = str(tmp_path / "shutdown_log.csv")
+    size = write_log(path)
+
+    log = ActionLogWriter(path, max_bytes=size, backups=None)
+    log.append(["2025-07-31 13:42:07", "Scheduler Started", "N/A"])
+    log.close()
+
+    assert log.rotations == 1
+    assert read_rows(path) == [LOG_HEADER, ["2025-07-31 13:42:07", "Scheduler Started", "N/A"]]
+    (rotated,) = log.rotated_segments()
+    assert os.path.getsize(rotated) == size
+
+
+def test_closed_writer_is_not_kept_alive(tmp_path):
+    log = ActionLogWriter(str(tmp_path / "shutdown_log.csv"))
+    log.append(["2025-07-31 13:42:07", "Scheduler Started", "N/A"])
+    log.close()
+    ref = weakref.ref(log)
+    del log
+    gc.collect()
+    assert ref() is None
+
+
+@pytest.mark.parametrize('make_writer, kept', [
+    (lambda path, size: ActionLogWriter(path, max_bytes=size), 9),
+    (lambda path, size: writer_from_config({'log': {'max_bytes': size}}, path), 9),
+    (lambda path, size: writer_from_config({'log': {'max_bytes': size, 'backups': 2}}, path), 2),
+])
+def test_rotated_segments_are_pruned_only_when_backups_is_set(tmp_path, make_writer, kept):
+    path = str(tmp_path / "shutdown_log.csv")
+    for day in range(1, 9):
+        write_log(str(tmp_path / f"shutdown_log.202001{day:02d}-000000.csv"), rows=1)
+    size = write_log(path)
+
+    log = make_writer(path, size)
+    log.append(["2025-07-31 13:42:07", "Scheduler Started", "N/A"])
+    log.close()
+
+    assert log.rotations == 1
+    assert len(log.rotated_segments()) == kept
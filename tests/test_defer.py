@@ -0,0 +1,66 @@
+import csv
+import os
+from datetime import datetime
+
+import pytest
+
+from power_e.activity import PROC_STAT, LoadGate
+from power_e.clock import VirtualClock
+from power_e.config import write_config_atomic
+from power_e.executor import FakeBackend
+from power_e.journal import Journal
+from power_e.schedule import ScheduleEngine, ScheduleEntry
+from power_e.simulate import SimulatedScheduler
+
+needs_proc = pytest.mark.skipif(not os.path.exists(PROC_STAT), reason="load gate reads /proc")
+
+
+@needs_proc
+def test_gate_closes_its_sampler_once_the_action_may_run():
+    gate = LoadGate(cpu_percent=None, disk_mb_s=None)
+    gate.tick(100, 0.0)
+    gate.tick(90, 10.0)
+    assert gate.sampler is not None
+    assert gate.decide(datetime(2025, 1, 1, 18, 0), 10.0)[0] == 0
+    assert gate.sampler is None
+
+
+@needs_proc
+def test_gate_keeps_sampling_while_it_defers():
+    gate = LoadGate(cpu_percent=-1, disk_mb_s=None, step=600, max_defer=600)
+    fire = datetime(2025, 1, 1, 18, 0)
+    gate.tick(100, 0.0)
+    gate.tick(90, 10.0)
+    assert gate.decide(fire, 10.0)[0] == 600
+    assert gate.sampler is not None
+
+    gate.tick(90, 20.0)
+    delay, reason = gate.decide(fire, 20.0)
+    assert delay == 0 and "the limit" in reason
+    assert gate.sampler is None
+
+
+def test_power_action_due_with_a_deferred_one_is_skipped_and_logged(tmp_path):
+    log_path = str(tmp_path / "shutdown_log.csv")
+    config_file = str(tmp_path / "scheduler_config.json")
+    write_config_atomic(config_file, {'hour': '11', 'minute': '00', 'ampm': 'PM', 'log': {'path': log_path}})
+    backend = FakeBackend()
+    scheduler = SimulatedScheduler(VirtualClock(datetime(2025, 1, 1, 18, 0)), backend, config_file)
+    scheduler.journal = journal = Journal(str(tmp_path / "power_e_journal.log"))
+
+    deferred_fire, due_fire = datetime(2025, 1, 1, 17, 50), datetime(2025, 1, 1, 18, 0)
+    scheduler.schedule = ScheduleEngine([ScheduleEntry('reboot', 18, 0)], now=datetime(2025, 1, 1, 17, 0))
+    scheduler.deferred = ('shutdown', deferred_fire, due_fire, "CPU busy")
+    scheduler.run_due_actions()
+    scheduler.executor.close(wait=True)
+    scheduler.action_log.close()
+    journal.close()
+
+    assert [argv[1] for argv in backend.calls] == ['-c', '-h']
+    assert scheduler.deferred is None
+    assert journal.state.counts == {'fired': 1, 'skipped': 1}
+    assert journal.state.is_handled('reboot', due_fire.timestamp())
+    with open(log_path, newline='') as f:
+        actions = [row[1] for row in csv.reader(f)][1:]
+    assert actions[0] == "Skipped Reboot: the shutdown due at 05:50 PM runs instead"
+    assert actions[1] == "Daily Shutdown Executed"
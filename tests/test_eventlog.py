@@ -0,0 +1,80 @@
+import csv
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from power_e.actionlog import LOG_HEADER
+from power_e.eventlog import EventLog, EventLogWriter, csv_to_events, events_to_csv, merge_event_logs, parse_bound
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def write_events(path, moments):
+    log = EventLogWriter(str(path))
+    for when in moments:
+        log.log("Shutdown Warning", when=when, scheduled=when)
+    log.close()
+
+
+# 2025-11-02 01:30 happens twice in New York: at 05:30 UTC (EDT) and at 06:30 UTC (EST)
+FALL_BACK = [datetime(2025, 11, 2, 0, 50), datetime(2025, 11, 2, 1, 10), datetime(2025, 11, 2, 1, 50),
+             datetime(2025, 11, 2, 1, 10, fold=1), datetime(2025, 11, 2, 1, 50, fold=1),
+             datetime(2025, 11, 2, 2, 10)]
+
+
+def test_repeated_hour_stays_in_order(tmp_path, new_york):
+    path = tmp_path / "shutdown_log.bin"
+    write_events(path, FALL_BACK)
+
+    with EventLog(str(path)) as log:
+        timestamps = [event.timestamp for event in log]
+        assert timestamps == sorted(timestamps) and len(set(timestamps)) == len(FALL_BACK)
+        assert [log.fields(event)["Timestamp"][11:] for event in log] == \
+            ["00:50:00", "01:10:00", "01:50:00", "01:10:00", "01:50:00", "02:10:00"]
+        # The second 01:10 (EST) is 06:10 UTC
+        second = int(datetime(2025, 11, 2, 6, 10, tzinfo=timezone.utc).timestamp())
+        assert log.bisect(second) == 3
+        assert len(list(log.between(second, parse_bound("2025-11-02 02:00:00")))) == 2
+        assert len(list(log.between(parse_bound("2025-11-02"), parse_bound("2025-11-03")))) == len(FALL_BACK)
+
+
+def test_csv_round_trip_through_repeated_hour(tmp_path, new_york):
+    csv_path, events_path, back = (str(tmp_path / name) for name in ("log.csv", "log.bin", "back.csv"))
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_HEADER)
+        for when in FALL_BACK:
+            writer.writerow([when.strftime("%Y-%m-%d %H:%M:%S"), "Shutdown Warning", when.strftime("%I:%M %p")])
+        writer.writerow(["2025-11-02 03:00:00", "Scheduler Started", "N/A"])
+
+    assert csv_to_events(csv_path, events_path) == len(FALL_BACK) + 1
+    with EventLog(events_path) as log:
+        timestamps = [event.timestamp for event in log]
+        assert timestamps == sorted(timestamps) and len(set(timestamps)) == len(timestamps)
+    events_to_csv(events_path, back)
+    with open(csv_path, 'rb') as original, open(back, 'rb') as converted:
+        assert converted.read() == original.read()
+
+
+def test_merge_orders_hosts_in_different_zones_by_real_time(tmp_path, monkeypatch):
+    # 09:00 in New York is 14:00 UTC, after 13:00 in Berlin (12:00 UTC)
+    paths = []
+    for zone, hour in (('America/New_York', 9), ('Europe/Berlin', 13)):
+        monkeypatch.setenv('TZ', zone)
+        time.tzset()
+        paths.append(str(tmp_path / f"{hour}.bin"))
+        write_events(paths[-1], [datetime(2025, 7, 1, hour)])
+    monkeypatch.undo()
+    time.tzset()
+
+    merge_event_logs(paths, str(tmp_path / "fleet.bin"))
+    with EventLog(str(tmp_path / "fleet.bin")) as log:
+        assert [log.fields(event)["Timestamp"] for event in log] == ["2025-07-01 13:00:00", "2025-07-01 09:00:00"]
@@ -0,0 +1,52 @@
+import subprocess
+from datetime import datetime
+
+import pytest
+
+from power_e.clock import VirtualClock
+from power_e.config import write_config_atomic
+from power_e.executor import CommandPlan, FakeBackend, ShutdownExecutor
+from power_e.simulate import SimulatedScheduler
+
+CANCEL = ('shutdown', '-c')
+SHUTDOWN = ('shutdown', '-h', '+1')
+
+
+def executor(results):
+    plan = CommandPlan('Linux', {'cancel': list(CANCEL), 'shutdown': list(SHUTDOWN), 'reboot': ['shutdown', '-r']})
+    return ShutdownExecutor(plan, FakeBackend(results))
+
+
+def test_pre_cancel_with_nothing_pending_is_not_a_failure():
+    # shutdown -c exits nonzero when no shutdown is scheduled
+    commands = executor({CANCEL: 1})
+    assert commands.submit('shutdown').result() == 0
+    commands.close(wait=True)
+    assert commands.failures == 0
+    assert [result.returncode for result in commands.results] == [1, 0]
+
+
+def test_failed_command_and_explicit_cancel_are_counted():
+    commands = executor({CANCEL: 1, SHUTDOWN: 1})
+    with pytest.raises(subprocess.CalledProcessError):
+        commands.submit('shutdown').result()
+    assert commands.failures == 1
+    with pytest.raises(subprocess.CalledProcessError):
+        commands.cancel().result()
+    commands.close(wait=True)
+    assert commands.failures == 2
+
+
+def test_cancel_pending_without_a_pending_action_does_nothing(tmp_path):
+    log_path = str(tmp_path / "shutdown_log.csv")
+    config_file = str(tmp_path / "scheduler_config.json")
+    write_config_atomic(config_file, {'hour': '11', 'minute': '00', 'ampm': 'PM', 'log': {'path': log_path}})
+    backend = FakeBackend()
+    scheduler = SimulatedScheduler(VirtualClock(datetime(2025, 1, 1, 18, 0)), backend, config_file)
+
+    assert scheduler.cancel_pending() == {'cancelled': None}
+    scheduler.executor.close(wait=True)
+    scheduler.action_log.close()
+
+    assert backend.calls == []
+    assert scheduler.action_log.rows_written == 0
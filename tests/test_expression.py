@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+
+from power_e.expression import ExpressionError, Rule, ScheduleExpression
+
+START = datetime(2025, 1, 1)  # A Wednesday
+
+
+def at(month, day, hour, minute=0, year=2025):
+    return datetime(year, month, day, hour, minute)
+
+
+@pytest.mark.parametrize('text, expected', [
+    # Cron: minute hour day-of-month month day-of-week
+    ('30 18 * * 1-5', [at(1, 1, 18, 30), at(1, 2, 18, 30), at(1, 3, 18, 30), at(1, 6, 18, 30)]),
+    ('*/30 9 * * *', [at(1, 1, 9), at(1, 1, 9, 30), at(1, 2, 9)]),
+    ('0 9 1,15 * *', [at(1, 1, 9), at(1, 15, 9), at(2, 1, 9)]),
+    ('0 0 1 jan,jul *', [at(7, 1, 0), at(1, 1, 0, year=2026), at(7, 1, 0, year=2026)]),
+    ('0 0 29 2 *', [at(2, 29, 0, year=2028), at(2, 29, 0, year=2032)]),
+    # Both day fields restricted: the 13th or a Friday, as in cron
+    ('0 12 13 * 5', [at(1, 3, 12), at(1, 10, 12), at(1, 13, 12), at(1, 17, 12)]),
+    ('0 12 1 * mon', [at(1, 1, 12), at(1, 6, 12), at(1, 13, 12)]),
+    # Sunday is 0 and 7
+    ('0 8 * * 0', [at(1, 5, 8), at(1, 12, 8), at(1, 19, 8)]),
+    ('0 8 * * 7', [at(1, 5, 8), at(1, 12, 8), at(1, 19, 8)]),
+    ('0 8 * * sun', [at(1, 5, 8), at(1, 12, 8), at(1, 19, 8)]),
+    ('0 8 * * 0-6', [at(1, 1, 8), at(1, 2, 8), at(1, 3, 8), at(1, 4, 8)]),
+    ('0 8 * * 5-7', [at(1, 3, 8), at(1, 4, 8), at(1, 5, 8), at(1, 10, 8)]),
+    # Readable clauses
+    ('weekdays 18:30, fri 16:00', [at(1, 1, 18, 30), at(1, 2, 18, 30), at(1, 3, 16), at(1, 3, 18, 30),
+                                   at(1, 6, 18, 30)]),
+    ('sat-sun 11 PM', [at(1, 4, 23), at(1, 5, 23), at(1, 11, 23)]),
+    ('fri-mon 7:00', [at(1, 3, 7), at(1, 4, 7), at(1, 5, 7), at(1, 6, 7)]),
+    ('mon, wed 6:30 pm', [at(1, 1, 18, 30), at(1, 6, 18, 30), at(1, 8, 18, 30)]),
+    ('daily 9:00 17:00', [at(1, 1, 9), at(1, 1, 17), at(1, 2, 9)]),
+    ('every friday at 4pm', [at(1, 3, 16), at(1, 10, 16)]),
+])
+def test_next_fire_times(text, expected):
+    assert ScheduleExpression(text).next_fires(START, len(expected)) == expected
+
+
+def test_excluded_dates_are_skipped():
+    expression = ScheduleExpression("weekdays 18:30 except holidays 2025-01-06", holidays=['2025-01-02'])
+    assert expression.next_fires(START, 3) == [at(1, 1, 18, 30), at(1, 3, 18, 30), at(1, 7, 18, 30)]
+
+
+def test_rule_day_masks_match_either_day_field():
+    # Fridays (Monday is bit 0) or the 13th
+    rule = Rule([12 * 60], weekdays=1 << 4, monthdays=1 << 13)
+    assert rule.next_fire(at(1, 10, 12)) == at(1, 13, 12)
+    assert rule.next_fire(at(1, 13, 12)) == at(1, 17, 12)
+
+
+def test_day_pattern_that_never_occurs_has_no_fire():
+    assert ScheduleExpression('0 0 31 2 *').next_fire(START) is None
+
+
+@pytest.mark.parametrize('text', ['61 * * * *', '0 0 * * 8', 'mon', 'weekdays 25:00', ''])
+def test_invalid_expressions_are_rejected(text):
+    with pytest.raises(ExpressionError):
+        ScheduleExpression(text).next_fire(START)
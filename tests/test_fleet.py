@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from power_e.fleet import FleetCoordinator, RecordingTransport
+from power_e.schedule import ScheduleEntry
+
+NOW = datetime(2025, 7, 30, 12, 0, tzinfo=timezone.utc)
+
+
+def entries():
+    return [ScheduleEntry('shutdown', 18, 30), ScheduleEntry('warn', 18, 25)]
+
+
+def test_replacing_a_host_keeps_the_heap_flat():
+    coordinator = FleetCoordinator(RecordingTransport())
+    coordinator.add_host('other', entries(), now=NOW, zone=None)
+    for _ in range(50):
+        coordinator.add_host('h1', entries(), now=NOW, zone=None)
+        assert len(coordinator.engine) <= 3 * 4
+    coordinator.remove_host('h1')
+    coordinator.add_host('h1', entries(), now=NOW, zone=None)
+    coordinator.remove_host('h1')
+    assert len(coordinator.engine) <= 2 * 2
+
+
+def test_removed_host_entries_are_dropped_when_due():
+    coordinator = FleetCoordinator(RecordingTransport())
+    for host in ('h1', 'h2', 'h3'):
+        coordinator.add_host(host, entries(), now=NOW, zone=None)
+    coordinator.remove_host('h1')
+
+    due = coordinator.engine.pop_due(NOW + timedelta(hours=7), coordinator._alive)
+    assert sorted(host_entry.host for _, host_entry in due) == ['h2', 'h2', 'h3', 'h3']
+    assert len(coordinator.engine) == 4
+
+
+def test_only_the_current_schedule_fires():
+    transport = RecordingTransport()
+    coordinator = FleetCoordinator(transport)
+    soon = datetime.now(timezone.utc) + timedelta(seconds=0.2)
+
+    class OneShot:
+        action = 'shutdown'
+
+        def next_fire(self, after, blackout_dates=()):
+            return soon if soon > after else None
+
+    coordinator.add_host('h1', [OneShot()], zone=None)
+    coordinator.add_host('h1', [OneShot()], zone=None)
+    coordinator.add_host('h2', [OneShot()], zone=None)
+    coordinator.remove_host('h2')
+    asyncio.run(coordinator.run(until=soon + timedelta(seconds=0.5)))
+    assert [(host, action) for host, action, _ in transport.calls] == [('h1', 'shutdown')]
@@ -0,0 +1,96 @@
+import csv
+import os
+
+from power_e.actionlog import LOG_HEADER
+from power_e.history import HistoryStore
+
+
+def write_rows(path, rows, header=False):
+    with open(path, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(LOG_HEADER)
+        writer.writerows(rows)
+
+
+def rows(day, count):
+    return [[f"2025-07-{day:02d} 13:{minute:02d}:00", "Shutdown Executed", "01:00 PM"] for minute in range(count)]
+
+
+def test_ingest_resumes_where_it_stopped(tmp_path):
+    path = str(tmp_path / "shutdown_log.csv")
+    write_rows(path, rows(1, 3), header=True)
+    with HistoryStore(str(tmp_path / "history.db")) as store:
+        assert store.ingest_csv(path, host="lab") == 3
+        assert store.ingest_csv(path, host="lab") == 0
+        write_rows(path, rows(2, 2))
+        assert store.ingest_csv(path, host="lab") == 2
+
+
+def test_ingest_after_rotation_reads_the_new_file_from_the_start(tmp_path):
+    path = str(tmp_path / "shutdown_log.csv")
+    write_rows(path, rows(1, 5), header=True)
+    with HistoryStore(str(tmp_path / "history.db")) as store:
+        assert store.ingest_csv(path, host="lab") == 5
+        old_size = os.path.getsize(path)
+
+        os.replace(path, str(tmp_path / "shutdown_log.20250701-000000.csv"))
+        write_rows(path, rows(2, 10), header=True)
+        assert os.path.getsize(path) > old_size
+
+        assert store.ingest_csv(path, host="lab") == 10
+        per_day = store.counts_per_day(host="lab")
+        assert per_day == [("2025-07-01", "Shutdown Executed", 5), ("2025-07-02", "Shutdown Executed", 10)]
+
+
+def test_rows_added_to_a_header_only_log_are_ingested(tmp_path):
+    path = str(tmp_path / "shutdown_log.csv")
+    write_rows(path, [], header=True)
+    with HistoryStore(str(tmp_path / "history.db")) as store:
+        assert store.ingest_csv(path, host="lab") == 0
+        write_rows(path, rows(1, 4))
+        assert store.ingest_csv(path, host="lab") == 4
+        assert store.ingest_csv(path, host="lab") == 0
+
+
+def test_rotated_segment_is_not_imported_again_under_its_new_name(tmp_path):
+    path = str(tmp_path / "shutdown_log.csv")
+    rotated = str(tmp_path / "shutdown_log.20250702-000000.csv")
+    write_rows(path, rows(1, 4), header=True)
+    with HistoryStore(str(tmp_path / "history.db")) as store:
+        assert store.ingest_csv(path, host="lab") == 4
+        write_rows(path, rows(2, 2))
+        os.replace(path, rotated)
+        write_rows(path, rows(3, 3), header=True)
+
+        imported = store.ingest_csv(path, host="lab") + store.ingest_csv(rotated, host="lab")
+        assert imported == 5
+        assert store.ingest_csv(path, host="lab") + store.ingest_csv(rotated, host="lab") == 0
+        assert sum(count for _, _, count in store.counts_per_day(host="lab")) == 9
+
+
+def test_logs_from_different_hosts_with_the_same_first_row_are_both_imported(tmp_path):
+    first, second = str(tmp_path / "a.csv"), str(tmp_path / "b.csv")
+    write_rows(first, rows(1, 3), header=True)
+    write_rows(second, rows(1, 3), header=True)
+    with HistoryStore(str(tmp_path / "history.db")) as store:
+        assert store.ingest_csv(first, host="lab-1") == 3
+        assert store.ingest_csv(second, host="lab-2") == 3
+
+
+def test_offsets_from_an_older_database_are_kept(tmp_path):
+    path = str(tmp_path / "shutdown_log.csv")
+    write_rows(path, rows(1, 3), header=True)
+    db_path = str(tmp_path / "history.db")
+    with HistoryStore(db_path) as store:
+        assert store.ingest_csv(path, host="lab") == 3
+        header_only, _ = store._file_identity(path)
+        offset = store.db.execute("SELECT offset FROM ingest_offsets").fetchone()[0]
+        with store.db:
+            store.db.execute("DELETE FROM ingest_offsets")
+            store.db.execute("INSERT INTO ingest_state VALUES (?, ?, ?)", (os.path.abspath(path), header_only, offset))
+
+    write_rows(path, rows(2, 2))
+    with HistoryStore(db_path) as store:
+        assert store.ingest_csv(path, host="lab") == 2
+        assert store.db.execute("SELECT COUNT(*) FROM ingest_state").fetchone()[0] == 0
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from power_e.instance import InstanceLock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOLDER = textwrap.dedent("""
+    import sys, time
+    sys.path.insert(0, {root!r})
+    from power_e.instance import InstanceLock
+
+    lock = InstanceLock({path!r})
+    print('owner' if lock.acquire() else 'refused', flush=True)
+    sys.stdin.readline()
+""")
+
+
+def start_holder(path):
+    return subprocess.Popen([sys.executable, '-c', HOLDER.format(root=ROOT, path=path)],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+
+
+def test_second_process_is_refused_until_the_owner_dies(tmp_path):
+    path = str(tmp_path / "power-e.lock")
+    owner = start_holder(path)
+    try:
+        assert owner.stdout.readline().strip() == 'owner'
+        lock = InstanceLock(path)
+        assert not lock.acquire()
+        assert lock.holder() == owner.pid
+    finally:
+        owner.kill()
+        owner.wait()
+
+    # Killed without releasing: the OS dropped its lock, and the PID left in the file does not matter
+    assert lock.holder() is None
+    assert lock.acquire()
+    assert lock.holder() == os.getpid()
+    lock.release()
+    assert lock.holder() is None
+
+
+def test_empty_lock_file_held_by_a_process_is_not_taken(tmp_path):
+    path = str(tmp_path / "power-e.lock")
+    owner = start_holder(path)
+    try:
+        assert owner.stdout.readline().strip() == 'owner'
+        # As if the owner had not written its PID yet
+        os.truncate(path, 0)
+        assert not InstanceLock(path).acquire()
+    finally:
+        owner.kill()
+        owner.wait()
+
+
+def test_starters_racing_for_the_lock_get_exactly_one_owner(tmp_path):
+    path = str(tmp_path / "power-e.lock")
+    with open(path, 'w') as f:
+        f.write("999999999\n")  # Stale PID from a crashed owner
+    starters = [start_holder(path) for _ in range(8)]
+    try:
+        results = [starter.stdout.readline().strip() for starter in starters]
+    finally:
+        for starter in starters:
+            starter.kill()
+            starter.wait()
+    assert sorted(results) == ['owner'] + ['refused'] * 7
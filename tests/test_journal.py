@@ -0,0 +1,90 @@
+import pytest
+
+from power_e.journal import Journal, encode_record, fire_missed, missed_policy_from_config
+
+MONDAY = 1751893200.0  # 2025-07-07 13:00 UTC
+TUESDAY = MONDAY + 86400
+
+
+def write_journal(path, records):
+    with open(path, 'w', newline='') as f:
+        f.write(''.join(encode_record(seq, kind, action, fire, fire)
+                        for seq, (kind, action, fire) in enumerate(records, 1)))
+
+
+def torn(line):
+    return line[:len(line) // 2]
+
+
+def corrupt(line):
+    return line.replace('fired', 'fried', 1)
+
+
+@pytest.mark.parametrize('damage', [torn, corrupt])
+def test_damaged_last_record_is_cut_off_on_replay(tmp_path, damage):
+    path = str(tmp_path / "journal.log")
+    write_journal(path, [('armed', 'shutdown', MONDAY), ('fired', 'shutdown', MONDAY),
+                         ('armed', 'shutdown', TUESDAY), ('fired', 'shutdown', TUESDAY)])
+    with open(path) as f:
+        lines = f.readlines()
+    good = ''.join(lines[:-1])
+    with open(path, 'w', newline='') as f:
+        f.write(good + damage(lines[-1]))
+
+    journal = Journal(path, checkpoint_every=100)
+    try:
+        assert journal.replayed == 3
+        assert journal.truncated
+        assert journal.state.is_handled('shutdown', MONDAY)
+        assert not journal.state.is_handled('shutdown', TUESDAY)
+        assert journal.state.armed == ('shutdown', TUESDAY)
+        with open(path) as f:
+            assert f.read() == good
+
+        # Records written after the cut follow the last good line and replay
+        journal.record('skipped', 'shutdown', TUESDAY, sync=True)
+        with open(path) as f:
+            text = f.read()
+        assert text.startswith(good) and text[len(good):].startswith('4 skipped shutdown ')
+    finally:
+        journal.close()
+
+    reopened = Journal(path)
+    try:
+        assert reopened.state.is_handled('shutdown', TUESDAY)
+        assert not reopened.truncated
+    finally:
+        reopened.close()
+
+
+def test_clean_journal_replays_everything(tmp_path):
+    path = str(tmp_path / "journal.log")
+    write_journal(path, [('armed', 'reboot', MONDAY), ('cancelled', 'reboot', MONDAY)])
+    journal = Journal(path)
+    try:
+        assert journal.replayed == 2 and not journal.truncated
+        assert journal.state.is_handled('reboot', MONDAY)
+        assert not journal.state.is_handled('shutdown', MONDAY)
+        assert journal.state.last_handled == MONDAY
+    finally:
+        journal.close()
+
+
+@pytest.mark.parametrize('options, late, expected', [
+    ({}, 60, False),
+    ({'missed': 'skip'}, 0, False),
+    ({'missed': 'fire'}, 7 * 86400, True),
+    ({'missed': 'grace'}, 15 * 60, True),
+    ({'missed': 'grace'}, 15 * 60 + 1, False),
+    ({'missed': 'grace', 'grace_minutes': 60}, 30 * 60, True),
+    ({'missed': 'grace', 'grace_minutes': 60}, 61 * 60, False),
+    ({'missed': 'grace', 'grace_minutes': 0}, 1, False),
+])
+def test_missed_fire_decision_per_policy(options, late, expected):
+    policy, grace = missed_policy_from_config({'journal': options})
+    assert fire_missed(policy, grace, late) is expected
+
+
+def test_unknown_missed_policy_is_rejected():
+    with pytest.raises(ValueError):
+        missed_policy_from_config({'journal': {'missed': 'later'}})
@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+POWER_E = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'PowerE.py')
+
+
+def os_timer(*args):
+    return subprocess.run([sys.executable, '-W', 'error::ResourceWarning', POWER_E, 'os-timer', *args],
+                          capture_output=True, text=True, timeout=60)
+
+
+@pytest.mark.parametrize('backend', ['systemd', 'at', 'schtasks'])
+def test_check_compares_generated_files_without_leaking_handles(tmp_path, backend):
+    config = tmp_path / "scheduler_config.json"
+    config.write_text(json.dumps({'hour': '11', 'minute': '00', 'ampm': 'PM'}))
+    output = tmp_path / backend
+    options = ['--backend', backend, '--config', str(config), '--output', str(output)]
+
+    assert os_timer(*options).returncode == 0
+    checked = os_timer(*options, '--check')
+    assert checked.returncode == 0, checked.stdout
+    assert checked.stderr == ""
+
+    name = sorted(os.listdir(output))[0]
+    with open(output / name, 'a') as f:
+        f.write("\n")
+    stale = os_timer(*options, '--check')
+    assert stale.returncode == 1
+    assert name in stale.stdout
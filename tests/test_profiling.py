@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = textwrap.dedent("""
+    import os, sys, threading
+    sys.path.insert(0, {root!r})
+    from power_e.profiling import Profiler
+
+    profiler = Profiler({directory!r}, interval=3600).start()
+    ran = []
+
+    def thread_target():
+        ran.append(sum(range(1000)))
+
+    thread = threading.Thread(target=thread_target)
+    thread.start()
+    thread.join()
+    profiler.stop()
+    assert ran, "thread target did not run"
+    with open(os.path.join(profiler.directory, 'cprofile.txt')) as f:
+        assert 'thread_target' in f.read(), "thread was not profiled"
+    print("ok")
+""")
+
+
+def test_threads_started_under_the_profiler_run_and_are_profiled(tmp_path):
+    script = SCRIPT.format(root=ROOT, directory=str(tmp_path / "profiles"))
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("ok")
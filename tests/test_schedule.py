@@ -0,0 +1,59 @@
+from datetime import date, datetime, timedelta
+
+from power_e.schedule import ScheduleEngine, ScheduleEntry
+
+START = datetime(2025, 1, 1)  # A Wednesday
+
+
+def test_pop_due_returns_entries_in_fire_order_and_requeues_them():
+    shutdown = ScheduleEntry('shutdown', 23, 30)
+    warn = ScheduleEntry('warn', 23, 15)
+    engine = ScheduleEngine([shutdown, warn], now=START)
+
+    assert engine.pop_due(datetime(2025, 1, 1, 23, 0)) == []
+    due = engine.pop_due(datetime(2025, 1, 1, 23, 30))
+    assert due == [(datetime(2025, 1, 1, 23, 15), warn), (datetime(2025, 1, 1, 23, 30), shutdown)]
+    assert engine.next_fire_time() == datetime(2025, 1, 2, 23, 15)
+    assert len(engine) == 2
+
+
+def test_overdue_entry_fires_once_not_once_per_missed_day():
+    engine = ScheduleEngine([ScheduleEntry('shutdown', 18, 0)], now=START)
+    due = engine.pop_due(datetime(2025, 1, 10, 12, 0))
+    assert len(due) == 1
+    assert engine.next_fire_time() == datetime(2025, 1, 10, 18, 0)
+
+
+def test_weekdays_blackout_dates_and_one_off_dates():
+    weekdays = ScheduleEntry('shutdown', 18, 0, days=range(5))
+    once = ScheduleEntry('reboot', 3, 0, on_date=date(2025, 1, 2))
+    engine = ScheduleEngine([weekdays, once], blackout_dates=[date(2025, 1, 3)], now=START)
+
+    fires = []
+    for hour in range(7 * 24):
+        fires += [(fire, entry.action) for fire, entry in engine.pop_due(START + timedelta(hours=hour))]
+    assert fires == [(datetime(2025, 1, 1, 18, 0), 'shutdown'),
+                     (datetime(2025, 1, 2, 3, 0), 'reboot'),
+                     (datetime(2025, 1, 2, 18, 0), 'shutdown'),
+                     (datetime(2025, 1, 6, 18, 0), 'shutdown'),
+                     (datetime(2025, 1, 7, 18, 0), 'shutdown')]
+    assert len(engine) == 1
+
+
+def test_skip_next_moves_only_the_head_entry():
+    shutdown = ScheduleEntry('shutdown', 18, 0)
+    engine = ScheduleEngine([shutdown, ScheduleEntry('warn', 17, 45)], now=START)
+    assert engine.skip_next()[1].action == 'warn'
+    assert engine.peek() == (datetime(2025, 1, 1, 18, 0), shutdown)
+    assert [entry.action for _, entry in engine.pop_due(START + timedelta(days=1))] == ['shutdown']
+
+
+def test_pop_due_and_compact_drop_dead_entries():
+    keep, drop = ScheduleEntry('shutdown', 18, 0), ScheduleEntry('warn', 17, 0)
+    engine = ScheduleEngine([keep, drop, ScheduleEntry('warn', 19, 0)], now=START)
+    alive = lambda entry: entry is not drop
+    assert [entry for _, entry in engine.pop_due(datetime(2025, 1, 1, 18, 0), alive)] == [keep]
+    assert len(engine) == 2
+
+    engine.compact(lambda entry: entry is keep)
+    assert len(engine) == 1
@@ -0,0 +1,32 @@
+import os
+import sys
+from collections import Counter
+
+from power_e.simulate import simulate
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import soak_reschedule  # noqa: E402
+
+CONFIG = {
+    'hour': '11', 'minute': '30', 'ampm': 'PM',
+    'schedules': [
+        {'action': 'warn', 'time': '11:15 PM'},
+        {'action': 'reboot', 'time': '03:00 AM', 'days': ['sun']},
+    ],
+}
+
+
+def test_four_weeks_fire_every_entry_on_time():
+    result = simulate(CONFIG, days=28)
+    assert Counter(action for _, _, action in result.fires) == {'warn': 28, 'shutdown': 28, 'reboot': 4}
+    assert result.max_fire_error == 0.0
+    assert result.warnings == 28
+    # Every power action cancels any pending one first
+    assert len(result.calls) == 2 * (28 + 4)
+
+
+def test_soak_of_cancelled_shutdowns_keeps_stack_and_rss_flat():
+    days = 10000
+    scheduler, samples, _ = soak_reschedule.soak(days)
+    soak_reschedule.check(scheduler, samples, days, rss_slack_kib=2048)
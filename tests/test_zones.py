@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from power_e.schedule import ScheduleEntry
+from power_e.zones import ZonedEntry, zone_settings
+
+pytest.importorskip('zoneinfo')
+
+ZONE = 'America/New_York'
+EST, EDT = timezone(timedelta(hours=-5)), timezone(timedelta(hours=-4))
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+# 2025-03-09: clocks go from 02:00 EST to 03:00 EDT (07:00 UTC), so 02:30 does not exist
+@pytest.mark.parametrize('policy, expected', [
+    ('shift', datetime(2025, 3, 9, 3, 30, tzinfo=EDT)),
+    ('transition', datetime(2025, 3, 9, 3, 0, tzinfo=EDT)),
+    ('skip', datetime(2025, 3, 10, 2, 30, tzinfo=EDT)),
+])
+def test_spring_forward_gap(policy, expected):
+    entry = ZonedEntry(ScheduleEntry('shutdown', 2, 30), ZONE, nonexistent=policy)
+    fire = entry.next_fire(datetime(2025, 3, 9, 0, 0, tzinfo=EST))
+    assert fire == expected
+    assert fire.utcoffset() == expected.utcoffset()
+
+
+# 2025-11-02: clocks go from 02:00 EDT back to 01:00 EST (06:00 UTC), so 01:30 happens twice
+@pytest.mark.parametrize('policy, expected', [
+    ('earlier', utc(2025, 11, 2, 5, 30)),
+    ('later', utc(2025, 11, 2, 6, 30)),
+])
+def test_fall_back_overlap_fires_once(policy, expected):
+    entry = ZonedEntry(ScheduleEntry('shutdown', 1, 30), ZONE, ambiguous=policy)
+    fire = entry.next_fire(datetime(2025, 11, 2, 0, 0, tzinfo=EDT))
+    assert fire == expected
+    assert fire.utcoffset() == (EDT if policy == 'earlier' else EST).utcoffset(None)
+    # The other occurrence of 01:30 is not a second fire
+    assert entry.next_fire(fire) == datetime(2025, 11, 3, 1, 30, tzinfo=EST)
+
+
+@pytest.mark.parametrize('nonexistent', ['shift', 'transition', 'skip'])
+def test_gap_policies_leave_other_days_alone(nonexistent):
+    entry = ZonedEntry(ScheduleEntry('shutdown', 2, 30), ZONE, nonexistent=nonexistent)
+    assert entry.next_fire(datetime(2025, 3, 8, 0, 0, tzinfo=EST)) == datetime(2025, 3, 8, 2, 30, tzinfo=EST)
+    assert entry.next_fire(datetime(2025, 3, 11, 0, 0, tzinfo=EDT)) == datetime(2025, 3, 11, 2, 30, tzinfo=EDT)
+
+
+def test_zone_settings_validates_policies():
+    config = {'timezone': ZONE, 'dst_policy': {'nonexistent': 'skip', 'ambiguous': 'later'}}
+    assert zone_settings(config) == (ZONE, 'skip', 'later')
+    assert zone_settings({}) == (None, 'shift', 'earlier')
+    with pytest.raises(ValueError):
+        zone_settings({'dst_policy': {'nonexistent': 'never'}})
+    with pytest.raises(ValueError):
+        zone_settings({'dst_policy': {'ambiguous': 'both'}})